@@ -0,0 +1,153 @@
+"""
+Load-adaptive quality levels for the detection service.
+
+Under a traffic spike a worker that keeps full quality only queues requests
+until they time out. The controller watches how many detections are in
+flight and the latency of recent ones, steps down through the quality
+levels (smaller inference size, the fast model, no board re-detection)
+while the latency SLO is missed, and steps back up once load recedes.
+Stepping up needs clearly lower latency, an emptier queue and a longer
+hold than stepping down, so the level does not oscillate around the SLO.
+
+Levels are index 0 (full quality) upwards and may be configured as a JSON
+list in ``CHESS_QUALITY_LEVELS``:
+
+    [{"name": "full", "imgsz": 640}, {"name": "fast", "imgsz": 320, "fast_model": true}]
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+# imgsz: YOLO inference size; fast_model: use the smaller or quantized model
+# (CHESS_FAST_MODEL_PATH) when one is loaded; redetect_board: refresh the
+# board outline of live sessions
+QualityLevel = namedtuple("QualityLevel", "name imgsz fast_model redetect_board")
+
+DEFAULT_LEVELS = (
+    QualityLevel("full", 640, False, True),
+    QualityLevel("reduced", 480, False, True),
+    QualityLevel("fast", 416, True, True),
+    QualityLevel("minimal", 320, True, False),
+)
+
+
+def quality_levels(spec=None):
+    """Quality levels from a JSON list (default ``CHESS_QUALITY_LEVELS``), best first"""
+    spec = spec if spec is not None else os.getenv("CHESS_QUALITY_LEVELS")
+    if not spec:
+        return DEFAULT_LEVELS
+    try:
+        return tuple(
+            QualityLevel(
+                str(level.get("name", f"level{index}")),
+                int(level.get("imgsz", 640)),
+                bool(level.get("fast_model", False)),
+                bool(level.get("redetect_board", True)),
+            )
+            for index, level in enumerate(json.loads(spec))
+        ) or DEFAULT_LEVELS
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Invalid quality levels {spec!r}: {e}")
+        return DEFAULT_LEVELS
+
+
+class QualityController:
+    """Chooses the quality level from queue depth and recent latencies.
+
+    Every detection runs inside ``track()``, which yields the level to use.
+    The level steps down when the 95th percentile of the last ``window``
+    latencies exceeds ``slo`` seconds or ``queue_high`` detections are in
+    flight, at most once per ``down_hold`` seconds. It steps up when that
+    percentile is below ``recover`` times the SLO with at most
+    ``queue_low`` in flight, no sooner than ``up_hold`` seconds after the
+    last change. Latencies are forgotten on every change, so each decision
+    is based on the current level only. ``backlog``, when given, returns the
+    requests waiting to start (e.g. in admission control), which count as
+    in flight.
+    """
+
+    def __init__(self, levels=DEFAULT_LEVELS, slo=2.0, queue_high=8, queue_low=1,
+                 window=32, min_samples=8, recover=0.5, down_hold=1.0, up_hold=10.0, backlog=None):
+        self.levels = tuple(levels)
+        self.slo = slo
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.min_samples = min_samples
+        self.recover = recover
+        self.down_hold = down_hold
+        self.up_hold = up_hold
+        self.backlog = backlog
+        self.level = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=window)
+        # No hold before the first change
+        self.changed_at = float("-inf")
+        self.changes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.levels[self.level].name
+
+    @contextmanager
+    def track(self):
+        """Count one detection as in flight and record its latency; yields the level"""
+        started = time.monotonic()
+        with self._lock:
+            self.in_flight += 1
+            # A burst of arrivals degrades before the first slow answer comes back
+            self._adjust(started)
+            level = self.level
+        try:
+            yield level
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self.in_flight -= 1
+                # A result from an older level says nothing about the current one
+                if level == self.level:
+                    self.latencies.append(finished - started)
+                self._adjust(finished)
+
+    def percentile(self, fraction=0.95):
+        """Latency below which ``fraction`` of the recent detections finished, or None"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def _adjust(self, now):
+        held = now - self.changed_at
+        depth = self.in_flight + (self.backlog() if self.backlog else 0)
+        p95 = self.percentile() if len(self.latencies) >= self.min_samples else None
+        overloaded = depth >= self.queue_high or (p95 is not None and p95 > self.slo)
+        if overloaded:
+            if self.level < len(self.levels) - 1 and held >= self.down_hold:
+                self._set_level(self.level + 1, now)
+        elif (self.level > 0 and held >= self.up_hold and depth <= self.queue_low
+              and p95 is not None and p95 < self.slo * self.recover):
+            self._set_level(self.level - 1, now)
+
+    def _set_level(self, level, now):
+        print(f"Quality level {self.levels[self.level].name} -> {self.levels[level].name} "
+              f"({self.in_flight} in flight, p95 {self.percentile() or 0:.3f}s)")
+        self.level = level
+        self.changed_at = now
+        self.changes += 1
+        self.latencies.clear()
+
+    def stats(self):
+        with self._lock:
+            p95 = self.percentile()
+            return {
+                "level": self.level,
+                "name": self.levels[self.level].name,
+                "inFlight": self.in_flight,
+                "p95Ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "sloMs": round(self.slo * 1000, 1),
+                "changes": self.changes,
+            }
@@ -0,0 +1,198 @@
+"""
+Admission control for the vision API: per-client rate limits and
+concurrency caps with priority lanes.
+
+Every client (by IP, or the id a trusted proxy forwards) gets a token
+bucket per kind of work, so one runaway tab is answered 429 without
+affecting anyone else. Work that is admitted then takes a slot of a
+``PriorityLimiter``: vision and engine work have separate caps, a
+request that finds them full waits briefly in its lane, and a full
+queue or a wait past the timeout is answered 503 at once instead of
+piling up. Interactive requests (one-off uploads and analyses) are woken
+before bulk work (live frames, batch clients) and always have a reserved
+slot, so they are never stuck behind a stream.
+"""
+
+import asyncio
+import hmac
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+INTERACTIVE = 0
+BULK = 1
+LANES = ("interactive", "bulk")
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1")
+
+
+class AdmissionRejected(Exception):
+    """Work turned away; the client should retry after ``retry_after`` seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def forwarded_client(peer, headers, trusted, proxy_secret=""):
+    """Rate limit key of a request from ``peer`` with (lower case, bytes) ``headers``.
+
+    A ``trusted`` proxy names the client by the rightmost X-Forwarded-For
+    entry that is not one of its own loopback hops: entries further left
+    were sent by the client and can be anything. X-Client-Id is only taken
+    from a proxy that also sends the shared ``proxy_secret`` as
+    X-Proxy-Secret, since a browser could otherwise rotate it at will.
+    """
+    if not trusted:
+        return peer
+    sent_secret = headers.get(b"x-proxy-secret")
+    if proxy_secret and sent_secret and hmac.compare_digest(sent_secret, proxy_secret.encode()):
+        client_id = headers.get(b"x-client-id", b"").strip()
+        if client_id:
+            return client_id.decode("latin-1")
+    hops = [hop.strip() for hop in headers.get(b"x-forwarded-for", b"").split(b",")]
+    for hop in reversed(hops):
+        if hop and hop.decode("latin-1") not in LOOPBACK_ADDRESSES:
+            return hop.decode("latin-1")
+    return peer
+
+
+class TokenBucket:
+    """``rate`` tokens per second up to ``burst``"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now, cost=1.0):
+        """Take ``cost`` tokens; returns 0 when they were there, else the seconds until they are"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets by client key; the least recently seen clients are forgotten first"""
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.counters = {"allowed": 0, "limited": 0}
+
+    def check(self, key):
+        """Seconds ``key`` has to wait, 0 if the request may go ahead (always with a rate of 0)"""
+        if self.rate <= 0:
+            return 0.0
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        wait = bucket.take(time.monotonic())
+        self.counters["limited" if wait else "allowed"] += 1
+        return wait
+
+    def stats(self):
+        return dict(self.counters, rate=self.rate, burst=self.burst, clients=len(self.buckets))
+
+
+class PriorityLimiter:
+    """At most ``limit`` concurrent slots, handed to interactive waiters before bulk ones.
+
+    Bulk work may not take the last ``reserved`` slots. Each lane queues at
+    most ``max_queue`` waiters for up to ``queue_timeout`` seconds; beyond
+    that, slot() raises AdmissionRejected with a retry estimate from the
+    recent slot hold times. Used from one event loop, so no locking.
+    """
+
+    def __init__(self, limit, max_queue=16, queue_timeout=5.0, reserved=1):
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reserved = max(0, min(reserved, self.limit - 1))
+        self.in_use = 0
+        self.waiters = (deque(), deque())
+        # Moving average of how long a slot is held, for Retry-After
+        self.hold = 0.0
+        self.counters = {"admitted": 0, "queued": 0, "rejected": 0, "timedOut": 0}
+
+    def capacity(self, priority):
+        return self.limit if priority == INTERACTIVE else self.limit - self.reserved
+
+    def queued(self):
+        return sum(len(lane) for lane in self.waiters)
+
+    def retry_after(self):
+        """Seconds after which a slot is likely free, at least 1"""
+        return max(1, math.ceil(self.hold * (self.queued() + 1) / self.limit))
+
+    @asynccontextmanager
+    async def slot(self, priority=INTERACTIVE):
+        await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            self.hold = held if self.hold == 0 else 0.8 * self.hold + 0.2 * held
+            self.in_use -= 1
+            self._wake()
+
+    async def _acquire(self, priority):
+        # Waiters of the same or a higher priority go first
+        ahead = any(self.waiters[lane] for lane in range(priority + 1))
+        if not ahead and self.in_use < self.capacity(priority):
+            self.in_use += 1
+            self.counters["admitted"] += 1
+            return
+        lane = self.waiters[priority]
+        if len(lane) >= self.max_queue:
+            self.counters["rejected"] += 1
+            raise AdmissionRejected(f"{LANES[priority]} queue is full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.append(waiter)
+        self.counters["queued"] += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter in lane:
+                lane.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                self.in_use -= 1
+                self._wake()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.counters["timedOut"] += 1
+            raise AdmissionRejected(f"no {LANES[priority]} slot within {self.queue_timeout:g}s",
+                                    self.retry_after())
+        self.counters["admitted"] += 1
+
+    def _wake(self):
+        for priority, lane in enumerate(self.waiters):
+            while lane and self.in_use < self.capacity(priority):
+                waiter = lane.popleft()
+                if waiter.done():
+                    continue
+                self.in_use += 1
+                waiter.set_result(None)
+
+    def stats(self):
+        return dict(
+            self.counters,
+            limit=self.limit,
+            reserved=self.reserved,
+            inUse=self.in_use,
+            waiting={name: len(lane) for name, lane in zip(LANES, self.waiters)},
+            holdMs=round(self.hold * 1000, 1),
+        )
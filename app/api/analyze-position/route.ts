@@ -1,4 +1,5 @@
 import { type NextRequest, NextResponse } from "next/server"
+import { busyResponse, clientHeaders } from "@/lib/backend"
 
 export async function POST(request: NextRequest) {
   try {
@@ -14,10 +15,16 @@ export async function POST(request: NextRequest) {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
+        ...clientHeaders(request),
       },
       body: JSON.stringify(body),
     })
 
+    const busy = await busyResponse(response)
+    if (busy) {
+      return busy
+    }
+
     if (!response.ok) {
       throw new Error(`Backend responded with status: ${response.status}`)
     }
@@ -1,4 +1,5 @@
 import { type NextRequest, NextResponse } from "next/server"
+import { busyResponse, clientHeaders } from "@/lib/backend"
 
 export async function POST(request: NextRequest) {
   try {
@@ -16,9 +17,15 @@ export async function POST(request: NextRequest) {
     const backendUrl = process.env.BACKEND_URL || "http://127.0.0.1:8000"
     const response = await fetch(`${backendUrl}/api/detect-chess-position`, {
       method: "POST",
+      headers: clientHeaders(request),
       body: backendFormData,
     })
 
+    const busy = await busyResponse(response)
+    if (busy) {
+      return busy
+    }
+
     if (!response.ok) {
       throw new Error(`Backend responded with status: ${response.status}`)
     }
@@ -0,0 +1,313 @@
+"""
+Compact board state shared by the vision pipeline, the trackers and the backend.
+
+A position is 64 int8 labels plus 64 float32 detection confidences, with
+squares in FEN order (a8 = 0, b8 = 1, ..., h1 = 63) and label 0 for an empty
+square. FEN encoding and decoding are table driven, and two states can be
+diffed with a single vectorized comparison. Detectors can also record the
+top-k candidate labels per square for downstream repair.
+"""
+
+import functools
+
+import chess
+import numpy as np
+
+EMPTY = 0
+
+# Candidate labels kept per square
+TOP_K = 3
+
+# Label 0 is an empty square, labels 1..12 are the FEN piece symbols
+PIECE_SYMBOLS = "PNBRQKpnbrqk"
+PIECE_LABELS = {symbol: i + 1 for i, symbol in enumerate(PIECE_SYMBOLS)}
+
+SQUARE_NAMES = [file + rank for rank in "87654321" for file in "abcdefgh"]
+SQUARE_INDEX = {name: i for i, name in enumerate(SQUARE_NAMES)}
+
+# FEN index of every python-chess square (a1 = 0), and back
+FEN_INDEX = [(7 - chess.square_rank(square)) * 8 + chess.square_file(square) for square in chess.SQUARES]
+SQUARE_AT = [0] * 64
+for _square, _index in enumerate(FEN_INDEX):
+    SQUARE_AT[_index] = _square
+
+_PIECE_TYPES = [(PIECE_LABELS[chess.Piece(piece_type, color).symbol()], piece_type, color)
+                for color in chess.COLORS for piece_type in chess.PIECE_TYPES]
+
+
+@functools.lru_cache(maxsize=8192)
+def _encode_rank(rank):
+    parts = []
+    empty = 0
+    for label in rank:
+        if label == EMPTY:
+            empty += 1
+            continue
+        if empty:
+            parts.append(str(empty))
+            empty = 0
+        parts.append(PIECE_SYMBOLS[label - 1])
+    if empty:
+        parts.append(str(empty))
+    return "".join(parts)
+
+
+def encode_placement(labels):
+    """Encode 64 labels as the placement field of a FEN"""
+    rows = labels.reshape(8, 8)
+    return "/".join(_encode_rank(row.tobytes()) for row in rows)
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_placement(placement):
+    ranks = placement.split("/")
+    if len(ranks) != 8:
+        raise ValueError(f"Expected 8 ranks in placement: {placement!r}")
+
+    labels = np.zeros(64, np.int8)
+    for row, rank in enumerate(ranks):
+        i = row * 8
+        end = i + 8
+        for char in rank:
+            if char.isdigit():
+                i += int(char)
+                continue
+            label = PIECE_LABELS.get(char)
+            if label is None or i >= end:
+                raise ValueError(f"Invalid rank in placement: {rank!r}")
+            labels[i] = label
+            i += 1
+        if i != end:
+            raise ValueError(f"Invalid rank in placement: {rank!r}")
+    labels.setflags(write=False)
+    return labels
+
+
+def decode_placement(placement):
+    """Decode the placement field of a FEN into 64 labels"""
+    return _decode_placement(placement).copy()
+
+
+def board_labels(board):
+    """Return the pieces of a chess.Board as 64 labels"""
+    labels = np.zeros(64, np.int8)
+    for label, piece_type, color in _PIECE_TYPES:
+        for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+            labels[FEN_INDEX[square]] = label
+    return labels
+
+
+def board_from_labels(labels, turn=chess.WHITE):
+    """Build a chess.Board from 64 labels, inferring castling rights from home squares"""
+    board = chess.Board(None)
+    for i in np.flatnonzero(labels):
+        board.set_piece_at(SQUARE_AT[i], chess.Piece.from_symbol(PIECE_SYMBOLS[labels[i] - 1]))
+    board.turn = turn
+    board.castling_rights = chess.BB_CORNERS
+    board.castling_rights = board.clean_castling_rights()
+    return board
+
+
+def infer_castling(labels):
+    """Castling rights the king and rook home squares still allow, as a FEN field"""
+    return board_from_labels(labels).castling_xfen()
+
+
+def possible_turns(labels):
+    """Sides ("w", "b") that may be to move; the side not to move cannot be in check"""
+    return [turn for turn in "wb" if board_from_labels(labels, turn == "w").is_valid()]
+
+
+class BoardState:
+    """Piece placement with per-square confidences and FEN metadata"""
+    __slots__ = ("labels", "confidences", "candidate_labels", "candidate_confidences",
+                 "turn", "castling", "en_passant", "halfmove", "fullmove")
+
+    def __init__(self, labels=None, confidences=None, turn="w", castling="-",
+                 en_passant="-", halfmove=0, fullmove=1):
+        self.labels = np.zeros(64, np.int8) if labels is None else labels
+        self.confidences = np.zeros(64, np.float32) if confidences is None else confidences
+        # Best-first candidates per square; label 0 marks an unused slot
+        self.candidate_labels = np.zeros((64, TOP_K), np.int8)
+        self.candidate_confidences = np.zeros((64, TOP_K), np.float32)
+        self.turn = turn
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmove = halfmove
+        self.fullmove = fullmove
+
+    @classmethod
+    def from_fen(cls, fen, confidence=1.0):
+        """Parse a full FEN or just its placement field"""
+        fields = fen.split()
+        if not fields:
+            raise ValueError("Empty FEN")
+        labels = decode_placement(fields[0])
+        confidences = np.where(labels != EMPTY, confidence, 0.0).astype(np.float32)
+        state = cls(labels, confidences)
+        if len(fields) > 1:
+            state.turn = fields[1]
+        if len(fields) > 2:
+            state.castling = fields[2]
+        if len(fields) > 3:
+            state.en_passant = fields[3]
+        if len(fields) > 5:
+            state.halfmove = int(fields[4])
+            state.fullmove = int(fields[5])
+        return state
+
+    @classmethod
+    def from_board(cls, board, confidence=1.0):
+        labels = board_labels(board)
+        confidences = np.where(labels != EMPTY, confidence, 0.0).astype(np.float32)
+        en_passant = chess.square_name(board.ep_square) if board.has_legal_en_passant() else "-"
+        return cls(labels, confidences, "w" if board.turn else "b", board.castling_xfen(),
+                   en_passant, board.halfmove_clock, board.fullmove_number)
+
+    @classmethod
+    def from_positions(cls, piece_positions, piece_confidences=None):
+        """Build a state from a square-name dict (values are symbols or {'piece', 'confidence'})"""
+        state = cls()
+        for square, data in piece_positions.items():
+            if isinstance(data, dict):
+                piece, confidence = data["piece"], data.get("confidence", 1.0)
+            else:
+                piece = data
+                confidence = piece_confidences.get(square, 1.0) if piece_confidences else 1.0
+            index = SQUARE_INDEX.get(square)
+            if index is not None:
+                state.set_piece(index, piece, confidence)
+        return state
+
+    def infer_fields(self):
+        """Fill in castling rights and, when only one side can be to move, the turn.
+
+        Returns the sides that may be to move; the turn is left as white when
+        both can, so callers should search both in that case.
+        """
+        turns = possible_turns(self.labels)
+        if len(turns) == 1:
+            self.turn = turns[0]
+        self.castling = infer_castling(self.labels)
+        self.en_passant = "-"
+        return turns
+
+    def copy(self):
+        state = BoardState(self.labels.copy(), self.confidences.copy(), self.turn, self.castling,
+                           self.en_passant, self.halfmove, self.fullmove)
+        state.candidate_labels = self.candidate_labels.copy()
+        state.candidate_confidences = self.candidate_confidences.copy()
+        return state
+
+    def add_candidate(self, index, symbol, confidence):
+        """Record a detected label for a square, keeping the TOP_K most confident"""
+        label = PIECE_LABELS.get(symbol)
+        if label is None:
+            return
+        labels = self.candidate_labels[index]
+        confidences = self.candidate_confidences[index]
+
+        same = np.flatnonzero(labels == label)
+        slot = same[0] if same.size else confidences.argmin()
+        if confidence <= confidences[slot]:
+            return
+        labels[slot] = label
+        confidences[slot] = confidence
+
+        order = np.argsort(-confidences, kind="stable")
+        labels[:] = labels[order]
+        confidences[:] = confidences[order]
+
+    def set_piece(self, index, symbol, confidence=1.0):
+        """Place a piece unless a more confident one already sits on the square"""
+        label = PIECE_LABELS.get(symbol)
+        if label is None:
+            return False
+        self.add_candidate(index, symbol, confidence)
+        if self.labels[index] != EMPTY and confidence < self.confidences[index]:
+            return False
+        self.labels[index] = label
+        self.confidences[index] = confidence
+        return True
+
+    def piece_at(self, square):
+        """Symbol on a square (index or name), or None"""
+        index = SQUARE_INDEX[square] if isinstance(square, str) else square
+        label = self.labels[index]
+        return PIECE_SYMBOLS[label - 1] if label else None
+
+    @property
+    def occupied(self):
+        return self.labels != EMPTY
+
+    def piece_count(self):
+        return int(np.count_nonzero(self.labels))
+
+    def mean_confidence(self):
+        occupied = self.occupied
+        return float(self.confidences[occupied].mean()) if occupied.any() else 0.0
+
+    def placement(self):
+        return encode_placement(self.labels)
+
+    def fen(self):
+        return (f"{self.placement()} {self.turn} {self.castling or '-'} {self.en_passant} "
+                f"{self.halfmove} {self.fullmove}")
+
+    def to_board(self):
+        """Convert to a chess.Board; raises ValueError for an unparsable FEN"""
+        return chess.Board(self.fen())
+
+    def to_positions(self, with_confidence=False):
+        """Square-name dict, optionally in the backend's {'piece', 'confidence'} form"""
+        positions = {}
+        for i in np.flatnonzero(self.labels):
+            symbol = PIECE_SYMBOLS[self.labels[i] - 1]
+            if with_confidence:
+                positions[SQUARE_NAMES[i]] = {"piece": symbol, "confidence": round(float(self.confidences[i]), 3)}
+            else:
+                positions[SQUARE_NAMES[i]] = symbol
+        return positions
+
+    def changed_squares(self, other):
+        """Indices of squares whose label differs from ``other``"""
+        return np.flatnonzero(self.labels != other.labels)
+
+    def diff(self, other):
+        """Describe how ``other`` differs from this state.
+
+        Returns a dict with the changed square names, the pieces removed and
+        added per square, and the moves (symbol, from, to) of pieces that
+        left exactly one square and arrived on exactly one other.
+        """
+        changed = self.changed_squares(other)
+        before = self.labels[changed]
+        after = other.labels[changed]
+
+        removed = {SQUARE_NAMES[i]: PIECE_SYMBOLS[label - 1] for i, label in zip(changed, before) if label}
+        added = {SQUARE_NAMES[i]: PIECE_SYMBOLS[label - 1] for i, label in zip(changed, after) if label}
+
+        moved = []
+        for label in np.intersect1d(before[before != EMPTY], after[after != EMPTY]):
+            sources = changed[before == label]
+            targets = changed[after == label]
+            if len(sources) == 1 and len(targets) == 1:
+                moved.append((PIECE_SYMBOLS[label - 1], SQUARE_NAMES[sources[0]], SQUARE_NAMES[targets[0]]))
+
+        return {
+            "changed": [SQUARE_NAMES[i] for i in changed],
+            "removed": removed,
+            "added": added,
+            "moved": moved
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, BoardState):
+            return NotImplemented
+        return np.array_equal(self.labels, other.labels)
+
+    def __hash__(self):
+        return hash(self.labels.tobytes())
+
+    def __repr__(self):
+        return f"BoardState({self.fen()!r})"
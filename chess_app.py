@@ -17,6 +17,12 @@ import numpy as np
 from chessboard_processor import process_frame, initialize_model
 from chess_engine import ChessEngineManager
 from chess_com_api import ChessComAPI
+from motion_gate import MotionGate
+from frame_fingerprint import FingerprintCache
+from fen_stabilizer import FenStabilizer
+from game_tracker import GameTracker
+from occupancy_tracker import OccupancyTracker, track_frame
+from resource_governor import ResourceGovernor
 import threading
 import queue
 import time
@@ -77,17 +83,27 @@ class HomeScreen(Screen):
         self.manager.current = 'offline'
 
 class LiveFeedScreen(Screen):
-    def __init__(self, **kwargs):
+    def __init__(self, governor=None, **kwargs):
         super().__init__(**kwargs)
         self.current_fen = None
+        self.shown_analysis = None
         self.model = None
         self.capture = None
-        self.chess_engine = ChessEngineManager()
+        self.chess_engine = ChessEngineManager(governor)
+        # Precompute suggestions for the likely replies on spare cores
+        self.chess_engine.enable_speculation()
         self.frame_queue = queue.Queue(maxsize=2)
         self.processing_thread = None
         self.is_running = False
         self.last_processed_time = 0
-        self.processing_interval = 0.5  # Process every 0.5 seconds
+        self.processing_interval = 0.2  # Sample often; the motion gate skips static frames
+        self.stabilizer = FenStabilizer()
+        # Read the settled board until the stabilizer agrees, for a few noisy readings at most
+        self.motion_gate = MotionGate(confirm_frames=3 * self.stabilizer.stable_frames)
+        # Boards that look like a recently confirmed one skip detection
+        self.fingerprints = FingerprintCache()
+        self.game_tracker = GameTracker()
+        self.occupancy_tracker = OccupancyTracker(game_tracker=self.game_tracker)
         
         # Main layout
         main_layout = BoxLayout(orientation='horizontal', spacing=dp(20), padding=dp(20))
@@ -146,6 +162,16 @@ class LiveFeedScreen(Screen):
         switch_layout.add_widget(switch_label)
         switch_layout.add_widget(self.suggest_moves)
         
+        # Low-power mode: follow moves from square occupancy after one full read
+        track_label = Label(
+            text='Track Moves',
+            color=SECONDARY_COLOR,
+            size_hint_x=0.7
+        )
+        self.track_moves = Switch(active=False, size_hint_x=0.3)
+        switch_layout.add_widget(track_label)
+        switch_layout.add_widget(self.track_moves)
+        
         controls.add_widget(back_btn)
         controls.add_widget(switch_layout)
         
@@ -186,6 +212,11 @@ class LiveFeedScreen(Screen):
         try:
             self.status_label.text = "Initializing..."
             self.model = initialize_model()
+            self.motion_gate.reset()
+            self.fingerprints.reset()
+            self.stabilizer.reset()
+            self.game_tracker.reset()
+            self.occupancy_tracker = OccupancyTracker(game_tracker=self.game_tracker)
             self.capture = cv2.VideoCapture(0)
             
             # Set camera properties for better quality
@@ -212,6 +243,7 @@ class LiveFeedScreen(Screen):
     
     def on_leave(self):
         self.is_running = False
+        self.chess_engine.stop_pondering()
         if self.processing_thread:
             self.processing_thread.join()
         Clock.unschedule(self.update_display)
@@ -229,7 +261,18 @@ class LiveFeedScreen(Screen):
                         continue
                     
                     # Process frame for chess detection
-                    processed_frame, fen = process_frame(frame, self.model)
+                    if self.track_moves.active:
+                        processed_frame, fen = track_frame(
+                            frame, self.model, self.occupancy_tracker,
+                            motion_gate=self.motion_gate
+                        )
+                    else:
+                        processed_frame, fen = process_frame(
+                            frame, self.model,
+                            motion_gate=self.motion_gate,
+                            stabilizer=self.stabilizer,
+                            fingerprints=self.fingerprints
+                        )
                     
                     # Update queue with new frame and FEN
                     if not self.frame_queue.full():
@@ -266,45 +309,102 @@ class LiveFeedScreen(Screen):
                 
                 # Update FEN and digital board
                 if fen and fen != self.current_fen:
-                    self.fen_label.text = f'FEN: {fen}'
                     self.current_fen = fen
                     
+                    # Follow the game through legal moves once it is being tracked
+                    if not self.track_moves.active:
+                        self.game_tracker.update_fen(fen)
+                    tracked_fen = self.game_tracker.fen() or fen
+                    self.fen_label.text = f'FEN: {tracked_fen}'
+                    
                     # Update chess engine position
-                    if self.chess_engine.update_position(fen):
+                    if self.chess_engine.update_position(tracked_fen):
                         # Get best move if suggestions are enabled
+                        status = "Board updated"
+                        self.shown_analysis = None
                         if self.suggest_moves.active:
-                            best_move = self.chess_engine.get_best_move()
-                            if best_move:
+                            if self.game_tracker.side_to_move() is None:
+                                # Unknown turn: search both sides at once
+                                self.chess_engine.stop_pondering()
+                                best_moves = self.chess_engine.get_best_moves_both_sides()
+                                best_move = best_moves.get("w" if self.chess_engine.board.turn else "b")
+                                if best_moves:
+                                    status = "Best move: " + ", ".join(
+                                        f"{'White' if turn == 'w' else 'Black'} {move}"
+                                        for turn, move in best_moves.items())
                                 self.chess_engine.last_move = best_move
+                            else:
+                                # Known turn: keep deepening in the background
+                                self.chess_engine.last_move = None
+                                if not self.chess_engine.pondering:
+                                    self.chess_engine.start_pondering()
                         
-                        # Render and display the board
-                        board_img = self.chess_engine.render_board()
-                        if board_img is not None:
-                            # Convert BGR to RGB for Kivy
-                            board_img = cv2.cvtColor(board_img, cv2.COLOR_BGR2RGB)
-                            # Create texture
-                            board_texture = Texture.create(
-                                size=(board_img.shape[1], board_img.shape[0]),
-                                colorfmt='rgb'
-                            )
-                            board_texture.blit_buffer(board_img.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
-                            self.digital_board.texture = board_texture
-                            self.status_label.text = "Board updated"
-                        else:
-                            self.error_label.text = "Failed to render board"
+                        self.show_board(status)
                     else:
                         self.error_label.text = "Invalid FEN position"
+            
+            # Show the background analysis as soon as it finds a better move
+            if self.chess_engine.pondering:
+                self.refresh_suggestion()
                 
         except Exception as e:
             self.error_label.text = str(e)
             print(f"Error in update_display: {e}")
     
+    def show_board(self, status):
+        """Render the engine's board, highlighting its last suggested move"""
+        board_img = self.chess_engine.render_board()
+        if board_img is None:
+            self.error_label.text = "Failed to render board"
+            return
+        
+        # Convert BGR to RGB for Kivy
+        board_img = cv2.cvtColor(board_img, cv2.COLOR_BGR2RGB)
+        # Create texture
+        board_texture = Texture.create(
+            size=(board_img.shape[1], board_img.shape[0]),
+            colorfmt='rgb'
+        )
+        board_texture.blit_buffer(board_img.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
+        self.digital_board.texture = board_texture
+        self.status_label.text = status
+    
+    def refresh_suggestion(self):
+        """Poll the background analysis and redraw when the best move changes"""
+        analysis = self.chess_engine.get_analysis()
+        if analysis is None:
+            return
+        
+        shown = self.shown_analysis
+        self.shown_analysis = analysis
+        if shown is not None and shown["move"] == analysis["move"]:
+            # Same move, just a deeper search: only refresh the evaluation
+            self.status_label.text = self.format_analysis(analysis)
+            return
+        
+        self.chess_engine.last_move = analysis["move"]
+        self.show_board(self.format_analysis(analysis))
+    
+    def format_analysis(self, analysis):
+        score = analysis["score"].white() if analysis["score"] is not None else None
+        if score is None:
+            evaluation = "?"
+        elif score.is_mate():
+            evaluation = f"#{score.mate()}"
+        else:
+            evaluation = f"{score.score() / 100:+.2f}"
+        return f"Best move: {analysis['move']} ({evaluation}, depth {analysis['depth']})"
+    
     def on_suggest_moves_change(self, instance, value):
         if not value:
+            self.chess_engine.stop_pondering()
+            self.shown_analysis = None
             self.chess_engine.last_move = None
             # Re-render board without move highlight
             if self.current_fen:
-                self.update_display(0)  # Force update with current FEN
+                self.show_board("Board updated")
+        elif self.current_fen and self.game_tracker.side_to_move() is not None:
+            self.chess_engine.start_pondering()
     
     def go_back(self, instance):
         self.manager.current = 'home'
@@ -424,9 +524,14 @@ class OfflineScreen(Screen):
 
 class ChessApp(App):
     def build(self):
+        # Split the cores between the detector and the engine before either starts
+        governor = ResourceGovernor()
+        governor.apply_vision_threads()
+        print(governor.report())
+        
         sm = ScreenManager()
         sm.add_widget(HomeScreen(name='home'))
-        sm.add_widget(LiveFeedScreen(name='live'))
+        sm.add_widget(LiveFeedScreen(governor=governor, name='live'))
         sm.add_widget(OfflineScreen(name='offline'))
         return sm
 
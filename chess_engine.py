@@ -1,47 +1,80 @@
 import chess
 import chess.engine
-import os
 from pathlib import Path
 import numpy as np
 from fentoboardimage import fenToImage, loadPiecesFolder
 from PIL import Image
 import io
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from board_state import BoardState
+from position_repair import find_violations
+from engine_provisioning import find_engine
+from engine_supervisor import EngineSupervisor
+from fallback_engine import FallbackEngine
+from resource_governor import ResourceGovernor
+from speculative_analysis import SpeculativeAnalyzer
 
 class ChessEngineManager:
-    def __init__(self):
-        self.engine = None
+    def __init__(self, governor=None):
+        self.governor = governor or ResourceGovernor()
+        self.supervisor = None
+        self.engine_path = None
+        # Threads of the main engine; None uses the governor's share
+        self.engine_threads = None
+        # Second engine, started on demand to search the other side to move
+        self.second_supervisor = None
+        # Background analysis of the current position ("pondering")
+        self.pondering = False
+        self.analysis_info = None
+        self._analysis = None
+        self._analysis_thread = None
+        self._analysis_lock = threading.Lock()
+        # Background analysis of likely replies, see enable_speculation
+        self.speculator = None
+        # Built-in search used when Stockfish is missing or failing
+        self.fallback = FallbackEngine()
+        # Budget of a background analysis on the built-in engine
+        self.fallback_ponder_time = 5.0
         self.board = chess.Board()
         self.last_move = None
         self.piece_set = self.setup_piece_set()
         
         # Initialize Stockfish engine
         try:
-            # First try the default path
-            stockfish_path = str(Path("stockfish/stockfish-windows-x86-64-sse41-popcnt.exe"))
-            if not os.path.exists(stockfish_path):
-                # Try alternative paths
-                alternative_paths = [
-                    "stockfish.exe",
-                    "stockfish/stockfish.exe",
-                    "C:/Program Files/Stockfish/stockfish.exe",
-                    "C:/Program Files (x86)/Stockfish/stockfish.exe"
-                ]
-                for path in alternative_paths:
-                    if os.path.exists(path):
-                        stockfish_path = path
-                        break
-            
-            if os.path.exists(stockfish_path):
-                self.engine = chess.engine.SimpleEngine.popen_uci(stockfish_path)
-                self.engine.configure({"Threads": 2, "Hash": 128})
-                print(f"Stockfish engine initialized successfully from {stockfish_path}")
+            stockfish_path = find_engine()
+            if stockfish_path:
+                self.engine_path = stockfish_path
+                # Health-checked and restarted with backoff when it hangs or dies
+                self.supervisor = EngineSupervisor(self._open_engine)
+                if self.supervisor.engine is not None:
+                    print(f"Stockfish engine initialized successfully from {stockfish_path}")
+                else:
+                    print(f"Warning: Stockfish failed to start from {stockfish_path}; retrying on demand.")
             else:
-                print("Warning: Stockfish engine not found. Best move suggestions will be disabled.")
+                print("Warning: Stockfish engine not found. Using the built-in engine for suggestions.")
+                print("Set CHESS_ENGINE_PATH or run 'python engine_provisioning.py --build --bench'.")
         except Exception as e:
             print(f"Error initializing Stockfish: {e}")
-            print("Best move suggestions will be disabled.")
+            print("Using the built-in engine for suggestions.")
     
+    @property
+    def engine(self):
+        """The supervised main engine, or None while it is unavailable"""
+        return self.supervisor.engine if self.supervisor else None
+
+    def engine_stats(self):
+        """Restart, timeout and latency stats of the main engine"""
+        return self.supervisor.stats() if self.supervisor else None
+
+    def _open_engine(self, threads=None):
+        """Start an engine sized and pinned by the resource governor"""
+        engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        engine.configure(self.governor.engine_options(threads or self.engine_threads))
+        self.governor.pin_engine(engine)
+        return engine
+
     def setup_piece_set(self):
         """Set up the piece set for board rendering"""
         pieces_dir = Path("pieces")
@@ -101,36 +134,267 @@ class ChessEngineManager:
         piece_path = Path("pieces") / color / f"{piece_name}.png"
         img.save(piece_path)
     
+    def start_pondering(self):
+        """Keep analysing the current position in the background.
+
+        The search deepens for as long as the position is unchanged and is
+        restarted by update_position; read the latest result at any time
+        with get_analysis().
+        """
+        self.pondering = True
+        return self._start_analysis()
+
+    def stop_pondering(self):
+        self.pondering = False
+        self._stop_analysis()
+
+    def get_analysis(self):
+        """Latest background analysis of the current position, or None.
+
+        Returns a dict with the best ``move``, its ``score`` (a
+        chess.engine.PovScore), the search ``depth`` and the ``pv``.
+        """
+        with self._analysis_lock:
+            info = self.analysis_info
+        if info is not None and info["fen"] != self.board.fen():
+            info = None
+
+        # A speculated result may be deeper than a freshly restarted analysis
+        cached = self.speculator.lookup(self.board) if self.speculator else None
+        if cached is not None and (info is None or cached["depth"] > info["depth"]):
+            return cached
+        return dict(info) if info is not None else None
+
+    def enable_speculation(self, candidates=3, time_limit=1.0):
+        """Analyse the likely replies to each new position on spare cores.
+
+        The ``candidates`` best moves of a short multipv search are played
+        out and each resulting position is searched for ``time_limit``
+        seconds, so the suggestion for the next position is often ready
+        when it is detected.
+        """
+        if self.engine_path and self.speculator is None:
+            # Hand half of the engine threads to the speculative engines
+            threads = self.governor.engine_threads
+            main_threads = max(1, threads // 2)
+            self.engine_threads = main_threads
+            if self.supervisor:
+                try:
+                    self.supervisor.call(lambda engine: engine.configure({"Threads": main_threads}),
+                                         self.supervisor.ping_timeout, record=False)
+                except Exception as e:
+                    print(f"Error configuring engine: {e}")
+            self.speculator = SpeculativeAnalyzer(self.engine_path, candidates=candidates,
+                                                  time_limit=time_limit,
+                                                  workers=max(1, threads - main_threads),
+                                                  hash_mb=max(16, self.governor.engine_hash_mb // 4),
+                                                  governor=self.governor)
+            self.speculator.speculate(self.board)
+
+    def _start_analysis(self):
+        self._stop_analysis()
+        if self.board.is_game_over():
+            return False
+        if not self.supervisor:
+            return self._start_fallback_analysis()
+        engine = self.engine
+        if engine is None:
+            return False
+
+        board = self.board.copy(stack=False)
+        try:
+            analysis = engine.analysis(board)
+        except Exception as e:
+            print(f"Error starting analysis: {e}")
+            self.supervisor.fail(engine, str(e))
+            return False
+
+        # No health pings while the engine is busy analysing
+        self.supervisor.begin_session()
+        with self._analysis_lock:
+            self._analysis = analysis
+            self.analysis_info = None
+        self._analysis_thread = threading.Thread(target=self._follow_analysis,
+                                                 args=(analysis, engine, board.fen()), daemon=True)
+        self._analysis_thread.start()
+        return True
+
+    def _follow_analysis(self, analysis, engine, fen):
+        """Publish every deeper principal variation until the analysis is stopped"""
+        try:
+            for info in analysis:
+                pv = info.get("pv")
+                if not pv:
+                    continue
+                with self._analysis_lock:
+                    if self._analysis is not analysis:
+                        break
+                    self.analysis_info = {
+                        "fen": fen,
+                        "move": pv[0],
+                        "score": info.get("score"),
+                        "depth": info.get("depth", 0),
+                        "pv": pv
+                    }
+        except Exception as e:
+            print(f"Error during analysis: {e}")
+            self.supervisor.fail(engine, str(e))
+
+    def _start_fallback_analysis(self):
+        """Search the current position on the built-in engine in the background"""
+        board = self.board.copy(stack=False)
+        stop = threading.Event()
+        with self._analysis_lock:
+            self._analysis = stop
+            self.analysis_info = None
+        self._analysis_thread = threading.Thread(target=self._follow_fallback_analysis,
+                                                 args=(stop, board), daemon=True)
+        self._analysis_thread.start()
+        return True
+
+    def _follow_fallback_analysis(self, stop, board):
+        """Publish every finished iteration of the built-in engine until it is stopped"""
+        fen = board.fen()
+
+        def publish(result):
+            with self._analysis_lock:
+                if self._analysis is stop:
+                    self.analysis_info = {
+                        "fen": fen,
+                        "move": result["move"],
+                        "score": result["score"],
+                        "depth": result["depth"],
+                        "pv": result["pv"]
+                    }
+
+        self.fallback.search(board, self.fallback_ponder_time, stop=stop, callback=publish)
+
+    def _stop_analysis(self):
+        with self._analysis_lock:
+            analysis, self._analysis = self._analysis, None
+        if analysis is None:
+            return
+        if isinstance(analysis, threading.Event):
+            # A search of the built-in engine
+            analysis.set()
+        else:
+            try:
+                analysis.stop()
+            except Exception:
+                pass
+            self.supervisor.end_session()
+        if self._analysis_thread is not None:
+            self._analysis_thread.join(timeout=1.0)
+            self._analysis_thread = None
+
     def get_best_move(self, time_limit=1.0):
         """Get the best move for the current position"""
-        if not self.engine:
-            print("Engine not available for best move calculation")
-            return None
+        # While pondering, answer instantly from the background analysis
+        if self.pondering:
+            # A finished search of the built-in engine keeps its result
+            if self._analysis is None or (not self._analysis_thread.is_alive() and self.get_analysis() is None):
+                self._start_analysis()
+            analysis = self.get_analysis()
+            if analysis is None:
+                return None
+            self.last_move = analysis["move"]
+            return analysis["move"]
+
+        cached = self.speculator.lookup(self.board) if self.speculator else None
+        if cached is not None:
+            self.last_move = cached["move"]
+            return cached["move"]
+
+        if not self.supervisor:
+            return self._get_fallback_move(self.board, time_limit)
             
         try:
-            # Create a new engine instance if the current one is dead
-            if not hasattr(self, '_engine_alive') or not self._engine_alive:
-                self.engine = chess.engine.SimpleEngine.popen_uci(self.engine.path)
-                self.engine.configure({"Threads": 2, "Hash": 128})
-                self._engine_alive = True
-            
-            # Get the best move
-            result = self.engine.play(self.board, chess.engine.Limit(time=time_limit))
+            # Get the best move; a hung engine is killed at the deadline
+            board = self.board.copy(stack=False)
+            limit = chess.engine.Limit(time=time_limit)
+            result = self.supervisor.call(lambda engine: engine.play(board, limit),
+                                          self.supervisor.deadline_for(time_limit))
             if result and result.move:
                 self.last_move = result.move
                 return result.move
             return None
             
         except Exception as e:
-            print(f"Error getting best move: {e}")
-            self._engine_alive = False
-            return None
+            print(f"Error getting best move: {e}; using the built-in engine")
+            return self._get_fallback_move(self.board, time_limit)
+
+    def _get_fallback_move(self, board, time_limit):
+        """Best move of the built-in engine within ``time_limit`` seconds"""
+        move = self.fallback.search(board, time_limit)["move"]
+        if move is not None:
+            self.last_move = move
+        return move
     
+    def get_best_moves_both_sides(self, time_limit=1.0):
+        """Get the best move for each side that may be to move in the current placement.
+
+        Both searches run at the same time on two engines, so the answer
+        takes one ``time_limit``; they split the main engine's threads, so
+        together they stay within the governor's engine share. Returns a
+        dict keyed by "w" and "b".
+        """
+        boards = {}
+        for turn in "wb":
+            board = self.board.copy(stack=False)
+            board.turn = turn == "w"
+            board.ep_square = None
+            if board.is_valid() and not board.is_game_over():
+                boards[turn] = board
+        if not boards:
+            return {}
+
+        # Both engines are needed; a background analysis resumes with the next position
+        self._stop_analysis()
+        if not self.supervisor:
+            # The built-in engine shares one core, so both searches still end in time
+            with ThreadPoolExecutor(max_workers=len(boards)) as executor:
+                futures = {turn: executor.submit(self.fallback.search, board, time_limit)
+                           for turn, board in boards.items()}
+                return {turn: future.result()["move"] for turn, future in futures.items()}
+
+        try:
+            threads = max(1, (self.engine_threads or self.governor.engine_threads) // len(boards))
+            if len(boards) > 1 and self.second_supervisor is None:
+                # Only ever used for the other half of a two-sided search
+                self.second_supervisor = EngineSupervisor(lambda: self._open_engine(threads))
+
+            supervisors = dict(zip(boards, (self.supervisor, self.second_supervisor)))
+            limit = chess.engine.Limit(time=time_limit)
+            # The main engine gets its own thread count back after the search
+            options = {"Threads": threads} if len(boards) > 1 else {}
+            deadline = self.supervisor.deadline_for(time_limit)
+            with ThreadPoolExecutor(max_workers=len(boards)) as executor:
+                futures = {turn: executor.submit(supervisors[turn].call,
+                                                 lambda engine, board=board: engine.play(board, limit, options=options),
+                                                 deadline)
+                           for turn, board in boards.items()}
+                results = {turn: future.result() for turn, future in futures.items()}
+            return {turn: result.move for turn, result in results.items() if result.move}
+
+        except Exception as e:
+            print(f"Error getting best moves: {e}")
+            return {}
+
     def update_position(self, fen):
         """Update the board position from FEN string"""
         try:
+            # chess.Board accepts some impossible boards; don't spend engine time on them
+            violations = find_violations(BoardState.from_fen(fen).labels)
+            if violations:
+                print(f"Implausible position: {', '.join(reason for reason, _ in violations)}")
+                return False
             new_board = chess.Board(fen)
+            changed = new_board != self.board
             self.board = new_board
+            if self.speculator and changed:
+                self.speculator.speculate(new_board)
+            if self.pondering and (changed or self._analysis is None):
+                self._start_analysis()
             return True
         except Exception as e:
             print(f"Invalid FEN: {e}")
@@ -178,9 +442,12 @@ class ChessEngineManager:
     
     def close(self):
         """Clean up chess engine"""
-        if self.engine:
-            try:
-                self.engine.quit()
-            except:
-                pass
-            self._engine_alive = False
+        self.stop_pondering()
+        if self.speculator:
+            self.speculator.close()
+            self.speculator = None
+        for supervisor in (self.supervisor, self.second_supervisor):
+            if supervisor:
+                supervisor.close()
+        self.supervisor = None
+        self.second_supervisor = None
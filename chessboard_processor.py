@@ -1,12 +1,18 @@
 import cv2
 import numpy as np
 from ultralytics import YOLO
+from board_state import BoardState
+from model_registry import discover_models
+from position_repair import LIVE_MAX_NODES, repair_position
 
 # Object classes for chess pieces
 classNames = ["B", "K", "N", "P", "Q", "R", "b", "k", "n", "p", "q", "r"]
 
-def initialize_model():
-    return YOLO("runs/detect/train4/weights/best.pt")
+DEFAULT_MODEL_PATH = "runs/detect/train4/weights/best.pt"
+
+def initialize_model(model_path=DEFAULT_MODEL_PATH):
+    # A training run's name ("train6") selects that run's weights
+    return YOLO(discover_models().get(model_path, model_path))
 
 def reorder(myPoints):
     myPoints = myPoints.reshape((4, 2))
@@ -70,7 +76,7 @@ def localize_squares(warped, square_size, grid_width, grid_height):
 
 def detect_chess_pieces(frame, warped, start_x, start_y, square_size, model):
     results = model(frame, stream=True)
-    piece_positions = {}
+    board_state = BoardState()
 
     for r in results:
         boxes = r.boxes
@@ -96,31 +102,21 @@ def detect_chess_pieces(frame, warped, start_x, start_y, square_size, model):
             thickness = 1
             
             cv2.putText(frame, piece_name, org, font, fontScale, color, thickness)
-            square_position = chr(ord('a') + square_y) + str(8 - square_x)
-            piece_positions[square_position] = piece_name
+            confidence = float(box.conf[0]) if box.conf is not None else 0.0
+            
+            # Rows run from rank 8 down, so this is the square's FEN index;
+            # the most confident piece wins when two boxes land on one square
+            board_state.set_piece(square_x * 8 + square_y, piece_name, confidence)
 
-    return frame, warped, piece_positions
+    return frame, warped, board_state
 
-def generate_fen_notation(piece_positions):
-    fen_notation = ""
-    for rank in range(8, 0, -1):
-        empty_squares = 0
-        for file in range(ord('a'), ord('i')):
-            square_position = chr(file) + str(rank)
-            if square_position in piece_positions:
-                if empty_squares > 0:
-                    fen_notation += str(empty_squares)
-                    empty_squares = 0
-                fen_notation += piece_positions[square_position].lower()
-            else:
-                empty_squares += 1
-        if empty_squares > 0:
-            fen_notation += str(empty_squares)
-        if rank!= 1:
-            fen_notation += "/"
-    return fen_notation
+def generate_fen_notation(board_state):
+    # A single frame cannot tell whose turn it is; white unless only black can be to move
+    board_state.infer_fields()
+    return board_state.fen()
 
-def process_frame(frame, model, square_size=65, new_width=600, new_height=600):
+def process_frame(frame, model, square_size=65, new_width=600, new_height=600,
+                  motion_gate=None, stabilizer=None, fingerprints=None):
     frame = cv2.resize(frame, (new_width, new_height))
     board_contour = detect_chess_board(frame)
     
@@ -131,10 +127,49 @@ def process_frame(frame, model, square_size=65, new_width=600, new_height=600):
         grid_height = square_size * 8
         
         warped = warp_chess_board(frame, board_contour, new_width, new_height)
+        
+        # Skip detection while the board is static or covered by a hand
+        if motion_gate is not None and not motion_gate.should_detect(warped):
+            return frame, None
+        
+        # A board that looks like one already read gets the same FEN without YOLO;
+        # the gate has just made the thumbnail the fingerprint needs
+        fingerprint = None
+        if fingerprints is not None:
+            fingerprint = fingerprints.fingerprint(motion_gate.previous if motion_gate is not None else warped)
+            fen_notation = fingerprints.lookup(fingerprint)
+            if fen_notation is not None:
+                if motion_gate is not None:
+                    motion_gate.end_burst()
+                return frame, fen_notation
+        
         warped, start_x, start_y = localize_squares(warped, square_size, grid_width, grid_height)
         
-        frame, warped, piece_positions = detect_chess_pieces(frame, warped, start_x, start_y, square_size, model)
-        fen_notation = generate_fen_notation(piece_positions)
+        frame, warped, board_state = detect_chess_pieces(frame, warped, start_x, start_y, square_size, model)
+        
+        # A new burst reads a board that has just changed
+        if stabilizer is not None and motion_gate is not None and motion_gate.burst_start:
+            stabilizer.clear_history()
+        
+        # Drop readings no legal game can produce, after trying the runner-up
+        # labels; a frame stream cannot wait for a long search
+        repair = repair_position(board_state, max_nodes=LIVE_MAX_NODES)
+        if repair is None:
+            return frame, None
+        board_state = repair['state']
+        
+        # Only report a FEN once the board has been stable for a few readings
+        if stabilizer is not None:
+            board_state = stabilizer.update(board_state)
+            # The burst goes on until the readings agree, not for a fixed count
+            if motion_gate is not None and stabilizer.settled:
+                motion_gate.end_burst()
+            if board_state is None:
+                return frame, None
+        
+        fen_notation = generate_fen_notation(board_state)
+        if fingerprint is not None:
+            fingerprints.store(fingerprint, fen_notation)
         
         return frame, fen_notation
     
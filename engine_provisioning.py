@@ -0,0 +1,272 @@
+"""
+Stockfish discovery, native builds and benchmarking.
+
+Engines are looked up in the configured paths, the bundled ``stockfish``
+directory, PATH and the usual install locations of each platform. The
+bundled sources in ``stockfish/src`` can be built with the best ``ARCH``
+the host CPU supports, and every candidate can be verified with a quick
+``bench`` whose nodes/second are cached on disk, so the fastest working
+engine is picked without re-running the benchmark on every start.
+
+    python engine_provisioning.py --build --bench
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+STOCKFISH_DIR = REPO_DIR / "stockfish"
+SOURCE_DIR = STOCKFISH_DIR / "src"
+CACHE_PATH = Path(os.getenv("CHESS_ENGINE_CACHE", REPO_DIR / "engine_cache.json"))
+
+EXE_SUFFIX = ".exe" if platform.system() == "Windows" else ""
+
+# Usual install locations, after the configured paths, the bundled engines and PATH
+_SYSTEM_PATHS = {
+    "Linux": ["/usr/local/bin/stockfish", "/usr/bin/stockfish", "/usr/games/stockfish",
+              "/snap/bin/stockfish"],
+    "Darwin": ["/opt/homebrew/bin/stockfish", "/usr/local/bin/stockfish"],
+    "Windows": ["C:/Program Files/Stockfish/stockfish.exe", "C:/Program Files (x86)/Stockfish/stockfish.exe",
+                "C:/stockfish/stockfish.exe"],
+}
+
+# x86-64 build targets from fastest to most portable, with the CPU flags each needs
+_X86_ARCHES = [
+    ("x86-64-vnni512", {"avx512_vnni", "avx512f", "avx512bw", "avx512dq", "avx512vl"}),
+    ("x86-64-avx512", {"avx512f", "avx512bw"}),
+    ("x86-64-avxvnni", {"avx_vnni", "avx2", "bmi2"}),
+    ("x86-64-bmi2", {"avx2", "bmi2"}),
+    ("x86-64-avx2", {"avx2"}),
+    ("x86-64-sse41-popcnt", {"sse4_1", "popcnt"}),
+    ("x86-64-ssse3", {"ssse3"}),
+    ("x86-64-sse3-popcnt", {"pni", "popcnt"}),
+    ("x86-64", set()),
+]
+
+_NPS_PATTERN = re.compile(r"Nodes/second\s*:\s*(\d+)")
+
+_found = None
+
+
+def is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def candidate_paths(extra_paths=()):
+    """Every existing engine binary, in lookup order and without duplicates"""
+    configured = [os.getenv("CHESS_ENGINE_PATH"), os.getenv("STOCKFISH_PATH"), *extra_paths]
+    bundled = sorted(glob.glob(str(STOCKFISH_DIR / "stockfish*")), reverse=True)
+    bundled += [str(SOURCE_DIR / f"stockfish{EXE_SUFFIX}"), str(REPO_DIR / f"stockfish{EXE_SUFFIX}")]
+    # Downloads unpacked by scripts/install_stockfish.py
+    bundled += sorted(glob.glob(str(REPO_DIR / "engines" / "**" / f"stockfish*{EXE_SUFFIX}"), recursive=True))
+    on_path = [shutil.which("stockfish")]
+    system = _SYSTEM_PATHS.get(platform.system(), [])
+
+    paths = []
+    for path in [*configured, *bundled, *on_path, *system]:
+        if is_executable(path):
+            path = os.path.abspath(path)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _load_cache():
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache):
+    try:
+        with open(CACHE_PATH, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"Could not write engine cache {CACHE_PATH}: {e}")
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def cached_nps(path, cache=None):
+    """Benchmarked nodes/second of an unchanged binary, or None"""
+    entry = (cache if cache is not None else _load_cache()).get(path)
+    if entry and entry.get("signature") == _signature(path):
+        return entry.get("nps")
+    return None
+
+
+def bench(path, depth=10, timeout=120):
+    """Run Stockfish's ``bench`` on one thread and return its nodes/second, or None"""
+    try:
+        result = subprocess.run([path, "bench", "16", "1", str(depth)], stdin=subprocess.DEVNULL,
+                                capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Benchmark of {path} failed: {e}")
+        return None
+    match = _NPS_PATTERN.search(result.stderr + result.stdout)
+    return int(match.group(1)) if match else None
+
+
+def benchmark_engines(paths=None, depth=10):
+    """Benchmark engines whose cached result is missing or stale; returns {path: nps}"""
+    cache = _load_cache()
+    results = {}
+    for path in paths if paths is not None else candidate_paths():
+        nps = cached_nps(path, cache)
+        if nps is None:
+            nps = bench(path, depth)
+            cache[path] = {"signature": _signature(path), "nps": nps}
+        results[path] = nps
+    _save_cache(cache)
+    return results
+
+
+def find_engine(extra_paths=(), refresh=False):
+    """Path of the fastest known working engine, or None.
+
+    Engines that failed their benchmark are skipped and benchmarked ones are
+    ranked by nodes/second; otherwise the first engine in lookup order wins.
+    The answer is cached for the life of the process.
+    """
+    global _found
+    if _found is not None and not refresh and not extra_paths:
+        return _found or None
+
+    paths = candidate_paths(extra_paths)
+    cache = _load_cache()
+    ranked = []
+    for order, path in enumerate(paths):
+        entry = cache.get(path)
+        if entry and entry.get("signature") == _signature(path):
+            if not entry.get("nps"):
+                continue
+            ranked.append((-entry["nps"], order, path))
+        else:
+            ranked.append((0, order, path))
+
+    found = min(ranked)[2] if ranked else None
+    if not extra_paths:
+        _found = found or ""
+    return found
+
+
+def cpu_flags():
+    """Lower-case CPU feature flags of the host, as far as they can be read"""
+    system = platform.system()
+    if system == "Linux":
+        try:
+            with open("/proc/cpuinfo") as f:
+                for line in f:
+                    if line.startswith(("flags", "Features")):
+                        return set(line.split(":", 1)[1].split())
+        except OSError:
+            pass
+    elif system == "Darwin":
+        try:
+            output = subprocess.run(["sysctl", "-n", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+                                    capture_output=True, text=True, timeout=5).stdout
+            flags = {flag.lower().replace(".", "_") for flag in output.split()}
+            # Use the Linux names: SSE3 is "pni", AVX512VNNI is "avx512_vnni"
+            if "sse3" in flags:
+                flags.add("pni")
+            if "avx512vnni" in flags:
+                flags.add("avx512_vnni")
+            return flags
+        except (OSError, subprocess.SubprocessError):
+            pass
+    elif system == "Windows":
+        try:
+            import ctypes
+            present = ctypes.windll.kernel32.IsProcessorFeaturePresent
+            # PF_* feature ids; every CPU with SSE4.1 also has popcnt
+            features = {13: {"pni"}, 36: {"ssse3"}, 37: {"sse4_1", "popcnt"}, 40: {"avx2"}, 41: {"avx512f"}}
+            return set().union(*(names for feature, names in features.items() if present(feature)))
+        except (ImportError, AttributeError, OSError):
+            pass
+    return set()
+
+
+def detect_arch(flags=None):
+    """Best Stockfish ``ARCH`` for the host CPU"""
+    machine = platform.machine().lower()
+    flags = cpu_flags() if flags is None else flags
+
+    if machine in ("arm64", "aarch64"):
+        if platform.system() == "Darwin":
+            return "apple-silicon"
+        return "armv8-dotprod" if "asimddp" in flags else "armv8"
+    if machine in ("x86_64", "amd64"):
+        for arch, required in _X86_ARCHES:
+            if required <= flags:
+                return arch
+        return "x86-64"
+    return "general-64" if platform.architecture()[0] == "64bit" else "general-32"
+
+
+def build_engine(arch=None, jobs=None, profile=False):
+    """Build the bundled Stockfish sources for ``arch`` and return the binary's path.
+
+    The binary is copied to ``stockfish/stockfish-<arch>`` so discovery
+    finds it. ``make`` downloads the NNUE nets on the first build; a PGO
+    ``profile`` build is slower to compile but faster to run.
+    """
+    arch = arch or detect_arch()
+    jobs = jobs or os.cpu_count() or 1
+    target = "profile-build" if profile else "build"
+    command = ["make", f"-j{jobs}", target, f"ARCH={arch}"]
+    if platform.system() == "Windows":
+        command.append("COMP=mingw")
+
+    print(f"Building Stockfish for {arch}: {' '.join(command)}")
+    try:
+        subprocess.run(command, cwd=SOURCE_DIR, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Stockfish build failed: {e}")
+        return None
+
+    built = SOURCE_DIR / f"stockfish{EXE_SUFFIX}"
+    destination = STOCKFISH_DIR / f"stockfish-{arch}{EXE_SUFFIX}"
+    shutil.copy2(built, destination)
+    global _found
+    _found = None
+    return str(destination)
+
+
+def provision_engine(build=False, arch=None, depth=10):
+    """Optionally build, then benchmark every engine and return (path, nps) of the fastest"""
+    if build:
+        build_engine(arch)
+    results = benchmark_engines(depth=depth)
+    path = find_engine(refresh=True)
+    return path, results.get(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find, build and benchmark Stockfish")
+    parser.add_argument("--build", action="store_true", help="Build the bundled sources for this CPU")
+    parser.add_argument("--arch", help="Stockfish ARCH to build (default: detected)")
+    parser.add_argument("--bench", action="store_true", help="Benchmark every engine found")
+    parser.add_argument("--depth", type=int, default=10, help="Benchmark depth")
+    args = parser.parse_args()
+
+    print(f"Detected ARCH: {detect_arch()}")
+    if args.build:
+        build_engine(args.arch)
+    if args.bench:
+        for path, nps in benchmark_engines(depth=args.depth).items():
+            print(f"{nps or 'failed':>12}  {path}")
+
+    path = find_engine(refresh=True)
+    print(f"Selected engine: {path or 'none found'}")
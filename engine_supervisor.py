@@ -0,0 +1,183 @@
+"""
+Supervision of long-running engine processes.
+
+The supervisor owns one engine process. Every call runs under a hard
+deadline, and an engine that misses it, dies or fails a periodic
+``isready`` ping is killed and respawned. Respawns back off exponentially
+while the engine keeps failing, so a broken binary does not fork in a loop.
+Call latency, timeouts and restarts are kept as stats.
+"""
+
+import collections
+import concurrent.futures
+import threading
+import time
+
+
+class EngineUnavailable(Exception):
+    """No engine process is running, e.g. while waiting out a restart backoff"""
+
+
+class EngineTimeout(Exception):
+    """An engine call missed its deadline; the engine has been restarted"""
+
+
+class EngineSupervisor:
+    """Holds one engine process, health-checks it and restarts it when it fails.
+
+    ``factory`` starts and configures a chess.engine.SimpleEngine. Calls go
+    through call(); long-lived work such as an analysis session should be
+    wrapped in begin_session()/end_session() so health pings wait for it.
+    """
+
+    def __init__(self, factory, ping_interval=10.0, ping_timeout=2.0, deadline_margin=2.0,
+                 initial_backoff=0.5, max_backoff=30.0):
+        self.factory = factory
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.deadline_margin = deadline_margin
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self._engine = None
+        self._started = False
+        self._lock = threading.RLock()
+        self._in_use = 0
+        self._failures = 0
+        self._next_start = 0.0
+        self._latencies = collections.deque(maxlen=200)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self.stats_counters = {"calls": 0, "timeouts": 0, "failures": 0, "restarts": 0, "pings": 0}
+
+        self._closed = threading.Event()
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+
+    @property
+    def engine(self):
+        """The running engine, started on demand, or None while backing off"""
+        with self._lock:
+            if self._engine is not None or self._closed.is_set():
+                return self._engine
+            if time.monotonic() < self._next_start:
+                return None
+            try:
+                self._engine = self.factory()
+                if self._started:
+                    self.stats_counters["restarts"] += 1
+                self._started = True
+            except Exception as e:
+                print(f"Engine failed to start: {e}")
+                self._record_failure()
+            return self._engine
+
+    def call(self, function, deadline, record=True):
+        """Run ``function(engine)`` and return its result within ``deadline`` seconds.
+
+        Raises EngineUnavailable when no engine can be started and
+        EngineTimeout when the call misses its deadline; on a timeout or an
+        engine error the process is killed so the next call gets a fresh one.
+        Calls made with ``record`` False are left out of the call stats.
+        """
+        engine = self.engine
+        if engine is None:
+            raise EngineUnavailable("engine is restarting")
+
+        with self._lock:
+            self._in_use += 1
+            if record:
+                self.stats_counters["calls"] += 1
+        started = time.monotonic()
+        try:
+            future = self._executor.submit(function, engine)
+            result = future.result(timeout=deadline)
+        except concurrent.futures.TimeoutError:
+            self.stats_counters["timeouts"] += 1
+            self.fail(engine, f"missed its {deadline:.1f}s deadline")
+            raise EngineTimeout(f"engine call exceeded {deadline:.1f}s")
+        except Exception as e:
+            self.fail(engine, str(e) or type(e).__name__)
+            raise
+        finally:
+            with self._lock:
+                self._in_use -= 1
+
+        if record:
+            self._latencies.append(time.monotonic() - started)
+        with self._lock:
+            self._failures = 0
+        return result
+
+    def deadline_for(self, time_limit):
+        """Hard deadline for a search of ``time_limit`` seconds"""
+        return time_limit + self.deadline_margin
+
+    def begin_session(self):
+        """Mark the engine busy with long-running work (no health pings)"""
+        with self._lock:
+            self._in_use += 1
+
+    def end_session(self):
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+
+    def fail(self, engine, reason):
+        """Kill ``engine`` after a failure so the next call respawns it"""
+        with self._lock:
+            if engine is not self._engine:
+                return
+            self._engine = None
+            self._record_failure()
+        print(f"Engine failed ({reason}); restarting")
+        try:
+            # Closing the transport kills the process, even a hung one
+            engine.close()
+        except Exception:
+            pass
+
+    def _record_failure(self):
+        self._failures += 1
+        self.stats_counters["failures"] += 1
+        backoff = min(self.max_backoff, self.initial_backoff * 2 ** (self._failures - 1))
+        self._next_start = time.monotonic() + backoff
+
+    def _watch(self):
+        while not self._closed.wait(self.ping_interval):
+            with self._lock:
+                engine = self._engine
+                idle = self._in_use == 0
+            if engine is None or not idle:
+                continue
+            try:
+                self.call(lambda engine: engine.ping(), self.ping_timeout, record=False)
+                self.stats_counters["pings"] += 1
+            except Exception:
+                # call() has already killed the engine for a restart
+                pass
+
+    def stats(self):
+        """Call counts, restarts and latency percentiles in milliseconds"""
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(1000 * latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 1)
+
+        return dict(self.stats_counters,
+                    running=self._engine is not None,
+                    consecutive_failures=self._failures,
+                    latency_p50_ms=percentile(0.5),
+                    latency_p95_ms=percentile(0.95),
+                    latency_max_ms=round(1000 * latencies[-1], 1) if latencies else None)
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            engine, self._engine = self._engine, None
+        if engine is not None:
+            try:
+                engine.quit()
+            except Exception:
+                engine.close()
+        self._executor.shutdown(wait=False)
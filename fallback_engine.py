@@ -0,0 +1,314 @@
+"""
+Built-in fallback engine for deployments without a Stockfish binary.
+
+A small python-chess search: iterative-deepening alpha-beta (negamax) with
+a transposition table, move ordering by transposition-table move, MVV-LVA
+captures, killer moves and a history table, a capture-only quiescence search
+and a material plus piece-square evaluation. Every search stops at a strict
+time or node budget and returns the best move of the deepest finished
+iteration, so it answers within the same latency budget as Stockfish would.
+"""
+
+import time
+
+import chess
+import chess.engine
+
+MATE = 100000
+MAX_PLY = 64
+INFINITY = MATE + 1
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500,
+                chess.QUEEN: 900, chess.KING: 0}
+
+# Piece-square tables from white's point of view, rank 8 first (a8..h8, ..., a1..h1)
+_PST = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20],
+    chess.ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0],
+    chess.QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20],
+}
+
+# Material plus placement per colour and piece type, indexed by python-chess square
+_SQUARE_VALUES = {
+    (color, piece_type): [
+        PIECE_VALUES[piece_type] + table[(7 - chess.square_rank(square if color else chess.square_mirror(square))) * 8
+                                         + chess.square_file(square)]
+        for square in chess.SQUARES
+    ]
+    for piece_type, table in _PST.items()
+    for color in chess.COLORS
+}
+
+
+def evaluate(board):
+    """Static evaluation in centipawns from the side to move's point of view"""
+    score = 0
+    for (color, piece_type), values in _SQUARE_VALUES.items():
+        total = sum(values[square] for square in chess.scan_forward(board.pieces_mask(piece_type, color)))
+        score += total if color else -total
+    return score if board.turn else -score
+
+
+class _SearchAborted(Exception):
+    pass
+
+
+class _Search:
+    """State of one search: budget, node count and move-ordering tables"""
+
+    def __init__(self, table, deadline, max_nodes, stop):
+        self.table = table
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.stop = stop
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history = {}
+
+    def tick(self):
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            if (time.monotonic() >= self.deadline or (self.max_nodes and self.nodes >= self.max_nodes)
+                    or (self.stop is not None and self.stop.is_set())):
+                raise _SearchAborted
+
+    def order(self, board, moves, tt_move, ply):
+        killers = self.killers[ply]
+
+        def key(move):
+            if move == tt_move:
+                return 1 << 30
+            if board.is_capture(move):
+                victim = board.piece_type_at(move.to_square) or chess.PAWN  # en passant
+                return (1 << 20) + 10 * PIECE_VALUES[victim] - PIECE_VALUES[board.piece_type_at(move.from_square)]
+            if move.promotion:
+                return (1 << 19) + move.promotion
+            if move == killers[0]:
+                return 1 << 18
+            if move == killers[1]:
+                return (1 << 18) - 1
+            return self.history.get((move.from_square, move.to_square), 0)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def quiesce(self, board, alpha, beta, ply):
+        self.tick()
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        for move in self.order(board, list(board.generate_legal_captures()), None, ply):
+            board.push(move)
+            score = -self.quiesce(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def negamax(self, board, depth, alpha, beta, ply):
+        self.tick()
+        key = board._transposition_key()
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, flag, tt_move = entry
+            if entry_depth >= depth:
+                score = _score_from_table(entry_score, ply)
+                if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                    return score
+
+        in_check = board.is_check()
+        if depth <= 0 and not in_check:
+            return self.quiesce(board, alpha, beta, ply)
+        if ply >= MAX_PLY:
+            return evaluate(board)
+
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE + ply if in_check else 0
+        if board.halfmove_clock >= 100:
+            return 0
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, None
+        # Searching one ply deeper while in check also keeps depth 0 out of quiescence
+        next_depth = depth if in_check else depth - 1
+        for move in self.order(board, moves, tt_move, ply):
+            board.push(move)
+            score = -self.negamax(board, next_depth, -beta, -alpha, ply + 1)
+            board.pop()
+
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if not board.is_capture(move):
+                    killers = self.killers[ply]
+                    if move != killers[0]:
+                        killers[1], killers[0] = killers[0], move
+                    history_key = (move.from_square, move.to_square)
+                    self.history[history_key] = self.history.get(history_key, 0) + depth * depth
+                break
+
+        flag = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        self.table[key] = (depth, _score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+
+def _score_to_table(score, ply):
+    # Mate scores are stored relative to the node, not the root
+    if score > MATE - MAX_PLY:
+        return score + ply
+    if score < -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score > MATE - MAX_PLY:
+        return score - ply
+    if score < -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def _pov_score(score, turn):
+    if score > MATE - MAX_PLY:
+        return chess.engine.PovScore(chess.engine.Mate((MATE - score + 1) // 2), turn)
+    if score < -MATE + MAX_PLY:
+        return chess.engine.PovScore(chess.engine.Mate(-((MATE + score) // 2)), turn)
+    return chess.engine.PovScore(chess.engine.Cp(score), turn)
+
+
+class FallbackEngine:
+    """Pure-Python alpha-beta engine behind the same best-move interface as Stockfish"""
+
+    def __init__(self, table_size=500000):
+        self.table_size = table_size
+        self.table = {}
+
+    def search(self, board, time_limit=1.0, max_nodes=None, max_depth=MAX_PLY, stop=None, callback=None):
+        """Search ``board`` within ``time_limit`` seconds and/or ``max_nodes`` nodes.
+
+        Returns a dict with the best ``move`` (None when there is no legal
+        move), its ``score`` as a chess.engine.PovScore, the ``depth`` of the
+        deepest finished iteration, the ``pv`` and the ``nodes`` searched.
+        Setting the threading.Event ``stop`` ends the search early, and
+        ``callback`` is called with the result of every finished iteration.
+        """
+        board = board.copy(stack=False)
+        moves = list(board.legal_moves)
+        if not moves:
+            return {"move": None, "score": None, "depth": 0, "pv": [], "nodes": 0}
+        if len(self.table) > self.table_size:
+            self.table.clear()
+
+        search = _Search(self.table, time.monotonic() + time_limit, max_nodes, stop)
+        entry = self.table.get(board._transposition_key())
+        best_move, best_score, depth_done = None, 0, 0
+        moves = search.order(board, moves, entry[3] if entry else None, 0)
+
+        for depth in range(1, max_depth + 1):
+            alpha = -INFINITY
+            iteration_best = None
+            try:
+                for move in moves:
+                    board.push(move)
+                    score = -search.negamax(board, depth - 1, -INFINITY, -alpha, 1)
+                    board.pop()
+                    if score > alpha:
+                        alpha, iteration_best = score, move
+                        # The previous best is searched first, so a better move
+                        # found before the budget runs out can be trusted
+                        if depth_done:
+                            best_move, best_score = move, score
+            except _SearchAborted:
+                # Unwind the moves the aborted iteration left on the board
+                while board.move_stack:
+                    board.pop()
+                break
+
+            best_move, best_score, depth_done = iteration_best, alpha, depth
+            moves.remove(iteration_best)
+            moves.insert(0, iteration_best)
+            if callback is not None:
+                callback(self._result(board, best_move, best_score, depth_done, search.nodes))
+            if abs(alpha) > MATE - MAX_PLY:
+                break
+
+        return self._result(board, best_move or moves[0], best_score, depth_done, search.nodes)
+
+    def _result(self, board, move, score, depth, nodes):
+        return {
+            "move": move,
+            "score": _pov_score(score, board.turn),
+            "depth": depth,
+            "pv": self._principal_variation(board, move, depth),
+            "nodes": nodes
+        }
+
+    def _principal_variation(self, board, move, depth):
+        """Follow the best moves stored in the transposition table"""
+        board = board.copy(stack=False)
+        pv = []
+        while move is not None and len(pv) < max(depth, 1) and board.is_legal(move):
+            pv.append(move)
+            board.push(move)
+            entry = self.table.get(board._transposition_key())
+            move = entry[3] if entry else None
+        return pv
@@ -0,0 +1,100 @@
+import numpy as np
+
+from board_state import BoardState, EMPTY, PIECE_SYMBOLS
+
+_SQUARES = np.arange(64)
+
+
+class FenStabilizer:
+    """Temporal filter that turns flickering per-frame detections into a stable board.
+
+    The last ``history`` readings are kept as (label, confidence) pairs in a
+    ring buffer. Each square takes the confidence-weighted majority label,
+    but only leaves its current label when the challenger wins at least
+    ``switch_share`` of the votes. A new board is emitted once the voted
+    board has stayed identical for ``stable_frames`` readings.
+    """
+
+    def __init__(self, history=8, stable_frames=3, switch_share=0.6, empty_confidence=0.5):
+        self.history = history
+        self.stable_frames = stable_frames
+        self.switch_share = switch_share
+        self.empty_confidence = empty_confidence
+
+        self.labels = np.zeros((history, 64), np.int8)
+        self.confidences = np.zeros((history, 64), np.float32)
+        self.current = np.zeros(64, np.int8)
+        self.emitted = False
+        self.stability = 0.0
+        self.shares = np.zeros(64, np.float32)
+        self.clear_history()
+
+    def clear_history(self):
+        """Drop buffered readings but keep the last emitted board as reference"""
+        self.index = 0
+        self.count = 0
+        self.pending = None
+        self.pending_frames = 0
+
+    def reset(self):
+        """Forget everything, including the last emitted board"""
+        self.current[:] = 0
+        self.emitted = False
+        self.stability = 0.0
+        self.clear_history()
+
+    def _push(self, state):
+        self.labels[self.index] = state.labels
+        # An empty square has no detection score of its own
+        self.confidences[self.index] = np.where(state.labels == EMPTY, self.empty_confidence, state.confidences)
+        self.index = (self.index + 1) % self.history
+        self.count = min(self.count + 1, self.history)
+
+    def _vote(self):
+        votes = np.zeros((len(PIECE_SYMBOLS) + 1, 64), np.float32)
+        np.add.at(votes, (self.labels[:self.count], _SQUARES), self.confidences[:self.count])
+        totals = np.maximum(votes.sum(axis=0), 1e-6)
+
+        winner = votes.argmax(axis=0)
+        share = votes[winner, _SQUARES] / totals
+
+        # Hysteresis: a square only changes label on a clear majority
+        hold = (winner != self.current) & (share < self.switch_share)
+        candidate = np.where(hold, self.current, winner).astype(np.int8)
+        self.shares = votes[candidate, _SQUARES] / totals
+        self.stability = float(self.shares.mean())
+        return candidate
+
+    def update(self, state):
+        """Add one frame of detections as a BoardState.
+
+        Returns the stable BoardState when a new board is emitted,
+        otherwise None.
+        """
+        self._push(state)
+        candidate = self._vote()
+
+        if self.pending is not None and np.array_equal(candidate, self.pending):
+            self.pending_frames += 1
+        else:
+            self.pending = candidate
+            self.pending_frames = 1
+
+        if self.pending_frames < self.stable_frames:
+            return None
+        if self.emitted and np.array_equal(candidate, self.current):
+            return None
+
+        self.current = candidate.copy()
+        self.emitted = True
+        return self.board_state()
+
+    @property
+    def settled(self):
+        """True once the voted board has been identical for ``stable_frames`` readings"""
+        return self.pending_frames >= self.stable_frames
+
+    def board_state(self):
+        """Return the last emitted board, with vote shares as confidences"""
+        confidences = np.where(self.current == EMPTY, 0.0, self.shares).astype(np.float32)
+        return BoardState(self.current.copy(), confidences)
@@ -0,0 +1,86 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+def fingerprint(image, size=32):
+    """Perceptual fingerprint of a board image: a normalized grayscale thumbnail.
+
+    The thumbnail is shrunk to ``size`` x ``size`` cells and normalized to
+    zero mean and unit contrast, so exposure changes, sensor noise and
+    compression leave it alone while a moved piece changes the cells of its
+    squares. Already small grayscale images (the motion gate's thumbnail)
+    are used as they are.
+    """
+    if image.shape[:2] != (size, size):
+        image = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    cells = image.astype(np.float32)
+    cells = (cells - cells.mean()) / (cells.std() + 1e-6)
+    return np.clip(cells * 32, -127, 127).astype(np.int8)
+
+
+def distance(a, b, tolerance=24):
+    """Number of cells whose normalized brightness differs by more than ``tolerance``"""
+    return int(np.count_nonzero(np.abs(a.astype(np.int16) - b) > tolerance))
+
+
+class FingerprintCache:
+    """Reuses detection results for frames that look like a recently detected one.
+
+    Camera frames of an unchanged board are never byte-identical, but their
+    fingerprints differ in at most a cell or two, while a single moved pawn
+    changes several. Results are remembered for the last ``max_entries``
+    fingerprints and returned for any frame within ``threshold`` cells of
+    one of them. Lookups and stores may come from several threads at once.
+    """
+
+    def __init__(self, max_entries=16, threshold=2, size=32):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.size = size
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget every fingerprint, e.g. when the camera or the board moved"""
+        with self._lock:
+            self.entries = []
+
+    def fingerprint(self, image):
+        return fingerprint(image, self.size)
+
+    def lookup(self, key):
+        """Result stored for the nearest fingerprint within the threshold, or None"""
+        with self._lock:
+            self.lookups += 1
+            best = None
+            best_distance = self.threshold + 1
+            for index, (stored, _) in enumerate(self.entries):
+                cells = distance(key, stored)
+                if cells < best_distance:
+                    best, best_distance = index, cells
+            if best is None:
+                return None
+            # Most recently used last
+            entry = self.entries.pop(best)
+            self.entries.append(entry)
+            self.hits += 1
+            return entry[1]
+
+    def store(self, key, result):
+        with self._lock:
+            self.entries.append((key, result))
+            if len(self.entries) > self.max_entries:
+                self.entries.pop(0)
+
+    @property
+    def hit_ratio(self):
+        """Fraction of lookups answered from a previous detection"""
+        if self.lookups == 0:
+            return 0.0
+        return self.hits / self.lookups
@@ -0,0 +1,267 @@
+"""
+Game reconstruction from noisy per-frame detections.
+
+Consecutive detections are decoded into the most likely sequence of legal
+moves with a beam-pruned Viterbi search over the legal move graph. Each
+hypothesis is a board reached by legal moves; every frame it may stay put,
+play one legal move, or (rarely) two when a move was missed, and is scored
+by how well its squares agree with the detected labels and confidences.
+Moves shared by every surviving hypothesis are committed and can be read
+back as UCI moves or PGN while the game is still being played.
+"""
+
+import math
+
+import chess
+import chess.pgn
+import numpy as np
+
+from board_state import BoardState, EMPTY, SQUARE_AT, board_labels, board_from_labels
+
+
+class _MoveNode:
+    """Back-pointer chain shared between hypotheses"""
+    __slots__ = ("move", "parent", "board")
+
+    def __init__(self, move, parent, board=None):
+        self.move = move
+        self.parent = parent
+        self.board = board
+
+
+class _Hypothesis:
+    __slots__ = ("board", "score", "node")
+
+    def __init__(self, board, score, node):
+        self.board = board
+        self.score = score
+        self.node = node
+
+
+def _path(node):
+    """Return the nodes from the root down to ``node``"""
+    nodes = []
+    while node is not None:
+        nodes.append(node)
+        node = node.parent
+    nodes.reverse()
+    return nodes
+
+
+class GameTracker:
+    """Tracks a game from a stream of detections and reconstructs its moves"""
+
+    def __init__(self, board=None, beam_width=16, prune_margin=20.0, stay_probability=0.8,
+                 double_move_probability=0.05, double_move_width=4, empty_confidence=0.7,
+                 lost_mismatches=8, lost_frames=5):
+        self.beam_width = beam_width
+        self.prune_margin = prune_margin
+        self.stay_logp = math.log(stay_probability)
+        self.move_logp = math.log(1.0 - stay_probability)
+        self.double_move_logp = math.log(double_move_probability)
+        self.double_move_width = double_move_width
+        self.empty_confidence = empty_confidence
+        self.lost_mismatches = lost_mismatches
+        self.lost_frames = lost_frames
+        self.reset(board)
+
+    def reset(self, board=None):
+        """Start tracking a new game, from ``board`` or from the next detection"""
+        self.beam = []
+        self.committed = []
+        self._committed_nodes = []
+        self._lost_count = 0
+        if board is not None:
+            root = _MoveNode(None, None, board.copy(stack=False))
+            self.beam = [_Hypothesis(board.copy(stack=False), 0.0, root)]
+            self._committed_nodes = [root]
+
+    def _observation(self, state):
+        # An empty square has no detection score of its own
+        confidences = np.where(state.labels == EMPTY, self.empty_confidence, state.confidences)
+
+        # A wrong label shares the remaining mass with the 12 other labels
+        confidences = np.clip(confidences, 0.05, 0.99)
+        return state.labels, np.log(confidences), np.log((1.0 - confidences) / 12.0)
+
+    @staticmethod
+    def _emission(labels, observation):
+        observed, log_match, log_miss = observation
+        return float(np.where(labels == observed, log_match, log_miss).sum())
+
+    def _initialize(self, observation):
+        labels = observation[0]
+        # The standard start competes with the detected board, so one noisy
+        # first frame does not fix a wrong piece for the rest of the game
+        roots = [chess.Board()]
+        for turn in (chess.WHITE, chess.BLACK):
+            board = board_from_labels(labels, turn)
+            if board.is_valid() and board != roots[0]:
+                roots.append(board)
+
+        for board in roots:
+            score = self._emission(board_labels(board), observation) + math.log(1.0 / len(roots))
+            root = _MoveNode(None, None, board.copy(stack=False))
+            self.beam.append(_Hypothesis(board, score, root))
+        self.beam.sort(key=lambda hypothesis: hypothesis.score, reverse=True)
+
+    def _expand(self, observation):
+        # Best (score, parent hypothesis, moves) per reachable position
+        best = {}
+
+        def consider(board, score, hypothesis, moves):
+            labels = board_labels(board)
+            score += self._emission(labels, observation)
+            key = (labels.tobytes(), board.turn, board.castling_rights, board.ep_square)
+            if key not in best or score > best[key][0]:
+                best[key] = (score, hypothesis, moves)
+
+        for hypothesis in self.beam:
+            board = hypothesis.board
+            consider(board, hypothesis.score + self.stay_logp, hypothesis, ())
+
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                continue
+            move_score = hypothesis.score + self.move_logp - math.log(len(legal_moves))
+            for move in legal_moves:
+                board.push(move)
+                consider(board, move_score, hypothesis, (move,))
+                board.pop()
+
+        # A missed frame can hide a whole move pair; only follow it from the
+        # strongest single moves and through squares that still disagree
+        single_moves = sorted((entry for entry in best.values() if len(entry[2]) == 1),
+                              key=lambda entry: entry[0], reverse=True)
+        for score, hypothesis, moves in single_moves[:self.double_move_width]:
+            board = hypothesis.board.copy(stack=False)
+            board.push(moves[0])
+            mismatched = np.flatnonzero(board_labels(board) != observation[0])
+            squares = {SQUARE_AT[i] for i in mismatched}
+            if not squares:
+                continue
+
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                continue
+            first_move_score = hypothesis.score + self.move_logp - math.log(hypothesis.board.legal_moves.count())
+            move_score = first_move_score + self.double_move_logp - math.log(len(legal_moves))
+            for move in legal_moves:
+                if move.from_square in squares or move.to_square in squares:
+                    board.push(move)
+                    consider(board, move_score, hypothesis, (moves[0], move))
+                    board.pop()
+
+        return best
+
+    def _commit(self):
+        """Commit the moves every surviving hypothesis agrees on"""
+        paths = [_path(hypothesis.node) for hypothesis in self.beam]
+        depth = len(self._committed_nodes)
+        shortest = min(len(path) for path in paths)
+        newly_committed = []
+        while depth < shortest and all(path[depth] is paths[0][depth] for path in paths):
+            node = paths[0][depth]
+            self._committed_nodes.append(node)
+            if node.move is not None:
+                self.committed.append(node.move)
+                newly_committed.append(node.move)
+            depth += 1
+        return newly_committed
+
+    def update(self, state):
+        """Add one frame of detections as a BoardState and return the newly committed moves"""
+        observation = self._observation(state)
+
+        if not self.beam:
+            self._initialize(observation)
+            return self._commit() if self.beam else []
+
+        best = self._expand(observation)
+        ranked = sorted(best.values(), key=lambda entry: entry[0], reverse=True)
+        top_score = ranked[0][0]
+
+        beam = []
+        for score, hypothesis, moves in ranked[:self.beam_width]:
+            if score < top_score - self.prune_margin:
+                break
+            board = hypothesis.board.copy(stack=False)
+            node = hypothesis.node
+            for move in moves:
+                board.push(move)
+                node = _MoveNode(move, node)
+            beam.append(_Hypothesis(board, score - top_score, node))
+        self.beam = beam
+
+        # Re-anchor on the detections when no legal continuation explains them
+        mismatches = int(np.count_nonzero(board_labels(self.beam[0].board) != observation[0]))
+        if mismatches > self.lost_mismatches:
+            self._lost_count += 1
+            if self._lost_count >= self.lost_frames:
+                self.reset()
+                self._initialize(observation)
+                return self._commit() if self.beam else []
+        else:
+            self._lost_count = 0
+
+        return self._commit()
+
+    def update_fen(self, fen, confidence=0.9):
+        """Add one frame given as a FEN (only the placement field is used)"""
+        try:
+            state = BoardState.from_fen(fen, confidence)
+        except ValueError:
+            return []
+        return self.update(state)
+
+    @property
+    def board(self):
+        """The most likely current position, or None before tracking starts"""
+        return self.beam[0].board if self.beam else None
+
+    def side_to_move(self, margin=3.0):
+        """Side to move ("w" or "b") of the best board, or None while it is ambiguous.
+
+        The turn is ambiguous while a hypothesis with the same placement but
+        the other side to move scores within ``margin`` of the best one, e.g.
+        before the first move of a game picked up mid-way.
+        """
+        if not self.beam:
+            return None
+        best = self.beam[0]
+        labels = board_labels(best.board)
+        for hypothesis in self.beam[1:]:
+            if hypothesis.score < best.score - margin:
+                break
+            if hypothesis.board.turn != best.board.turn and np.array_equal(board_labels(hypothesis.board), labels):
+                return None
+        return "w" if best.board.turn else "b"
+
+    def fen(self):
+        board = self.board
+        return board.fen() if board is not None else None
+
+    def moves(self):
+        """Return the most likely move sequence (committed and tentative)"""
+        if not self.beam:
+            return list(self.committed)
+        return [node.move for node in _path(self.beam[0].node) if node.move is not None]
+
+    def uci_moves(self):
+        return [move.uci() for move in self.moves()]
+
+    def pgn(self):
+        """Return the most likely game so far as PGN"""
+        game = chess.pgn.Game()
+        if not self.beam:
+            return str(game)
+
+        nodes = _path(self.beam[0].node)
+        start = nodes[0].board
+        if start.fen() != chess.STARTING_FEN:
+            game.setup(start)
+
+        current = game
+        for node in nodes[1:]:
+            current = current.add_variation(node.move)
+        return str(game)
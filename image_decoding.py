@@ -0,0 +1,76 @@
+"""
+Resolution-aware decoding of uploaded images.
+
+The detection pipeline resizes every image to 600x600, so fully decoding a
+12-megapixel phone photo wastes most of the decode time and memory. The
+JPEG header is parsed first and the image is decoded with libjpeg's DCT
+scaling (``IMREAD_REDUCED_COLOR_2/4/8``) at the largest reduction that
+still leaves at least the pipeline's resolution.
+"""
+
+import struct
+
+import cv2
+import numpy as np
+
+# Reduction factor -> OpenCV flag; JPEG decoders scale in the DCT domain
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Start-of-frame markers carry the image size; C4, C8 and CC are not frames
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's frame header, or None if ``data`` is not a JPEG"""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a length field
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+
+def reduction_factor(size, target_size):
+    """Largest of 8, 4, 2 that keeps both sides of ``size`` at or above ``target_size``, else 1"""
+    # Compare the short side with the long target: EXIF rotation may swap the sides
+    shortest = min(size)
+    needed = max(target_size)
+    for factor in (8, 4, 2):
+        if shortest // factor >= needed:
+            return factor
+    return 1
+
+
+def decode_image(data, target_size=None):
+    """Decode an encoded image to a BGR array, or None if it cannot be decoded.
+
+    With a ``target_size`` (width, height), JPEGs are decoded at the
+    smallest DCT-scaled size that is still at least that large.
+    """
+    if not data:
+        return None
+    flag = cv2.IMREAD_COLOR
+    if target_size:
+        size = jpeg_size(data)
+        if size:
+            flag = _REDUCED_FLAGS[reduction_factor(size, target_size)]
+    return cv2.imdecode(np.frombuffer(data, np.uint8), flag)
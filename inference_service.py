@@ -0,0 +1,180 @@
+"""
+Dedicated YOLO inference processes shared by every API worker.
+
+Each inference server owns one copy of the model and a slice of the vision
+thread budget, and answers detection requests on its own Unix socket (see
+local_ipc.py): frames arrive through a shared memory block and the boxes go
+back as a small reply. API workers then never import torch or load the
+weights, so their memory does not depend on the model size.
+
+    python inference_service.py --model best.pt --workers 2
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+
+from adaptive_quality import quality_levels
+from local_ipc import LocalFrameClient, LocalFrameServer
+from model_registry import registry_from_env, version_label
+
+DEFAULT_SOCKET = "/tmp/chess_inference.sock"
+
+
+def socket_paths(base=None, workers=1):
+    """Socket of every inference server; API workers derive the same paths"""
+    base = base or os.getenv("CHESS_INFERENCE_SOCKET", DEFAULT_SOCKET)
+    return [f"{base}.{index}" for index in range(workers)]
+
+
+def box_rows(results):
+    """Ultralytics results as [x1, y1, x2, y2, confidence, class] rows"""
+    rows = []
+    for result in results:
+        if result.boxes is None:
+            continue
+        for box in result.boxes:
+            x1, y1, x2, y2 = (float(value) for value in box.xyxy[0])
+            confidence = float(box.conf[0]) if box.conf is not None else 0.0
+            rows.append([x1, y1, x2, y2, confidence, int(box.cls[0])])
+    return rows
+
+
+def serve(model_path, path, threads=None, fast_model_path=None):
+    """Answer detection requests on ``path`` until killed.
+
+    The request's quality byte selects one of the ``CHESS_QUALITY_LEVELS``
+    and its model name one of the registry's models, both read from the
+    same environment as the API workers. Models are loaded on first use
+    and reloaded when their weights change.
+    """
+    if threads:
+        from resource_governor import limit_vision_threads
+        limit_vision_threads(threads)
+
+    registry = registry_from_env(model_path, fast_model_path).watch()
+    levels = quality_levels()
+    lock = threading.Lock()
+    # The default model is loaded before the socket accepts requests
+    registry.get()
+
+    def detect(image, quality=0, model=None):
+        level = levels[min(quality, len(levels) - 1)]
+        name, chosen, version = registry.get(model)
+        # One inference at a time; the model's own threads use the budget
+        with lock:
+            boxes = box_rows(chosen(image, imgsz=level.imgsz, stream=True))
+        return {"success": True, "boxes": boxes, "model": name, "modelVersion": version_label(version)}
+
+    server = LocalFrameServer(path, detect=detect)
+    print(f"Inference server for {', '.join(registry.names())} listening on {path}")
+    server.serve_forever()
+
+
+def _is_served(path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def start_servers(model_path, paths, threads=None, fast_model_path=None):
+    """Start an inference process for every path not already served; returns the processes"""
+    processes = []
+    for path in paths:
+        if _is_served(path):
+            continue
+        process = multiprocessing.Process(target=serve, args=(model_path, path, threads, fast_model_path),
+                                          daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+class InferenceClient:
+    """Sends frames to the inference servers and returns their boxes.
+
+    Connections are pooled and opened round-robin over ``paths``, so
+    concurrent requests spread over the servers; a request for one
+    ``path`` (e.g. to warm up every server) gets a connection of its own. A
+    server that is still loading its model is waited for up to
+    ``connect_timeout`` seconds.
+    """
+
+    def __init__(self, paths, connect_timeout=60.0):
+        self.paths = list(paths)
+        self.connect_timeout = connect_timeout
+        self._idle = queue.Queue()
+        self._counter = itertools.count()
+
+    def _connect(self, path=None):
+        path = path or self.paths[next(self._counter) % len(self.paths)]
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return LocalFrameClient(path, shared=True)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"No inference server on {path}")
+                time.sleep(0.5)
+
+    def predict(self, frame, quality=0, model=None, path=None):
+        """Detection of ``frame`` by a model at a quality level.
+
+        Returns the boxes as [x1, y1, x2, y2, confidence, class] rows, the
+        name of the model that answered and its version. With ``path``, the
+        server on that socket answers.
+        """
+        if path is not None:
+            client = self._connect(path)
+            try:
+                result = client.detect(frame, quality, model)
+            finally:
+                client.close()
+        else:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = self._connect()
+            try:
+                result = client.detect(frame, quality, model)
+            except Exception:
+                # A dead server; the next request opens a new connection
+                client.close()
+                raise
+            self._idle.put(client)
+        if not result.get("success", True):
+            raise RuntimeError(result.get("error", "inference failed"))
+        return result["boxes"], result["model"], result["modelVersion"]
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run YOLO inference servers for the API workers")
+    parser.add_argument("--model", default=os.getenv("CHESS_MODEL_PATH", "best.pt"), help="Model weights")
+    parser.add_argument("--workers", type=int, default=1, help="Inference processes")
+    parser.add_argument("--fast-model", default=os.getenv("CHESS_FAST_MODEL_PATH"),
+                        help="Smaller or quantized weights for degraded quality levels")
+    parser.add_argument("--socket", help=f"Socket path prefix (default: CHESS_INFERENCE_SOCKET or {DEFAULT_SOCKET})")
+    parser.add_argument("--threads", type=int, help="Inference threads per process (default: vision share)")
+    args = parser.parse_args()
+
+    if args.threads is None:
+        from resource_governor import ResourceGovernor
+        args.threads = ResourceGovernor(processes=args.workers).vision_threads
+    processes = start_servers(args.model, socket_paths(args.socket, args.workers), args.threads,
+                              args.fast_model)
+    for process in processes:
+        process.join()
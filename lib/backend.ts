@@ -0,0 +1,31 @@
+import { type NextRequest, NextResponse } from "next/server"
+
+// Headers naming the browser to the backend, so its rate limits apply per
+// user instead of to the proxy as a whole. The last X-Forwarded-For entry
+// is the one added by the nearest proxy (or by Next.js itself), which the
+// browser cannot forge; the backend takes the same rightmost entry. With
+// CHESS_PROXY_SECRET set it is sent along, so the backend also accepts
+// X-Client-Id from callers that know it, but never from the browser.
+export function clientHeaders(request: NextRequest): Record<string, string> {
+  const forwarded = request.headers.get("x-forwarded-for")?.split(",").pop()?.trim()
+  const client = forwarded || request.headers.get("x-real-ip")
+  const headers: Record<string, string> = client ? { "X-Forwarded-For": client } : {}
+  if (process.env.CHESS_PROXY_SECRET) {
+    headers["X-Proxy-Secret"] = process.env.CHESS_PROXY_SECRET
+  }
+  return headers
+}
+
+// Rate limited (429) and busy (503) answers are passed on with their
+// Retry-After, so the browser can back off instead of seeing a plain error
+export async function busyResponse(response: Response): Promise<NextResponse | null> {
+  if (response.status !== 429 && response.status !== 503) {
+    return null
+  }
+  const body = await response.json().catch(() => ({ success: false, error: "Server busy" }))
+  const retryAfter = response.headers.get("Retry-After")
+  return NextResponse.json(body, {
+    status: response.status,
+    headers: retryAfter ? { "Retry-After": retryAfter } : undefined,
+  })
+}
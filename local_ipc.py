@@ -0,0 +1,251 @@
+"""
+Unix-domain-socket fast path for clients on the same machine.
+
+A co-located capture client sends raw BGR frames instead of JPEG uploads
+over HTTP, so nothing is encoded or decoded. Each request is a fixed
+16-byte header followed either by the pixels themselves or, for the
+shared-memory variant, by the name of a ``multiprocessing.shared_memory``
+block that holds them. Replies are a 9-byte header and a msgpack (when
+installed) or compact JSON body. The quality byte asks for a degraded
+detection level (see adaptive_quality.py), 0 being full quality. Bytes
+after the pixels, or after the block name and a NUL, name the model that
+should answer (see model_registry.py).
+
+    request:  magic "CHFR", mode, source, channels, quality, width, height, payload length
+    reply:    magic "CHRE", encoding, body length
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+REQUEST = struct.Struct("<4sBBBBHHI")
+REPLY = struct.Struct("<4sBI")
+REQUEST_MAGIC = b"CHFR"
+REPLY_MAGIC = b"CHRE"
+
+# Request modes: one stateless detection, or a frame of the connection's live stream
+MODE_DETECT = 0
+MODE_LIVE = 1
+# Where the pixels are: after the header, or in a named shared memory block
+SOURCE_INLINE = 0
+SOURCE_SHARED = 1
+# Reply body encodings
+ENCODING_JSON = 0
+ENCODING_MSGPACK = 1
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Windows has no Unix domain sockets; LocalFrameServer raises OSError there
+_UnixStreamServer = getattr(socketserver, "UnixStreamServer", socketserver.TCPServer)
+
+
+def _receive_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("connection closed")
+        received += count
+    return buffer
+
+
+def _attach(name):
+    """Open a client's shared memory block without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    block = shared_memory.SharedMemory(name=name)
+    # Otherwise this process's resource tracker unlinks the client's block at exit
+    resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def _encode(result):
+    if msgpack is not None:
+        return ENCODING_MSGPACK, msgpack.packb(result, use_bin_type=True)
+    return ENCODING_JSON, json.dumps(result, separators=(",", ":")).encode()
+
+
+def _decode(encoding, body):
+    if encoding == ENCODING_MSGPACK:
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+class _FrameHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        # Per-connection state for MODE_LIVE, created on first use
+        self.session = None
+        self.shared = {}
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                header = _receive_exactly(self.request, REQUEST.size)
+            except ConnectionError:
+                return
+            magic, mode, source, channels, quality, width, height, length = REQUEST.unpack(header)
+            if magic != REQUEST_MAGIC or length > MAX_FRAME_BYTES:
+                return
+            payload = _receive_exactly(self.request, length)
+
+            try:
+                image, model = self._image(source, payload, width, height, channels)
+                if mode == MODE_LIVE:
+                    if self.session is None:
+                        self.session = server.session_factory()
+                    result = server.live(self.session, image)
+                else:
+                    result = server.detect(image, quality, model)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            encoding, body = _encode(result)
+            self.request.sendall(REPLY.pack(REPLY_MAGIC, encoding, len(body)) + body)
+
+    def _image(self, source, payload, width, height, channels):
+        if channels not in (3, 4):
+            raise ValueError("frames must be BGR or BGRA")
+        size = width * height * channels
+        if source == SOURCE_SHARED:
+            name, _, model = bytes(payload).partition(b"\0")
+            name = name.decode()
+            block = self.shared.get(name)
+            if block is None:
+                block = self.shared[name] = _attach(name)
+            buffer = block.buf
+        else:
+            buffer, model = payload, bytes(payload[size:])
+        if len(buffer) < size:
+            raise ValueError(f"frame of {width}x{height}x{channels} needs {size} bytes")
+        # No copy: the client waits for the reply before reusing the buffer
+        image = np.frombuffer(buffer, np.uint8, count=size).reshape(height, width, channels)
+        image = image if channels == 3 else cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        return image, model.decode() or None
+
+    def finish(self):
+        for block in self.shared.values():
+            try:
+                block.close()
+            except BufferError:
+                # An array still views the block; it is released with the process
+                pass
+
+
+class LocalFrameServer(socketserver.ThreadingMixIn, _UnixStreamServer):
+    """Serves raw-frame requests on a Unix domain socket, one thread per client.
+
+    ``detect(image, quality, model)`` answers stateless requests;
+    ``live(session, image)`` answers frames of a stream, with one
+    ``session_factory()`` session per connection. Both take a BGR array and
+    return a dict.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, detect, live=None, session_factory=None):
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix domain sockets are not available")
+        if os.path.exists(path):
+            # Take over a stale socket file, but not one another process serves
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise OSError(f"{path} is already being served")
+            except ConnectionRefusedError:
+                os.unlink(path)
+            finally:
+                probe.close()
+        self.path = path
+        self.detect = detect
+        self.live = live
+        self.session_factory = session_factory
+        super().__init__(path, _FrameHandler)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class LocalFrameClient:
+    """Sends raw BGR frames to a LocalFrameServer.
+
+    With ``shared`` True the pixels are written to a shared memory block
+    that is reused for every frame, and only its name crosses the socket.
+    """
+
+    def __init__(self, path, shared=False):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.shared = shared
+        self.block = None
+
+    def detect(self, image, quality=0, model=None):
+        return self._request(MODE_DETECT, image, quality, model)
+
+    def live(self, image):
+        return self._request(MODE_LIVE, image)
+
+    def _request(self, mode, image, quality=0, model=None):
+        model = model.encode() if model else b""
+        image = np.ascontiguousarray(image, np.uint8)
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        if self.shared:
+            if self.block is None or self.block.size < image.nbytes:
+                self._release()
+                self.block = shared_memory.SharedMemory(create=True, size=image.nbytes)
+            np.ndarray(image.shape, np.uint8, buffer=self.block.buf)[:] = image
+            payload = self.block.name.encode() + (b"\0" + model if model else b"")
+            source = SOURCE_SHARED
+        else:
+            payload = memoryview(image).cast("B")
+            source = SOURCE_INLINE
+        # The model name follows the pixels; it is part of a shared payload already
+        trailer = model if source == SOURCE_INLINE else b""
+
+        self.sock.sendall(REQUEST.pack(REQUEST_MAGIC, mode, source, channels, quality, width, height,
+                                      len(payload) + len(trailer)))
+        self.sock.sendall(payload)
+        if trailer:
+            self.sock.sendall(trailer)
+        magic, encoding, length = REPLY.unpack(_receive_exactly(self.sock, REPLY.size))
+        if magic != REPLY_MAGIC:
+            raise ConnectionError("not a frame server reply")
+        return _decode(encoding, bytes(_receive_exactly(self.sock, length)))
+
+    def _release(self):
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+    def close(self):
+        self.sock.close()
+        self._release()
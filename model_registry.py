@@ -0,0 +1,249 @@
+"""
+Registry of detector weights served by name.
+
+The training runs under ``runs/detect`` (``train``, ``train4``, ...) each
+leave a ``weights/best.pt``. The registry knows every such file, loads a
+model only when it is first asked for, warms it up with one blank frame,
+keeps at most ``max_models`` resident (and, with ``max_mb``, at most that
+much weight memory) by evicting the least recently used, and watches the
+weight files so a retrained model is swapped in without a restart.
+
+A swap loads and warms the new weights first and then replaces the
+resident model in one assignment: requests that already hold the old model
+finish with it, later requests get the new one.
+
+Names come from the run directories, plus ``default`` (``CHESS_MODEL_PATH``),
+``fast`` (``CHESS_FAST_MODEL_PATH``) and ``CHESS_MODELS``, a comma-separated
+list of ``name=path`` pairs.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+RUNS_DIRECTORY = Path(__file__).resolve().parent / "runs" / "detect"
+DEFAULT_MODEL = "default"
+FAST_MODEL = "fast"
+
+
+def discover_models(directory=RUNS_DIRECTORY):
+    """{run name: weights path} for every training run with a best.pt"""
+    models = {}
+    if os.path.isdir(directory):
+        for run in sorted(os.listdir(directory)):
+            weights = os.path.join(directory, run, "weights", "best.pt")
+            if os.path.exists(weights):
+                models[run] = weights
+    return models
+
+
+def file_version(path):
+    """Modification time and size of ``path``, or None when it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def version_label(version):
+    """Readable version of a weight file: its modification time in UTC"""
+    if version is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(version[0] / 1e9))
+
+
+def load_yolo(path):
+    from ultralytics import YOLO
+    return YOLO(path)
+
+
+def model_bytes(model, path):
+    """Memory taken by a model's parameters, or the size of its weight file"""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.model.parameters())
+    except Exception:
+        version = file_version(path)
+        return version[1] if version else 0
+
+
+class _Entry:
+    def __init__(self, path):
+        self.path = path
+        self.model = None
+        self.version = None
+        self.bytes = 0
+        # Serializes loads of this model only; other models load in parallel
+        self.load_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Lazily loaded, LRU-evicted and hot-reloaded models by name"""
+
+    def __init__(self, paths=None, default=DEFAULT_MODEL, max_models=2, max_mb=None,
+                 loader=load_yolo, warmup=True, watch_interval=2.0):
+        self.default = default
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+        self.loader = loader
+        self.warmup = warmup
+        self.watch_interval = watch_interval
+        self.entries = {}
+        # Resident model names, least recently used first
+        self.resident = OrderedDict()
+        self.counters = {"loads": 0, "reloads": 0, "evictions": 0, "failures": 0}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        for name, path in (paths or {}).items():
+            self.register(name, path)
+
+    def register(self, name, path):
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry is None or entry.path != path:
+                self.entries[name] = _Entry(path)
+                self.resident.pop(name, None)
+
+    def names(self):
+        return sorted(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def available(self, name=None):
+        """True when the model is resident or its weights exist"""
+        entry = self.entries.get(name or self.default)
+        return entry is not None and (entry.model is not None or file_version(entry.path) is not None)
+
+    def current_version(self, name=None):
+        """Version of the weight file on disk, which the next load or reload picks up"""
+        entry = self.entries.get(name or self.default)
+        return file_version(entry.path) if entry is not None else None
+
+    def get(self, name=None):
+        """(name, model, version) of a model, loading it on first use; KeyError if unknown"""
+        name = name or self.default
+        entry = self.entries[name]
+        with self._lock:
+            if entry.model is not None:
+                self.resident.move_to_end(name)
+                return name, entry.model, entry.version
+        with entry.load_lock:
+            if entry.model is None:
+                self._load(name, entry)
+            return self._keep(name, entry)
+
+    def _keep(self, name, entry):
+        with self._lock:
+            self.resident[name] = True
+            self.resident.move_to_end(name)
+            self._evict(keep=name)
+            return name, entry.model, entry.version
+
+    def _load(self, name, entry):
+        version = file_version(entry.path)
+        started = time.perf_counter()
+        try:
+            model = self.loader(entry.path)
+            if self.warmup:
+                # The first call initializes lazily created buffers; no request pays for it
+                model(np.zeros((64, 64, 3), np.uint8), verbose=False)
+        except Exception:
+            with self._lock:
+                self.counters["failures"] += 1
+            raise
+        loaded_bytes = model_bytes(model, entry.path)
+        with self._lock:
+            reloaded = entry.model is not None
+            # One assignment swaps the model; holders of the old one finish with it
+            entry.model, entry.version, entry.bytes = model, version, loaded_bytes
+            self.counters["reloads" if reloaded else "loads"] += 1
+        print(f"{'Reloaded' if reloaded else 'Loaded'} model {name} from {entry.path} "
+              f"in {time.perf_counter() - started:.2f}s")
+
+    def _evict(self, keep):
+        def over_budget():
+            if len(self.resident) > self.max_models:
+                return True
+            if self.max_bytes is None:
+                return False
+            return sum(self.entries[name].bytes for name in self.resident) > self.max_bytes
+
+        for name in list(self.resident):
+            if not over_budget():
+                break
+            if name == keep:
+                continue
+            del self.resident[name]
+            entry = self.entries[name]
+            # In-flight requests keep their reference until they finish
+            entry.model, entry.version, entry.bytes = None, None, 0
+            self.counters["evictions"] += 1
+            print(f"Evicted model {name}")
+
+    def reload(self, name):
+        """Load the current weights of a resident model and swap them in"""
+        entry = self.entries[name]
+        with entry.load_lock:
+            if entry.model is not None:
+                self._load(name, entry)
+                self._keep(name, entry)
+
+    def watch(self):
+        """Start a thread that reloads resident models whose weight files changed"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        # Versions seen on the previous poll; a file is reloaded only once it
+        # has stopped changing, never while it is still being written
+        seen = {}
+        while not self._stop.wait(self.watch_interval):
+            with self._lock:
+                resident = [(name, self.entries[name]) for name in self.resident]
+            for name, entry in resident:
+                version = file_version(entry.path)
+                previous, seen[name] = seen.get(name), version
+                if version is None or version == entry.version or version != previous:
+                    continue
+                try:
+                    self.reload(name)
+                except Exception as e:
+                    print(f"Could not reload model {name}, keeping the loaded one: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                models=self.names(),
+                resident=list(self.resident),
+                residentMb=round(sum(self.entries[name].bytes for name in self.resident) / (1024 * 1024), 1),
+                maxModels=self.max_models,
+            )
+
+
+def registry_from_env(model_path=None, fast_model_path=None, **kwargs):
+    """Registry of the training runs and the models configured in the environment"""
+    paths = discover_models()
+    for pair in os.getenv("CHESS_MODELS", "").split(","):
+        name, _, path = pair.partition("=")
+        if name.strip() and path.strip():
+            paths[name.strip()] = path.strip()
+    paths[DEFAULT_MODEL] = model_path or os.getenv("CHESS_MODEL_PATH", "best.pt")
+    fast_model_path = fast_model_path or os.getenv("CHESS_FAST_MODEL_PATH")
+    if fast_model_path:
+        paths[FAST_MODEL] = fast_model_path
+    kwargs.setdefault("max_models", int(os.getenv("CHESS_MAX_MODELS", "2")))
+    if os.getenv("CHESS_MODEL_MEMORY_MB"):
+        kwargs.setdefault("max_mb", float(os.getenv("CHESS_MODEL_MEMORY_MB")))
+    return ModelRegistry(paths, **kwargs)
@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides from a downscaled warped board whether piece detection should run.
+
+    Frame differencing catches pieces and hands in motion, while a slowly
+    learning MOG2 background model catches a hand or arm resting over the
+    board. Detection is triggered once after the scene settles, or for a
+    burst of consecutive frames when a temporal filter downstream needs
+    several readings of the settled board. A burst lasts until the caller
+    calls ``end_burst()`` (the filter has settled) or ``confirm_frames``
+    frames were detected, so a few noisy readings cannot use it up.
+    """
+
+    def __init__(self, size=32, pixel_threshold=25, motion_threshold=0.02,
+                 occlusion_threshold=0.08, settle_frames=3, max_hold_frames=150,
+                 learning_rate=0.002, confirm_frames=1):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.motion_threshold = motion_threshold
+        self.occlusion_threshold = occlusion_threshold
+        self.settle_frames = settle_frames
+        self.max_hold_frames = max_hold_frames
+        self.learning_rate = learning_rate
+        self.confirm_frames = confirm_frames
+
+        self.frames_seen = 0
+        self.detections = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the scene, e.g. after the board was lost or the camera moved"""
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=500, varThreshold=16, detectShadows=False
+        )
+        self.previous = None
+        self.moving = True
+        self.still_frames = 0
+        self.hold_frames = 0
+        self.confirm_remaining = 0
+        self.burst_start = False
+        self.motion = 0.0
+        self.occlusion = 0.0
+
+    def _thumbnail(self, warped):
+        small = cv2.resize(warped, (self.size, self.size), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def should_detect(self, warped):
+        """Update the gate with a warped board image and return True to run detection"""
+        gray = self._thumbnail(warped)
+        self.frames_seen += 1
+        self.burst_start = False
+
+        if self.previous is None:
+            # Seed the background model with the first view of the board
+            self.subtractor.apply(gray, learningRate=1.0)
+            self.previous = gray
+            self.motion = 1.0
+            self.occlusion = 0.0
+            return False
+
+        changed = cv2.absdiff(gray, self.previous) > self.pixel_threshold
+        self.motion = np.count_nonzero(changed) / changed.size
+        self.previous = gray
+
+        foreground = self.subtractor.apply(gray, learningRate=self.learning_rate)
+        self.occlusion = np.count_nonzero(foreground) / foreground.size
+
+        if self.motion > self.motion_threshold:
+            self.moving = True
+            self.still_frames = 0
+            self.confirm_remaining = 0
+            return False
+
+        # A still hand over the board is occlusion, not a settled position,
+        # but an object left on the board long enough becomes background
+        if self.occlusion > self.occlusion_threshold and self.hold_frames < self.max_hold_frames:
+            self.moving = True
+            self.still_frames = 0
+            self.hold_frames += 1
+            self.confirm_remaining = 0
+            return False
+
+        self.still_frames += 1
+        if self.moving and self.still_frames >= self.settle_frames:
+            self.moving = False
+            self.hold_frames = 0
+            self.confirm_remaining = self.confirm_frames - 1
+            self.burst_start = True
+            # Adopt the settled board as the new background
+            self.subtractor.apply(gray, learningRate=1.0)
+            self.detections += 1
+            return True
+
+        if self.confirm_remaining > 0:
+            self.confirm_remaining -= 1
+            self.detections += 1
+            return True
+
+        return False
+
+    def end_burst(self):
+        """Stop detecting until the next motion, e.g. once the readings agree"""
+        self.confirm_remaining = 0
+
+    @property
+    def skip_ratio(self):
+        """Fraction of frames on which detection was skipped"""
+        if self.frames_seen == 0:
+            return 0.0
+        return 1.0 - self.detections / self.frames_seen
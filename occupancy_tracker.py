@@ -0,0 +1,159 @@
+"""
+Detector-free move tracking.
+
+After one full YOLO read the identities of the pieces are known, so each
+following frame only needs to tell empty, white and black squares apart.
+The 64 squares of the warped board are classified with a nearest-centroid
+rule on cheap per-square statistics (centre brightness and texture), the
+centroids being learned from the last confirmed position. The observed
+occupancy is matched against the legal moves of the current board and a
+full detection pass is only requested when no move or several moves fit.
+"""
+
+import chess
+import cv2
+import numpy as np
+
+from board_state import BoardState, EMPTY, SQUARE_AT, board_labels
+from chessboard_processor import detect_chess_board, warp_chess_board, detect_chess_pieces
+from game_tracker import GameTracker
+from position_repair import LIVE_MAX_NODES, repair_position
+
+WHITE, BLACK = 1, 2
+
+STATIC = "static"
+MOVE = "move"
+FALLBACK = "fallback"
+
+# Light squares (a8, c8, ...) have parity 0, dark squares parity 1
+_PARITY = np.array([(i // 8 + i % 8) % 2 for i in range(64)])
+_BITS = np.array([1 << SQUARE_AT[i] for i in range(64)], dtype=np.uint64)
+
+
+def board_occupancy(board):
+    """Return 64 empty/white/black codes in FEN square order"""
+    labels = board_labels(board)
+    # White pieces come first in PIECE_SYMBOLS (labels 1..6)
+    return np.where(labels == EMPTY, EMPTY, np.where(labels <= 6, WHITE, BLACK)).astype(np.int8)
+
+
+class OccupancyTracker:
+    """Follows a game from per-square occupancy and the legal move list"""
+
+    def __init__(self, game_tracker=None, square_size=65, margin_ratio=0.25, adapt_rate=0.1):
+        self.game_tracker = game_tracker or GameTracker()
+        self.square_size = square_size
+        self.margin_ratio = margin_ratio
+        self.adapt_rate = adapt_rate
+        self.centroids = None
+        self.scale = None
+        self.last_move = None
+
+    def square_features(self, warped, start_x, start_y):
+        """Mean and standard deviation of the centre of every square"""
+        size = self.square_size
+        margin = int(size * self.margin_ratio)
+        grid = warped[start_y:start_y + 8 * size, start_x:start_x + 8 * size]
+        if grid.ndim == 3:
+            grid = cv2.cvtColor(grid, cv2.COLOR_BGR2GRAY)
+        cells = grid.astype(np.float32).reshape(8, size, 8, size)[:, margin:size - margin, :, margin:size - margin]
+        return np.stack([cells.mean(axis=(1, 3)).ravel(), cells.std(axis=(1, 3)).ravel()], axis=1)
+
+    def _calibrate(self, features, occupancy, blend=1.0):
+        centroids = np.full((2, 3, 2), np.nan, np.float32)
+        for parity in (0, 1):
+            for code in (EMPTY, WHITE, BLACK):
+                selected = features[(_PARITY == parity) & (occupancy == code)]
+                if len(selected):
+                    centroids[parity, code] = selected.mean(axis=0)
+
+        # Borrow a missing class from the other square colour
+        for code in (EMPTY, WHITE, BLACK):
+            for parity in (0, 1):
+                if np.isnan(centroids[parity, code, 0]):
+                    centroids[parity, code] = centroids[1 - parity, code]
+
+        if self.centroids is None or blend >= 1.0:
+            self.centroids = centroids
+            self.scale = features.std(axis=0) + 1e-3
+        else:
+            known = ~np.isnan(centroids)
+            self.centroids[known] += blend * (centroids[known] - self.centroids[known])
+
+    def classify(self, features):
+        """Classify every square as EMPTY, WHITE or BLACK"""
+        difference = (features[:, None, :] - self.centroids[_PARITY]) / self.scale
+        distance = np.nan_to_num((difference ** 2).sum(axis=2), nan=np.inf)
+        return distance.argmin(axis=1).astype(np.int8)
+
+    def synchronize(self, warped, start_x, start_y, state):
+        """Feed a full detection pass to the game tracker and recalibrate"""
+        self.game_tracker.update(state)
+        board = self.game_tracker.board
+        if board is not None:
+            self._calibrate(self.square_features(warped, start_x, start_y), board_occupancy(board))
+
+    def update(self, warped, start_x, start_y):
+        """Track one frame; returns STATIC, MOVE or FALLBACK"""
+        board = self.game_tracker.board
+        if board is None or self.centroids is None:
+            return FALLBACK
+
+        features = self.square_features(warped, start_x, start_y)
+        occupancy = self.classify(features)
+        white = int(_BITS[occupancy == WHITE].sum())
+        black = int(_BITS[occupancy == BLACK].sum())
+
+        if white == board.occupied_co[chess.WHITE] and black == board.occupied_co[chess.BLACK]:
+            self._calibrate(features, occupancy, self.adapt_rate)
+            return STATIC
+
+        matches = []
+        for move in board.legal_moves:
+            board.push(move)
+            if white == board.occupied_co[chess.WHITE] and black == board.occupied_co[chess.BLACK]:
+                matches.append(move)
+            board.pop()
+
+        # Promotions share one occupancy pattern, so they also need the detector
+        if len(matches) != 1:
+            return FALLBACK
+
+        move = matches[0]
+        after = board.copy(stack=False)
+        after.push(move)
+        self.game_tracker.update(BoardState.from_board(after, confidence=0.99))
+        self._calibrate(features, occupancy, self.adapt_rate)
+        self.last_move = move
+        return MOVE
+
+    def fen(self):
+        return self.game_tracker.fen()
+
+
+def track_frame(frame, model, tracker, square_size=65, new_width=600, new_height=600, motion_gate=None):
+    """Like process_frame, but only runs the detector when occupancy tracking is unsure"""
+    frame = cv2.resize(frame, (new_width, new_height))
+    board_contour = detect_chess_board(frame)
+    if board_contour is None:
+        return frame, None
+
+    cv2.drawContours(frame, [board_contour], 0, (0, 255, 0), 2)
+    warped = warp_chess_board(frame, board_contour, new_width, new_height)
+
+    if motion_gate is not None and not motion_gate.should_detect(warped):
+        return frame, None
+
+    start_x = (warped.shape[1] - square_size * 8) // 2
+    start_y = (warped.shape[0] - square_size * 8) // 2
+
+    if tracker.update(warped, start_x, start_y) == FALLBACK:
+        frame, _, state = detect_chess_pieces(frame, warped.copy(), start_x, start_y, square_size, model)
+        repair = repair_position(state, max_nodes=LIVE_MAX_NODES)
+        if repair is not None:
+            tracker.synchronize(warped, start_x, start_y, repair['state'])
+    elif motion_gate is not None:
+        # Occupancy alone explained the frame; no more readings needed
+        motion_gate.end_burst()
+
+    return frame, tracker.fen()
@@ -0,0 +1,210 @@
+"""
+Plausibility checks and repair of detected positions.
+
+Detections that no legal game can produce (two white kings, pawns on the
+back rank, seventeen pieces for one side, touching kings, ...) are repaired
+before they reach the engine. Every square offers its detected candidate
+labels and "empty", each with a probability; the repair is the most
+probable assignment that satisfies the chess invariants, found with a
+best-first enumeration of changes away from the most probable reading.
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+from board_state import EMPTY, PIECE_LABELS
+
+WHITE_KING = PIECE_LABELS["K"]
+BLACK_KING = PIECE_LABELS["k"]
+PAWNS = (PIECE_LABELS["P"], PIECE_LABELS["p"])
+
+# Back ranks in FEN square order: a8..h8 and a1..h1
+_BACK_RANKS = np.r_[0:8, 56:64]
+
+# Initial count of each non-king, non-pawn piece type, for promotion bounds
+_START_COUNTS = {"N": 2, "B": 2, "R": 2, "Q": 1}
+
+# Search budget for readings of a live stream, which must not stall the
+# frame loop; a one-off upload can afford the default
+LIVE_MAX_NODES = 300
+
+
+def _side_labels(white):
+    return {symbol: PIECE_LABELS[symbol if white else symbol.lower()] for symbol in "PNBRQK"}
+
+
+def find_violations(labels):
+    """Return the chess invariants broken by 64 labels, as (reason, squares) pairs"""
+    counts = np.bincount(labels, minlength=13)
+    violations = []
+
+    for king, name in ((WHITE_KING, "white"), (BLACK_KING, "black")):
+        if counts[king] != 1:
+            violations.append((f"{name} has {counts[king]} kings", np.flatnonzero(labels == king)))
+
+    back_rank_pawns = _BACK_RANKS[np.isin(labels[_BACK_RANKS], PAWNS)]
+    if back_rank_pawns.size:
+        violations.append(("pawn on the first or last rank", back_rank_pawns))
+
+    for white in (True, False):
+        side = _side_labels(white)
+        name = "white" if white else "black"
+        pawns = counts[side["P"]]
+        pieces = sum(counts[label] for label in side.values())
+        promoted = sum(max(0, counts[side[symbol]] - start) for symbol, start in _START_COUNTS.items())
+        side_squares = np.flatnonzero(np.isin(labels, list(side.values())))
+
+        if pawns > 8:
+            violations.append((f"{name} has {pawns} pawns", np.flatnonzero(labels == side["P"])))
+        if pieces > 16:
+            violations.append((f"{name} has {pieces} pieces", side_squares))
+        if promoted > 8 - pawns:
+            violations.append((f"{name} has more promoted pieces than missing pawns", side_squares))
+
+    white_kings = np.flatnonzero(labels == WHITE_KING)
+    black_kings = np.flatnonzero(labels == BLACK_KING)
+    if white_kings.size == 1 and black_kings.size == 1:
+        (wr, wf), (br, bf) = divmod(white_kings[0], 8), divmod(black_kings[0], 8)
+        if abs(wr - br) <= 1 and abs(wf - bf) <= 1:
+            violations.append(("kings on adjacent squares", np.r_[white_kings, black_kings]))
+
+    return violations
+
+
+def is_plausible(labels):
+    return not find_violations(labels)
+
+
+def _min_changes(labels, options):
+    """Lower bound on the squares a repair has to change, or None when no repair exists.
+
+    Each broken invariant needs at least so many changes; one change may
+    fix several invariants, so the bound is their maximum, not their sum.
+    """
+    counts = np.bincount(labels, minlength=13)
+    needed = [int(np.count_nonzero(np.isin(labels[_BACK_RANKS], PAWNS)))]
+    for white in (True, False):
+        side = _side_labels(white)
+        kings = counts[side["K"]]
+        if kings == 0:
+            # A missing king can only come from a square that offers it
+            if not any(label == side["K"] for square in options for label, _ in square):
+                return None
+            needed.append(1)
+        needed.append(max(0, kings - 1))
+        needed.append(max(0, counts[side["P"]] - 8))
+        needed.append(max(0, sum(counts[label] for label in side.values()) - 16))
+    return max(needed)
+
+
+def _square_options(state, min_empty=0.05):
+    """Per-square (label, cost) options, cost being -log(probability)"""
+    options = []
+    for i in range(64):
+        candidates = [(int(label), float(confidence))
+                      for label, confidence in zip(state.candidate_labels[i], state.candidate_confidences[i])
+                      if label != EMPTY]
+        if state.labels[i] != EMPTY and all(label != state.labels[i] for label, _ in candidates):
+            candidates.append((int(state.labels[i]), float(state.confidences[i]) or 1.0))
+        if not candidates:
+            options.append([(EMPTY, 0.0)])
+            continue
+
+        empty = max(min_empty, 1.0 - max(confidence for _, confidence in candidates))
+        if state.labels[i] != EMPTY:
+            # A detected piece is never less probable than no piece, so a
+            # low-confidence box is only removed to satisfy an invariant
+            detected = next(confidence for label, confidence in candidates if label == state.labels[i])
+            empty = min(empty, detected)
+        weights = candidates + [(EMPTY, empty)]
+        total = sum(weight for _, weight in weights)
+        options.append([(label, -math.log(max(weight, 1e-6) / total)) for label, weight in weights])
+    return options
+
+
+def repair_position(state, max_nodes=5000, max_changes=8):
+    """Find the most probable plausible board for a detected BoardState.
+
+    Returns a dict with the repaired ``state``, the ``changes`` made as
+    (square index, old label, new label), the added negative log-likelihood
+    ``cost`` and a ``score`` in (0, 1] (1.0 when no change made the
+    reading less probable), or None when no repair is found in budget.
+    Changes and cost are counted from the detected labels, so a plausible
+    detection is returned unchanged. A reading that needs more than
+    ``max_changes`` changes is rejected without searching; live streams
+    should pass ``max_nodes=LIVE_MAX_NODES``.
+    """
+    options = _square_options(state)
+    base = state.labels.astype(np.int8)
+    base_cost = {i: next(cost for label, cost in square if label == base[i]) for i, square in enumerate(options)}
+
+    violations = find_violations(base)
+    if not violations:
+        return _result(state, base, [], 0.0)
+
+    min_changes = _min_changes(base, options)
+    if min_changes is None or min_changes > max_changes:
+        return None
+    min_changes = max(1, min_changes)
+
+    # Only squares involved in a violation, or able to supply a missing king, may change
+    relevant = set()
+    for _, squares in violations:
+        relevant.update(int(i) for i in squares)
+    for i, square in enumerate(options):
+        if any(label in (WHITE_KING, BLACK_KING) for label, _ in square):
+            relevant.add(i)
+
+    # The detected label is the most probable option of its square; the
+    # clamp only guards the enumeration order against ties and rounding
+    deltas = sorted(
+        (max(0.0, cost - base_cost[i]), i, label)
+        for i in relevant
+        for label, cost in options[i]
+        if label != base[i]
+    )
+    if not deltas or len({i for _, i, _ in deltas}) < min_changes:
+        return None
+
+    # Enumerate subsets of changes in increasing cost: each subset ending at
+    # j spawns "append j + 1" and "replace j with j + 1"
+    heap = [(deltas[0][0], (0,))]
+    nodes = 0
+    while heap and nodes < max_nodes:
+        cost, combo = heapq.heappop(heap)
+        nodes += 1
+        last = combo[-1]
+        if last + 1 < len(deltas):
+            heapq.heappush(heap, (cost + deltas[last + 1][0], combo + (last + 1,)))
+            heapq.heappush(heap, (cost - deltas[last][0] + deltas[last + 1][0], combo[:-1] + (last + 1,)))
+
+        # Too few changes to be plausible, or two changes to one square
+        squares = [deltas[j][1] for j in combo]
+        if len(combo) < min_changes or len(set(squares)) != len(squares):
+            continue
+
+        labels = base.copy()
+        for j in combo:
+            labels[deltas[j][1]] = deltas[j][2]
+        if is_plausible(labels):
+            changes = [(deltas[j][1], int(base[deltas[j][1]]), int(deltas[j][2])) for j in combo]
+            return _result(state, labels, changes, cost)
+
+    return None
+
+
+def _result(state, labels, changes, cost):
+    repaired = state.copy()
+    repaired.labels = labels
+    for i in np.flatnonzero(labels != state.labels):
+        matches = np.flatnonzero(state.candidate_labels[i] == labels[i])
+        repaired.confidences[i] = state.candidate_confidences[i][matches[0]] if matches.size else 0.0
+    repaired.confidences[labels == EMPTY] = 0.0
+    return {
+        "state": repaired,
+        "changes": changes,
+        "cost": cost,
+        "score": math.exp(-cost)
+    }
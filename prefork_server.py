@@ -0,0 +1,86 @@
+"""
+Pre-forking launcher for the FastAPI backend.
+
+``uvicorn --workers N`` spawns fresh interpreters that each import the app
+and load their own model. Here the parent builds the app once (model
+loaded and warmed up), freezes the garbage collector's view of those
+objects and forks the workers, which share the model's memory
+copy-on-write and serve one listening socket. A worker that dies is
+replaced; SIGINT/SIGTERM stop them all.
+"""
+
+import gc
+import os
+import signal
+import socket
+import time
+
+# A worker that exits sooner than this after starting is restarted with a pause
+MIN_WORKER_LIFETIME = 1.0
+
+
+def serve(app, host="0.0.0.0", port=8000, workers=1, log_level="info"):
+    """Serve ``app`` from ``workers`` forked processes until interrupted"""
+    import uvicorn
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        # Windows has no fork; one worker needs none
+        uvicorn.run(app, host=host, port=port, log_level=log_level)
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Objects created so far are never traversed by the collector again, so
+    # the workers do not dirty (and copy) the pages holding them
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def start_worker():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            status = 1
+            try:
+                uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+                status = 0
+            finally:
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        start_worker()
+    print(f"Serving on http://{host}:{port} with {workers} forked workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        # Other children (inference processes) are not workers
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {status}, starting another")
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        if not stopping:
+            start_worker()
+    sock.close()
@@ -0,0 +1,204 @@
+"""
+Central split of CPU cores and memory between vision inference and the engine.
+
+YOLO/torch, OpenCV, onnxruntime and Stockfish all size their thread pools
+for the whole machine; run side by side, and in several server workers, they
+oversubscribe the cores. The governor detects the usable cores and memory,
+gives the vision stack and the engine each a share, divides every share
+between the processes that run it, and can pin the engine and the vision
+threads to disjoint core sets.
+
+The split can be overridden by a JSON config file (``CHESS_RESOURCES_CONFIG``,
+default ``resources.json``) and by environment variables, which win:
+
+    CHESS_WORKERS          processes sharing the machine
+    CHESS_VISION_THREADS   inference threads per process
+    CHESS_ENGINE_THREADS   Stockfish threads per process
+    CHESS_ENGINE_HASH_MB   Stockfish hash per process
+    CHESS_ENGINE_SHARE     fraction of the cores given to the engine
+    CHESS_PIN_CORES        1 to pin vision and engine to their core sets
+"""
+
+import json
+import os
+
+import cv2
+
+DEFAULT_CONFIG_PATH = "resources.json"
+
+# Config file keys and the environment variables overriding them
+_OVERRIDES = {
+    "workers": ("CHESS_WORKERS", int),
+    "vision_threads": ("CHESS_VISION_THREADS", int),
+    "engine_threads": ("CHESS_ENGINE_THREADS", int),
+    "engine_hash_mb": ("CHESS_ENGINE_HASH_MB", int),
+    "engine_share": ("CHESS_ENGINE_SHARE", float),
+    "pin_cores": ("CHESS_PIN_CORES", lambda value: str(value).lower() in ("1", "true", "yes")),
+}
+
+
+def usable_cores():
+    """CPU ids this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def total_memory_mb():
+    """Physical memory in MB, or None when it cannot be read"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().total // (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def limit_vision_threads(threads):
+    """Size the OpenCV, torch and OpenMP/BLAS thread pools of this process"""
+    # Read by OpenMP/BLAS when they start, and inherited by spawned workers
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        # set_num_interop_threads fails once torch has started its pool
+        pass
+
+
+def _load_overrides(config_path):
+    overrides = {}
+    path = config_path or os.getenv("CHESS_RESOURCES_CONFIG", DEFAULT_CONFIG_PATH)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                config = json.load(f)
+            for key, (_, parse) in _OVERRIDES.items():
+                if key in config:
+                    overrides[key] = parse(config[key])
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring resource config {path}: {e}")
+
+    for key, (var, parse) in _OVERRIDES.items():
+        value = os.getenv(var)
+        if value:
+            try:
+                overrides[key] = parse(value)
+            except ValueError:
+                print(f"Ignoring {var}={value!r}")
+    return overrides
+
+
+class ResourceGovernor:
+    """Splits cores and memory between vision inference and the chess engine.
+
+    ``processes`` is the number of processes that each run the vision stack
+    (and the engine when ``engine`` is True); every one of them gets an
+    equal slice of both shares. An explicit count wins over ``CHESS_WORKERS``;
+    without one the override applies, falling back to ``default_processes``.
+    """
+
+    def __init__(self, processes=None, engine=True, engine_share=0.5, memory_share=0.125,
+                 config_path=None, default_processes=1):
+        overrides = _load_overrides(config_path)
+        self.cores = usable_cores()
+        self.memory_mb = total_memory_mb()
+        if processes is None:
+            processes = overrides.get("workers", default_processes)
+        self.processes = max(1, processes)
+        self.engine = engine
+        self.pin_cores = overrides.get("pin_cores", False)
+
+        core_count = len(self.cores)
+        engine_share = min(max(overrides.get("engine_share", engine_share), 0.0), 1.0)
+        if not engine:
+            engine_cores = 0
+        elif core_count == 1:
+            # Nothing to split; both share the only core
+            engine_cores = 1
+        else:
+            engine_cores = min(core_count - 1, max(1, round(core_count * engine_share)))
+
+        self.engine_cores = self.cores[core_count - engine_cores:] if engine else []
+        self.vision_cores = self.cores[:max(1, core_count - engine_cores)]
+
+        self.vision_threads = overrides.get("vision_threads",
+                                            max(1, len(self.vision_cores) // self.processes))
+        self.engine_threads = overrides.get("engine_threads",
+                                            max(1, len(self.engine_cores) // self.processes))
+
+        if "engine_hash_mb" in overrides:
+            self.engine_hash_mb = overrides["engine_hash_mb"]
+        elif self.memory_mb:
+            # Largest power of two within the engine's slice of memory
+            budget = max(16, min(2048, int(self.memory_mb * memory_share) // self.processes))
+            self.engine_hash_mb = 1 << (budget.bit_length() - 1)
+        else:
+            self.engine_hash_mb = 128
+
+    def apply_vision_threads(self):
+        """Size this process's inference thread pools and optionally pin it"""
+        limit_vision_threads(self.vision_threads)
+        if self.pin_cores:
+            self._pin(0, self.vision_cores)
+
+    def onnx_session_options(self):
+        """onnxruntime SessionOptions limited to the vision share, or None without onnxruntime"""
+        try:
+            import onnxruntime
+        except ImportError:
+            return None
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.vision_threads
+        options.inter_op_num_threads = 1
+        return options
+
+    def engine_options(self, threads=None):
+        """UCI options for one engine of this process"""
+        return {"Threads": threads or self.engine_threads, "Hash": self.engine_hash_mb}
+
+    def pin_engine(self, engine):
+        """Pin a running chess.engine.SimpleEngine to the engine core set"""
+        if not self.pin_cores or not self.engine_cores:
+            return
+        try:
+            pid = engine.protocol.transport.get_pid()
+        except AttributeError:
+            return
+        self._pin(pid, self.engine_cores)
+
+    @staticmethod
+    def _pin(pid, cores):
+        if not hasattr(os, "sched_setaffinity"):
+            return
+        try:
+            os.sched_setaffinity(pid, cores)
+        except OSError as e:
+            print(f"Could not pin process {pid or os.getpid()} to cores {cores}: {e}")
+
+    def report(self):
+        memory = f"{self.memory_mb} MB" if self.memory_mb else "unknown memory"
+        lines = [f"Resources: {len(self.cores)} cores, {memory}, {self.processes} process(es)",
+                 f"  vision: {self.vision_threads} thread(s) per process on cores {_ranges(self.vision_cores)}"]
+        if self.engine:
+            lines.append(f"  engine: {self.engine_threads} thread(s), {self.engine_hash_mb} MB hash per process "
+                         f"on cores {_ranges(self.engine_cores)}")
+        lines.append(f"  pinning: {'on' if self.pin_cores else 'off'}")
+        return "\n".join(lines)
+
+
+def _ranges(cores):
+    """Format core ids compactly, e.g. 0-3,6"""
+    parts = []
+    for core in cores:
+        if parts and core == parts[-1][1] + 1:
+            parts[-1][1] = core
+        else:
+            parts.append([core, core])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in parts) or "-"
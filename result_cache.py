@@ -0,0 +1,109 @@
+"""
+Cache of detection results keyed by the content of the uploaded image.
+
+Clients often send the same photo again (retries, the Next.js proxy, a
+refreshed page). The raw upload bytes are hashed together with the model
+version and pipeline parameters, with xxhash's XXH3 when it is installed
+and BLAKE2 otherwise, and the serialized result is kept in an in-memory
+LRU with a byte budget and, optionally, in a directory on disk, so a
+repeated upload skips decoding and inference.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+class ResultCache:
+    """Byte-budgeted LRU of serialized results with an optional on-disk tier"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.size = 0
+        self.stats_counters = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data, *params):
+        """Hex digest of ``data`` and the parameters that shape the result"""
+        digest = xxhash.xxh3_128(data) if xxhash else hashlib.blake2b(data, digest_size=16)
+        for param in params:
+            digest.update(b"\0" + str(param).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Stored bytes for ``key``, or None"""
+        with self._lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.stats_counters["hits"] += 1
+                return value
+
+        value = self._read(key)
+        with self._lock:
+            if value is None:
+                self.stats_counters["misses"] += 1
+                return None
+            self.stats_counters["disk_hits"] += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store the bytes ``value`` under ``key`` in memory and on disk"""
+        self._remember(key, value)
+        self._write(key, value)
+
+    def _remember(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, key, value):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write and rename, so other workers never read a partial file
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not write cached result {path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.stats_counters, entries=len(self.entries), bytes=self.size)
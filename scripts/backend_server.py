@@ -1,27 +1,167 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 import cv2
 import numpy as np
 from PIL import Image
 import io
 import chess
 import chess.engine
-import torch
-from ultralytics import YOLO
 from typing import Optional, Dict, List, Tuple
 import json
 import os
 from pathlib import Path
 import math
+import re
 import logging
+import sys
+import queue
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared vision/chess modules live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from adaptive_quality import QualityController, quality_levels
+from admission_control import BULK, INTERACTIVE, LOOPBACK_ADDRESSES, AdmissionRejected, PriorityLimiter, RateLimiter, forwarded_client
+from board_state import BoardState, possible_turns
+from position_repair import LIVE_MAX_NODES, repair_position, find_violations
+from prefork_server import serve as serve_prefork
+from engine_provisioning import find_engine
+from engine_supervisor import EngineSupervisor
+from fallback_engine import FallbackEngine
+from frame_fingerprint import FingerprintCache
+from motion_gate import MotionGate
+from fen_stabilizer import FenStabilizer
+from image_decoding import decode_image
+from inference_service import InferenceClient, box_rows, socket_paths, start_servers
+from local_ipc import LocalFrameServer
+from model_registry import FAST_MODEL, ModelRegistry, registry_from_env, version_label
+from resource_governor import ResourceGovernor
+from result_cache import ResultCache
+from static_evaluation import evaluate as static_evaluate
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# With CHESS_INFERENCE_WORKERS set, YOLO runs in that many dedicated
+# inference processes (see inference_service.py) instead of in every worker
+INFERENCE_WORKERS = int(os.getenv('CHESS_INFERENCE_WORKERS', '0'))
+
+# Every server worker runs both inference and the engine, so each gets an
+# equal slice of the vision and engine core shares
+governor = ResourceGovernor(default_processes=4)
+if INFERENCE_WORKERS:
+    # Only decoding and board detection run here; torch stays unimported
+    cv2.setNumThreads(governor.vision_threads)
+else:
+    governor.apply_vision_threads()
+logger.info(governor.report())
+
 app = FastAPI(title="Chess Vision API", version="1.0.0")
 
+# Largest request body accepted, checked while the body is received
+MAX_UPLOAD_BYTES = int(float(os.getenv('CHESS_MAX_UPLOAD_MB', '20')) * 1024 * 1024)
+
+class UploadLimitMiddleware:
+    """Reject request bodies over ``max_bytes`` with 413 before they are read in full"""
+    
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": "Upload too large"})
+            await response(scope, receive, send)
+            return
+        
+        # Chunked uploads have no length; count the bytes as they arrive
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise StarletteHTTPException(status_code=413, detail="Upload too large")
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(UploadLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES)
+
+# Per-client request rates (per second, with a burst allowance; 0 disables)
+# and per-worker concurrency caps, see admission_control.py
+vision_rate = RateLimiter(float(os.getenv('CHESS_VISION_RATE', '2')), float(os.getenv('CHESS_VISION_BURST', '10')))
+engine_rate = RateLimiter(float(os.getenv('CHESS_ENGINE_RATE', '2')), float(os.getenv('CHESS_ENGINE_BURST', '10')))
+live_frame_rate = RateLimiter(float(os.getenv('CHESS_LIVE_FPS', '10')), float(os.getenv('CHESS_LIVE_FPS', '10')))
+ADMISSION_QUEUE = int(os.getenv('CHESS_ADMISSION_QUEUE', '16'))
+ADMISSION_TIMEOUT = float(os.getenv('CHESS_ADMISSION_TIMEOUT', '5'))
+vision_admission = PriorityLimiter(int(os.getenv('CHESS_VISION_CONCURRENCY', str(max(2, governor.vision_threads)))),
+                                   ADMISSION_QUEUE, ADMISSION_TIMEOUT)
+engine_admission = PriorityLimiter(int(os.getenv('CHESS_ENGINE_CONCURRENCY', '2')), ADMISSION_QUEUE, ADMISSION_TIMEOUT)
+# Behind the Next.js proxy the client is named by X-Forwarded-For, or by
+# X-Client-Id when the proxy also sends CHESS_PROXY_SECRET as X-Proxy-Secret.
+# By default ("local") only a proxy on this host is trusted to set them; "1"
+# trusts any peer (a proxy on another host), "0" none
+TRUST_FORWARDED = os.getenv('CHESS_TRUST_FORWARDED', 'local').lower()
+PROXY_SECRET = os.getenv('CHESS_PROXY_SECRET', '')
+
+def client_key(scope) -> str:
+    """Rate limit key of the client that sent a request"""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    trusted = TRUST_FORWARDED in ('1', 'true', 'yes') or (TRUST_FORWARDED == 'local' and peer in LOOPBACK_ADDRESSES)
+    return forwarded_client(peer, dict(scope.get("headers") or []), trusted, PROXY_SECRET)
+
+def lane(priority: Optional[str]) -> int:
+    return BULK if priority == 'bulk' else INTERACTIVE
+
+def rejection(status_code: int, error: str, retry_after: float) -> JSONResponse:
+    retry_after = max(1, math.ceil(retry_after))
+    return JSONResponse(status_code=status_code, headers={"Retry-After": str(retry_after)},
+                        content={"success": False, "error": error, "retryAfter": retry_after})
+
+class RateLimitMiddleware:
+    """Answer 429 with Retry-After to clients over their rate, before the body is read"""
+    
+    def __init__(self, app, limits: Dict[str, RateLimiter]):
+        self.app = app
+        self.limits = limits
+    
+    async def __call__(self, scope, receive, send):
+        limiter = self.limits.get(scope.get("path")) if scope["type"] in ("http", "websocket") else None
+        wait = limiter.check(client_key(scope)) if limiter is not None else 0
+        if not wait:
+            await self.app(scope, receive, send)
+        elif scope["type"] == "websocket":
+            # Try again later (1013)
+            await send({"type": "websocket.close", "code": 1013})
+        else:
+            await rejection(429, "Rate limit exceeded", wait)(scope, receive, send)
+
+app.add_middleware(RateLimitMiddleware, limits={
+    "/api/detect-chess-position": vision_rate,
+    "/api/analyze-position": engine_rate,
+    "/api/live": vision_rate
+})
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request, exc: AdmissionRejected):
+    return rejection(503, f"Server busy: {exc}", exc.retry_after)
+
 # Add CORS middleware with more permissive settings
 app.add_middleware(
     CORSMiddleware,
@@ -34,8 +174,14 @@ app.add_middleware(
 class IntegratedChessVisionModel:
     """Integrated chess piece detection model using your YOLOv8 implementation"""
     
-    def __init__(self, model_path: str = "best.pt"):
-        self.model_path = model_path
+    def __init__(self, registry: ModelRegistry, inference: Optional[InferenceClient] = None, levels=None):
+        # Weights by name, loaded on first use, see model_registry.py
+        self.registry = registry
+        self.model_path = registry.entries[registry.default].path
+        # Client of the inference processes; models are then not loaded here
+        self.inference = inference
+        # Quality levels by index, see adaptive_quality.py
+        self.levels = levels or quality_levels()
         # Object classes for chess pieces (from your code)
         self.classNames = ["B", "K", "N", "P", "Q", "R", "b", "k", "n", "p", "q", "r"]
         
@@ -45,13 +191,13 @@ class IntegratedChessVisionModel:
             'b': 'b', 'k': 'k', 'n': 'n', 'p': 'p', 'q': 'q', 'r': 'r'
         }
         
-        # Load the YOLOv8 model (from your code)
-        try:
-            self.model = YOLO(model_path)
-            print(f"Model loaded successfully from {model_path}")
-        except Exception as e:
-            print(f"Failed to load model from {model_path}: {e}")
-            self.model = None
+        # Load the default YOLOv8 model up front; the others load on first use
+        if inference is None:
+            try:
+                self.registry.get()
+                print(f"Model loaded successfully from {self.model_path}")
+            except Exception as e:
+                print(f"Failed to load model from {self.model_path}: {e}")
         
         # Board detection parameters
         self.square_size = 65
@@ -59,6 +205,56 @@ class IntegratedChessVisionModel:
         self.new_height = 600
         self.grid_width = self.square_size * 8
         self.grid_height = self.square_size * 8
+        # Results of recently read boards per model and weights version,
+        # reused for photos of the same scene
+        self.fingerprints: Dict[str, Tuple] = {}
+        # Live sessions run inference from worker threads
+        self.inference_lock = threading.Lock()
+    
+    def cache_signature(self, model: Optional[str] = None) -> Tuple:
+        """Model version and pipeline parameters that shape a detection result"""
+        name = model or self.registry.default
+        path = self.registry.entries[name].path
+        version = (name, os.path.abspath(path), self.registry.current_version(name))
+        return (version, self.model_loaded, self.new_width, self.new_height, self.square_size)
+    
+    @property
+    def model_loaded(self) -> bool:
+        return self.inference is not None or self.registry.available()
+    
+    def resolve_model(self, model: Optional[str] = None, quality: int = 0) -> str:
+        """Name of the model that answers a request for ``model`` at a quality level"""
+        name = model or self.registry.default
+        level = self.levels[min(quality, len(self.levels) - 1)]
+        # Degraded levels swap the default model for the fast one; an
+        # explicitly requested model is kept
+        if level.fast_model and name == self.registry.default and FAST_MODEL in self.registry:
+            return FAST_MODEL
+        return name
+    
+    def predict(self, frame, quality: int = 0, model: Optional[str] = None,
+                path: Optional[str] = None) -> Tuple[List[List[float]], str, Optional[str]]:
+        """Piece boxes as [x1, y1, x2, y2, confidence, class] rows, with the answering model and its version
+        
+        ``path`` picks the inference process on that socket instead of the next pooled one.
+        """
+        name = self.resolve_model(model, quality)
+        if self.inference is not None:
+            return self.inference.predict(frame, quality, name, path)
+        level = self.levels[min(quality, len(self.levels) - 1)]
+        name, detector, version = self.registry.get(name)
+        with self.inference_lock:
+            rows = box_rows(detector(frame, imgsz=level.imgsz, stream=True))
+        return rows, name, version_label(version)
+    
+    def fingerprint_cache(self, model: Optional[str] = None) -> FingerprintCache:
+        """Fingerprint cache of a model's current weights; retrained weights start a new one"""
+        name = model or self.registry.default
+        version = self.registry.current_version(name)
+        cached = self.fingerprints.get(name)
+        if cached is None or cached[0] != version:
+            cached = self.fingerprints[name] = (version, FingerprintCache(max_entries=64))
+        return cached[1]
     
     def reorder(self, myPoints):
         """Reorder points for perspective transformation (from your code)"""
@@ -137,83 +333,60 @@ class IntegratedChessVisionModel:
 
         return start_x, start_y
 
-    def detect_chess_pieces(self, frame, start_x, start_y):
-        """Detect chess pieces using YOLO model (adapted from your code)"""
-        if self.model is None:
-            return {}
+    def detect_chess_pieces(self, frame, start_x, start_y, quality: int = 0,
+                            model: Optional[str] = None) -> Tuple[BoardState, Dict]:
+        """Detect chess pieces using YOLO model (adapted from your code)
         
-        results = self.model(frame, stream=True)
-        piece_positions = {}  # Dictionary to store piece positions
+        Returns the board state and the name and version of the model that answered.
+        """
+        board_state = BoardState()
+        answered = {'model': self.resolve_model(model, quality), 'modelVersion': None}
+        if not self.model_loaded:
+            return board_state, answered
+        
+        rows, answered['model'], answered['modelVersion'] = self.predict(frame, quality, model)
+        for x1, y1, x2, y2, confidence, cls in rows:
+            # Bounding box
+            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
 
-        for r in results:
-            boxes = r.boxes
-            if boxes is None:
-                continue
+            # Calculate the center coordinates of the bounding box
+            center_x = (x1 + x2) // 2
+            center_y = (y1 + y2) // 2
 
-            for box in boxes:
-                # Bounding box
-                x1, y1, x2, y2 = box.xyxy[0]
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-
-                # Calculate the center coordinates of the bounding box
-                center_x = (x1 + x2) // 2
-                center_y = (y1 + y2) // 2
-
-                # Map the center coordinates to the corresponding square on the warped image
-                square_x = (center_y - start_y) // self.square_size
-                square_y = (center_x - start_x) // self.square_size
-
-                # Ensure the square coordinates are within the chess board bounds
-                square_x = max(0, min(square_x, 7))
-                square_y = max(0, min(square_y, 7))
-
-                # Class name
-                cls = int(box.cls[0])
-                if cls < len(self.classNames):
-                    piece_name = self.classNames[cls]
-
-                    # Store the piece position
-                    square_position = chr(ord('a') + square_y) + str(8 - square_x)
-                    
-                    # Get confidence score
-                    confidence = float(box.conf[0]) if box.conf is not None else 0.0
-                    
-                    # Only store pieces with high confidence
-                    if confidence > 0.5:
-                        piece_positions[square_position] = {
-                            'piece': piece_name,
-                            'confidence': confidence
-                        }
-
-        return piece_positions
-
-    def generate_fen_notation(self, piece_positions):
-        """Generate FEN notation from piece positions (from your code)"""
-        fen_notation = ""
-        for rank in range(8, 0, -1):
-            empty_squares = 0
-            for file in range(ord('a'), ord('i')):
-                square_position = chr(file) + str(rank)
-                if square_position in piece_positions:
-                    if empty_squares > 0:
-                        fen_notation += str(empty_squares)
-                        empty_squares = 0
-                    piece_data = piece_positions[square_position]
-                    piece_name = piece_data['piece'] if isinstance(piece_data, dict) else piece_data
-                    fen_notation += piece_name
+            # Map the center coordinates to the corresponding square on the warped image
+            square_x = (center_y - start_y) // self.square_size
+            square_y = (center_x - start_x) // self.square_size
+
+            # Ensure the square coordinates are within the chess board bounds
+            square_x = max(0, min(square_x, 7))
+            square_y = max(0, min(square_y, 7))
+
+            # Class name
+            cls = int(cls)
+            if cls < len(self.classNames):
+                piece_name = self.classNames[cls]
+                
+                # Only store pieces with high confidence; rows run from
+                # rank 8 down, so this is the square's FEN index. Weaker
+                # boxes are kept as candidates for position repair
+                index = square_x * 8 + square_y
+                if confidence > 0.5:
+                    board_state.set_piece(index, piece_name, confidence)
                 else:
-                    empty_squares += 1
-            if empty_squares > 0:
-                fen_notation += str(empty_squares)
-            if rank != 1:
-                fen_notation += "/"
-
-        # Add game state (active color, castling, en passant, halfmove, fullmove)
-        fen_notation += " w KQkq - 0 1"
-        return fen_notation
-
-    def process_image(self, image: np.ndarray) -> Dict:
-        """Process image and return chess position data"""
+                    board_state.add_candidate(index, piece_name, confidence)
+
+        return board_state, answered
+
+    def generate_fen_notation(self, board_state: BoardState) -> str:
+        """Generate FEN notation from the detected board state"""
+        # Castling rights come from the home squares; a photo does not show
+        # whose turn it is, so white is assumed unless only black can be to move
+        board_state.infer_fields()
+        return board_state.fen()
+
+    def process_image(self, image: np.ndarray, quality: int = 0, model: Optional[str] = None) -> Dict:
+        """Process image with a model at a quality level and return chess position data"""
+        answered = {'model': self.resolve_model(model, quality), 'modelVersion': None}
         try:
             # Resize frame to match your processing size
             frame = cv2.resize(image, (self.new_width, self.new_height))
@@ -227,153 +400,462 @@ class IntegratedChessVisionModel:
                     'error': 'Chess board not detected',
                     'fen': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
                     'confidence': 0.0,
-                    'boardDetected': False
+                    'boardDetected': False,
+                    **answered
                 }
             
             # Warp chess board
             warped = self.warp_chess_board(frame, board_contour, self.new_width, self.new_height)
             
+            # A board that looks like one read recently gets the same result without inference
+            fingerprints = self.fingerprint_cache(model)
+            fingerprint = fingerprints.fingerprint(warped)
+            cached = fingerprints.lookup(fingerprint)
+            if cached is not None:
+                return dict(cached)
+            
             # Get square positions
             start_x, start_y = self.localize_squares(warped)
             
             # Detect chess pieces
-            piece_positions = self.detect_chess_pieces(frame, start_x, start_y)
+            board_state, answered = self.detect_chess_pieces(frame, start_x, start_y, quality, model)
             
-            # Generate FEN notation
-            fen = self.generate_fen_notation(piece_positions)
+            # Repair impossible readings from the per-square candidates
+            repair = repair_position(board_state)
+            if repair is None:
+                return {
+                    'success': False,
+                    'error': 'Detected position is not plausible',
+                    'fen': self.generate_fen_notation(board_state),
+                    'confidence': round(board_state.mean_confidence(), 3),
+                    'boardDetected': True,
+                    'violations': [reason for reason, _ in find_violations(board_state.labels)],
+                    **answered
+                }
+            board_state = repair['state']
             
-            # Calculate average confidence
-            confidences = [data['confidence'] for data in piece_positions.values() 
-                          if isinstance(data, dict)]
-            avg_confidence = np.mean(confidences) if confidences else 0.0
+            # Generate FEN notation
+            fen = self.generate_fen_notation(board_state)
+            turns = possible_turns(board_state.labels)
             
-            return {
+            result = {
                 'success': True,
                 'fen': fen,
-                'confidence': round(avg_confidence, 3),
-                'piecesDetected': len(piece_positions),
+                'confidence': round(board_state.mean_confidence(), 3),
+                'piecesDetected': board_state.piece_count(),
                 'boardDetected': True,
-                'piecePositions': piece_positions
+                'piecePositions': board_state.to_positions(with_confidence=True),
+                'repairScore': round(repair['score'], 3),
+                'repairedSquares': len(repair['changes']),
+                'sideToMove': turns[0] if len(turns) == 1 else None,
+                'possibleSidesToMove': turns,
+                **answered
             }
+            # Degraded readings are not reused once the load has passed
+            if quality == 0:
+                fingerprints.store(fingerprint, result)
+            return dict(result)
             
         except Exception as e:
             print(f"Error processing image: {e}")
+            # A dead inference process, a failed model load or running out of
+            # memory says nothing about the image; it may succeed on a retry
             return {
                 'success': False,
                 'error': str(e),
                 'fen': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
                 'confidence': 0.0,
-                'boardDetected': False
+                'boardDetected': False,
+                'transient': True,
+                **answered
             }
 
 class ChessEngine:
     """Chess engine for move suggestions"""
     
-    def __init__(self):
+    def __init__(self, governor: ResourceGovernor):
+        self.governor = governor
         self.engine_path = self._find_stockfish()
+        # Supervised engines reused across requests, one per concurrent search
+        self._idle = queue.Queue()
+        self._supervisors: List[EngineSupervisor] = []
+        # Built-in search used when Stockfish is missing or failing
+        self.fallback = FallbackEngine()
         
     def _find_stockfish(self) -> Optional[str]:
-        """Find Stockfish engine on the system"""
-        possible_paths = [
-            "/usr/local/bin/stockfish",
-            "/usr/bin/stockfish",
-            "stockfish",
-            "C:\\stockfish\\stockfish.exe"
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path) or self._command_exists(path):
-                return path
-        
-        return None
+        """Find the fastest benchmarked Stockfish engine on the system"""
+        return find_engine()
+    
+    def _open_engine(self) -> chess.engine.SimpleEngine:
+        engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        engine.configure(self.governor.engine_options())
+        self.governor.pin_engine(engine)
+        return engine
     
-    def _command_exists(self, command: str) -> bool:
-        """Check if command exists in PATH"""
+    def _acquire(self) -> EngineSupervisor:
         try:
-            import subprocess
-            subprocess.run([command], capture_output=True, timeout=1)
-            return True
-        except:
-            return False
+            return self._idle.get_nowait()
+        except queue.Empty:
+            supervisor = EngineSupervisor(self._open_engine)
+            self._supervisors.append(supervisor)
+            return supervisor
     
-    def get_best_move(self, fen: str, time_limit: float = 1.0) -> Optional[str]:
+    def get_best_move(self, fen: str, time_limit: float = 1.0, threads: Optional[int] = None) -> Optional[str]:
         """Get best move suggestion for given position"""
         if not self.engine_path:
-            return self._get_random_legal_move(fen)
+            return self._get_fallback_move(fen, time_limit)
         
         try:
-            with chess.engine.SimpleEngine.popen_uci(self.engine_path) as engine:
-                board = chess.Board(fen)
-                if board.is_game_over():
-                    return None
-                
-                result = engine.play(board, chess.engine.Limit(time=time_limit))
-                return str(result.move)
+            board = chess.Board(fen)
+            if board.is_game_over():
+                return None
+            
+            # A hung engine is killed at the deadline and respawned with backoff
+            limit = chess.engine.Limit(time=time_limit)
+            options = {"Threads": threads} if threads else {}
+            supervisor = self._acquire()
+            try:
+                result = supervisor.call(lambda engine: engine.play(board, limit, options=options),
+                                         supervisor.deadline_for(time_limit))
+            finally:
+                self._idle.put(supervisor)
+            return str(result.move)
         except Exception as e:
             print(f"Engine error: {e}")
-            return self._get_random_legal_move(fen)
+            return self._get_fallback_move(fen, time_limit)
+    
+    def stats(self) -> Dict:
+        """Restart, timeout and latency stats of every pooled engine"""
+        return {
+            "engines": len(self._supervisors),
+            "perEngine": [supervisor.stats() for supervisor in self._supervisors]
+        }
     
-    def _get_random_legal_move(self, fen: str) -> Optional[str]:
-        """Get a random legal move as fallback"""
+    def warm_up(self, engines: int = 1):
+        """Start ``engines`` pooled engines before the first request needs one"""
+        if not self.engine_path:
+            # The built-in search allocates its tables on first use
+            self._get_fallback_move(chess.STARTING_FEN, 0.05)
+            return
+        supervisors = [self._acquire() for _ in range(engines)]
         try:
-            board = chess.Board(fen)
-            legal_moves = list(board.legal_moves)
-            if legal_moves:
-                import random
-                return str(random.choice(legal_moves))
-        except:
-            pass
-        return None
+            for supervisor in supervisors:
+                supervisor.call(lambda engine: engine.ping(), supervisor.ping_timeout, record=False)
+        finally:
+            for supervisor in supervisors:
+                self._idle.put(supervisor)
+    
+    def get_best_moves(self, fens: Dict[str, str], time_limit: float = 1.0) -> Dict[str, Optional[str]]:
+        """Search several positions at once, each on its own engine, within one time limit"""
+        if not fens:
+            return {}
+        # The searches share this worker's engine threads
+        threads = max(1, self.governor.engine_threads // len(fens))
+        with ThreadPoolExecutor(max_workers=len(fens)) as executor:
+            futures = {key: executor.submit(self.get_best_move, fen, time_limit, threads)
+                       for key, fen in fens.items()}
+            return {key: future.result() for key, future in futures.items()}
+    
+    def _get_fallback_move(self, fen: str, time_limit: float) -> Optional[str]:
+        """Get the built-in engine's best move within the same time limit"""
+        try:
+            move = self.fallback.search(chess.Board(fen), time_limit)["move"]
+            return str(move) if move else None
+        except ValueError:
+            return None
+
+class LiveSession:
+    """Tracking state of one live camera stream.
+
+    Unlike a stateless upload, a session keeps the board outline between
+    frames (re-detecting it every ``redetect_every`` frames), skips frames
+    while the board is static or covered with a motion gate, reuses the
+    reading of a visually unchanged board, and votes over several readings
+    before reporting a new FEN.
+    """
+    
+    def __init__(self, model: IntegratedChessVisionModel, redetect_every: int = 30,
+                 model_name: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        # Registry name of the detector, None for the default
+        self.model_name = model_name
+        self.redetect_every = redetect_every
+        self.stabilizer = FenStabilizer()
+        # Read the settled board until the stabilizer agrees, for a few noisy readings at most
+        self.motion_gate = MotionGate(confirm_frames=3 * self.stabilizer.stable_frames)
+        self.fingerprints = FingerprintCache()
+        self.last_active = time.monotonic()
+        self.frames = 0
+        self.dropped = 0
+        # Two connections may share a session id
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Forget the board, e.g. after the camera moved"""
+        self.board_contour = None
+        self.board_detected = None
+        self.contour_age = 0
+        self.fen = None
+        self.motion_gate.reset()
+        self.fingerprints.reset()
+        self.stabilizer.reset()
+    
+    def process(self, image: np.ndarray, quality: int = 0) -> List[Dict]:
+        """Process one frame at a quality level and return the messages it produces, usually none"""
+        with self.lock:
+            return self._process(image, quality)
+    
+    def _process(self, image: np.ndarray, quality: int) -> List[Dict]:
+        self.frames += 1
+        messages = []
+        frame = cv2.resize(image, (self.model.new_width, self.model.new_height))
+        level = self.model.levels[min(quality, len(self.model.levels) - 1)]
+        
+        # The board outline is kept between frames and refreshed now and
+        # then, unless the quality level skips the refresh
+        refresh = self.contour_age >= self.redetect_every and level.redetect_board
+        if self.board_contour is None or refresh:
+            contour = self.model.detect_chess_board(frame)
+            if contour is not None or self.board_contour is None:
+                if contour is not None and self.board_contour is not None:
+                    # A moved camera invalidates the gate's view of the board
+                    shift = np.abs(self.model.reorder(contour) - self.model.reorder(self.board_contour)).max()
+                    if shift > 10:
+                        self.motion_gate.reset()
+                        self.fingerprints.reset()
+                self.board_contour = contour
+            self.contour_age = 0
+        self.contour_age += 1
+        
+        detected = self.board_contour is not None
+        if detected != self.board_detected:
+            self.board_detected = detected
+            messages.append({"type": "board", "boardDetected": detected})
+        if not detected:
+            return messages
+        
+        warped = self.model.warp_chess_board(frame, self.board_contour, self.model.new_width, self.model.new_height)
+        if not self.motion_gate.should_detect(warped):
+            return messages
+        
+        fingerprint = self.fingerprints.fingerprint(self.motion_gate.previous)
+        reading = self.fingerprints.lookup(fingerprint)
+        if reading is None:
+            if self.motion_gate.burst_start:
+                self.stabilizer.clear_history()
+            start_x, start_y = self.model.localize_squares(warped)
+            board_state, answered = self.model.detect_chess_pieces(frame, start_x, start_y, quality, self.model_name)
+            # A short search: the session's frames wait behind it
+            repair = repair_position(board_state, max_nodes=LIVE_MAX_NODES)
+            if repair is None:
+                return messages
+            board_state = self.stabilizer.update(repair['state'])
+            # The burst goes on until the readings agree, not for a fixed count
+            if self.stabilizer.settled:
+                self.motion_gate.end_burst()
+            if board_state is None:
+                return messages
+            turns = possible_turns(board_state.labels)
+            reading = {
+                "fen": self.model.generate_fen_notation(board_state),
+                "confidence": round(board_state.mean_confidence(), 3),
+                "sideToMove": turns[0] if len(turns) == 1 else None,
+                "possibleSidesToMove": turns,
+                **answered
+            }
+            self.fingerprints.store(fingerprint, reading)
+        else:
+            self.motion_gate.end_burst()
+        
+        # Only changes are sent
+        if reading["fen"] != self.fen:
+            self.fen = reading["fen"]
+            messages.append(dict(reading, type="fen", qualityLevel=level.name))
+        return messages
+    
+    def suggest(self, engine: 'ChessEngine', fen: str, time_limit: float = 1.0) -> Dict:
+        """Best move for ``fen``, for every side that may be to move when that is unknown"""
+        board = chess.Board(fen)
+        turns = possible_turns(BoardState.from_fen(fen).labels)
+        if len(turns) > 1:
+            turn_fens = {}
+            for turn in turns:
+                turn_board = board.copy(stack=False)
+                turn_board.turn = turn == 'w'
+                turn_board.ep_square = None
+                turn_fens[turn] = turn_board.fen()
+            suggestions = engine.get_best_moves(turn_fens, time_limit)
+            return {"type": "suggestion", "fen": fen, "suggestedMove": suggestions.get('w' if board.turn else 'b'),
+                    "suggestions": suggestions}
+        return {"type": "suggestion", "fen": fen, "suggestedMove": engine.get_best_move(fen, time_limit),
+                "suggestions": None}
 
 # Initialize models
 model_path = os.getenv('CHESS_MODEL_PATH', 'best.pt')
-vision_model = IntegratedChessVisionModel(model_path)
-chess_engine = ChessEngine()
+fast_model_path = os.getenv('CHESS_FAST_MODEL_PATH') or None
+inference_paths = socket_paths(workers=INFERENCE_WORKERS)
+# Every training run's weights plus CHESS_MODELS, selectable per request;
+# with inference processes they load the models and this only resolves names
+model_registry = registry_from_env(model_path, fast_model_path)
+vision_model = IntegratedChessVisionModel(
+    model_registry, inference=InferenceClient(inference_paths) if INFERENCE_WORKERS else None
+)
+# Detection quality steps down when this worker misses its latency SLO,
+# see adaptive_quality.py
+quality_controller = QualityController(
+    vision_model.levels,
+    slo=float(os.getenv('CHESS_LATENCY_SLO_MS', '2000')) / 1000,
+    queue_high=int(os.getenv('CHESS_QUEUE_HIGH', str(max(2, 2 * governor.vision_threads)))),
+    # Requests waiting for a vision slot are part of the queue
+    backlog=vision_admission.queued
+)
+chess_engine = ChessEngine(governor)
+# Detection results of recent uploads; CHESS_RESULT_CACHE_DIR adds a tier
+# on disk shared by every worker
+result_cache = ResultCache(max_bytes=int(float(os.getenv('CHESS_RESULT_CACHE_MB', '64')) * 1024 * 1024),
+                           directory=os.getenv('CHESS_RESULT_CACHE_DIR') or None)
+# Live sessions by id; a client that reconnects with its id keeps its state
+# until the session has been idle for CHESS_SESSION_IDLE_SECONDS
+live_sessions: Dict[str, LiveSession] = {}
+SESSION_IDLE_SECONDS = float(os.getenv('CHESS_SESSION_IDLE_SECONDS', '120'))
+# Engines started by each worker before it reports ready
+ENGINE_POOL_SIZE = int(os.getenv('CHESS_ENGINE_POOL', '2'))
+
+# Startup steps /ready waits for. The vision warm-up runs in the parent
+# before the workers are forked, so they inherit it already done
+readiness: Dict[str, bool] = {"model": False, "warmup": False, "engine": False}
+startup_began = time.monotonic()
+
+def _mark_ready(step: str):
+    readiness[step] = True
+    if all(readiness.values()):
+        logger.info(f"Ready after {time.monotonic() - startup_began:.1f}s")
+
+def warm_up_vision():
+    """Run one inference at every quality level's input size on a blank frame.
+    
+    The first call at each size builds ultralytics' predictor and torch's
+    buffers for it, which the first real request would otherwise pay for.
+    With inference processes, each of them is warmed up in turn, since the
+    pooled connections would all reach the same one.
+    """
+    if not vision_model.model_loaded:
+        logger.error("No model to warm up; /ready stays unavailable")
+        return
+    frame = np.zeros((vision_model.new_height, vision_model.new_width, 3), np.uint8)
+    paths = vision_model.inference.paths if vision_model.inference is not None else [None]
+    try:
+        for quality, level in enumerate(vision_model.levels):
+            for path in paths:
+                started = time.perf_counter()
+                _, name, _ = vision_model.predict(frame, quality, path=path)
+                logger.info(f"Warmed up {name} at {level.imgsz}px{f' on {path}' if path else ''} "
+                            f"in {time.perf_counter() - started:.2f}s")
+            if quality == 0:
+                _mark_ready("model")
+    except Exception as e:
+        logger.error(f"Vision warm-up failed: {str(e)}", exc_info=True)
+        return
+    _mark_ready("warmup")
+
+def warm_up_engine():
+    try:
+        chess_engine.warm_up(ENGINE_POOL_SIZE)
+    except Exception as e:
+        # Suggestions fall back to the built-in search meanwhile
+        logger.warning(f"Could not pre-start the engine pool: {e}")
+    _mark_ready("engine")
+
+def warm_up():
+    if not readiness["warmup"]:
+        warm_up_vision()
+    warm_up_engine()
 
 @app.get("/")
 async def root():
     return {"message": "Chess Vision API is running"}
 
+@app.get("/ready")
+async def readiness_check():
+    """200 once the model is loaded and warmed up and the engine pool started, else 503"""
+    ready = all(readiness.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "checks": readiness, "uptime": round(time.monotonic() - startup_began, 1)}
+    )
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
-        "model_loaded": vision_model.model is not None,
+        "model_loaded": vision_model.model_loaded,
         "model_path": vision_model.model_path
     }
 
 @app.post("/api/detect-chess-position")
-async def detect_chess_position(image: UploadFile = File(...)):
+async def detect_chess_position(image: UploadFile = File(...), model: Optional[str] = None,
+                                priority: str = 'interactive'):
     try:
         logger.info(f"Received image: {image.filename}")
+        if model and model not in model_registry:
+            raise HTTPException(status_code=400,
+                                detail=f"Unknown model {model}; available: {', '.join(model_registry.names())}")
         
-        # Read image file
+        # Read image file and decode it off the event loop, JPEGs only at the
+        # reduced scale the 600x600 pipeline needs
         contents = await image.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
-        if img is None:
-            raise HTTPException(status_code=400, detail="Invalid image format")
+        # The same bytes through the same model and pipeline give the same answer
+        cache_key = await run_in_threadpool(result_cache.key, contents, *vision_model.cache_signature(model))
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached detection result")
+            status_code, body = cached.split(b" ", 1)
+            return Response(content=body, status_code=int(status_code), media_type="application/json")
         
-        logger.info("Processing image with vision model")
-        # Process image using the vision model
-        result = vision_model.process_image(img)
+        # Bulk clients (?priority=bulk) yield vision slots to one-off uploads
+        async with vision_admission.slot(lane(priority)):
+            with quality_controller.track() as quality:
+                img = await run_in_threadpool(decode_image, contents,
+                                              (vision_model.new_width, vision_model.new_height))
+                
+                if img is None:
+                    raise HTTPException(status_code=400, detail="Invalid image format")
+                
+                logger.info("Processing image with vision model")
+                # Process image using the vision model, off the event loop
+                result = await run_in_threadpool(vision_model.process_image, img, quality, model)
+        quality_level = vision_model.levels[quality].name
         
         if not result['success']:
             logger.warning(f"Image processing failed: {result.get('error', 'Unknown error')}")
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=400,
                 content={
                     "success": False,
                     "error": result.get('error', 'Failed to process image'),
                     "fen": result.get('fen', ''),
-                    "confidence": result.get('confidence', 0.0)
+                    "confidence": result.get('confidence', 0.0),
+                    "model": result.get('model'),
+                    "modelVersion": result.get('modelVersion'),
+                    "qualityLevel": quality_level
                 }
             )
+        else:
+            logger.info(f"Successfully processed image. FEN: {result['fen']}")
+            response = JSONResponse(content=dict(result, qualityLevel=quality_level))
         
-        logger.info(f"Successfully processed image. FEN: {result['fen']}")
-        return JSONResponse(content=result)
+        # Stored as "<status> <body>" so a hit is returned without
+        # re-serializing; only full-quality results and failures that the
+        # image itself caused are worth reusing
+        if quality == 0 and not result.get('transient'):
+            result_cache.put(cache_key, b"%d %s" % (response.status_code, response.body))
+        return response
         
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         logger.error(f"Error processing image: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -392,43 +874,88 @@ async def analyze_position(request: dict):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid FEN notation")
         
-        # Get analysis
-        suggested_move = chess_engine.get_best_move(fen, time_limit=2.0)
+        # Reject boards python-chess parses but no game can reach
+        violations = find_violations(BoardState.from_fen(fen).labels)
+        if violations:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Implausible position: {', '.join(reason for reason, _ in violations)}"
+            )
         
-        # Get position evaluation
-        evaluation = await get_position_evaluation(fen)
+        # Clear castling rights the king and rook squares rule out, inferring
+        # them from the home squares when only the placement was given
+        placement_only = len(fen.split()) == 1
+        if placement_only:
+            board.castling_rights = chess.BB_CORNERS
+        board.castling_rights = board.clean_castling_rights()
+        fen = board.fen()
         
-        return JSONResponse({
+        # The static evaluation takes microseconds and never waits for an engine
+        evaluation = await get_position_evaluation(fen)
+        analysis = {
             "success": True,
             "fen": fen,
-            "suggestedMove": suggested_move,
             "evaluation": evaluation,
             "isGameOver": board.is_game_over(),
             "legalMoves": [str(move) for move in board.legal_moves]
-        })
+        }
         
-    except HTTPException:
+        async def search() -> Dict:
+            async with engine_admission.slot(lane(request.get('priority'))):
+                return await search_position()
+        
+        async def search_position() -> Dict:
+            # Get analysis; without a known side to move, search every side that
+            # can be to move in parallel and answer for each of them
+            suggestions = None
+            if placement_only or request.get('sideToMove') == 'unknown':
+                turn_fens = {}
+                for turn in possible_turns(BoardState.from_fen(fen).labels):
+                    turn_board = board.copy(stack=False)
+                    turn_board.turn = turn == 'w'
+                    turn_board.ep_square = None
+                    turn_fens[turn] = turn_board.fen()
+                suggestions = await run_in_threadpool(chess_engine.get_best_moves, turn_fens, 2.0)
+                suggested_move = suggestions.get('w' if board.turn else 'b')
+            else:
+                suggested_move = await run_in_threadpool(chess_engine.get_best_move, fen, 2.0)
+            return {"suggestedMove": suggested_move, "suggestions": suggestions}
+        
+        # Streaming clients get the evaluation at once and the engine's move
+        # as a second NDJSON line when the search ends
+        if request.get('stream'):
+            async def lines():
+                yield json.dumps(dict(analysis, type="evaluation")) + "\n"
+                try:
+                    yield json.dumps(dict(await search(), type="engine")) + "\n"
+                except AdmissionRejected as e:
+                    yield json.dumps({"type": "engine", "success": False, "error": f"Server busy: {e}",
+                                      "retryAfter": e.retry_after}) + "\n"
+                except Exception as e:
+                    logger.error(f"Error searching position: {str(e)}", exc_info=True)
+                    yield json.dumps({"type": "engine", "success": False, "error": str(e)}) + "\n"
+            
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+        
+        return JSONResponse({**analysis, **await search()})
+        
+    except (HTTPException, AdmissionRejected):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing position: {str(e)}")
 
 async def get_position_evaluation(fen: str) -> Dict:
-    """Get detailed position evaluation"""
+    """Get detailed position evaluation from bitboard popcounts"""
     try:
         board = chess.Board(fen)
-        
-        # Basic material count
-        material_balance = 0
-        piece_values = {'p': 1, 'n': 3, 'b': 3, 'r': 5, 'q': 9, 'k': 0}
-        
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                value = piece_values.get(piece.symbol().lower(), 0)
-                material_balance += value if piece.color else -value
+        static = static_evaluate(board)
         
         return {
-            "materialBalance": material_balance,
+            "score": static["score"],
+            "materialBalance": round((static["white"]["material"] - static["black"]["material"]) / 100),
+            "phase": static["phase"],
+            "white": _camel_case(static["white"]),
+            "black": _camel_case(static["black"]),
             "whiteToMove": board.turn,
             "canCastle": {
                 "whiteKingside": board.has_kingside_castling_rights(chess.WHITE),
@@ -442,15 +969,265 @@ async def get_position_evaluation(fen: str) -> Dict:
     except:
         return {"error": "Could not evaluate position"}
 
+def _camel_case(terms: Dict) -> Dict:
+    return {re.sub(r"_(\w)", lambda match: match.group(1).upper(), key): value for key, value in terms.items()}
+
+def _evict_idle_sessions():
+    now = time.monotonic()
+    for session_id, session in list(live_sessions.items()):
+        if now - session.last_active > SESSION_IDLE_SECONDS:
+            logger.info(f"Evicting idle live session {session_id}")
+            live_sessions.pop(session_id, None)
+
+async def _evict_idle_sessions_periodically():
+    # Sessions of clients that never come back are freed without waiting for a new connection
+    while True:
+        await asyncio.sleep(max(1.0, SESSION_IDLE_SECONDS / 4))
+        _evict_idle_sessions()
+
+def _decode_frame(data: bytes, frame_format: str, width: int, height: int) -> Optional[np.ndarray]:
+    """Decode one streamed frame: an encoded image, or raw RGBA/BGR pixels"""
+    if frame_format == 'encoded':
+        return decode_image(data, (vision_model.new_width, vision_model.new_height))
+    channels = 4 if frame_format == 'rgba' else 3
+    if len(data) != width * height * channels:
+        return None
+    pixels = np.frombuffer(data, np.uint8).reshape(height, width, channels)
+    return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR) if channels == 4 else pixels
+
+@app.websocket("/api/live")
+async def live_feed(websocket: WebSocket):
+    """Stream camera frames and receive FEN changes and suggested moves.
+    
+    Frames are binary messages: JPEG/PNG by default, or raw pixels with
+    ``?format=rgba|bgr&width=W&height=H``; ``?model=<name>`` selects the
+    detector. The server answers with JSON
+    messages of type "session", "board", "fen", "suggestion" and "error";
+    the text message {"type": "reset"} forgets the board. When frames
+    arrive faster than they are processed only the latest one is kept.
+    """
+    params = websocket.query_params
+    frame_format = params.get('format', 'encoded')
+    if frame_format not in ('encoded', 'rgba', 'bgr'):
+        await websocket.close(code=1003, reason="format must be encoded, rgba or bgr")
+        return
+    try:
+        width, height = int(params.get('width', 0)), int(params.get('height', 0))
+    except ValueError:
+        await websocket.close(code=1003, reason="width and height must be integers")
+        return
+    model_name = params.get('model') or None
+    if model_name and model_name not in model_registry:
+        await websocket.close(code=1003, reason=f"unknown model {model_name}")
+        return
+    
+    await websocket.accept()
+    _evict_idle_sessions()
+    session = live_sessions.get(params.get('session', ''))
+    if session is None:
+        session = LiveSession(vision_model, model_name=model_name)
+        live_sessions[session.id] = session
+    elif model_name and model_name != session.model_name:
+        # Readings of another model are not comparable
+        session.model_name = model_name
+        session.reset()
+    session.last_active = time.monotonic()
+    await websocket.send_json({"type": "session", "sessionId": session.id})
+    
+    client = client_key(websocket.scope)
+    latest: List[Optional[bytes]] = [None]
+    frame_ready = asyncio.Event()
+    send_lock = asyncio.Lock()
+    suggestion_task: Optional[asyncio.Task] = None
+    
+    async def send(message: Dict):
+        async with send_lock:
+            await websocket.send_json(message)
+    
+    async def suggest(fen: str):
+        try:
+            async with engine_admission.slot(BULK):
+                message = await run_in_threadpool(session.suggest, chess_engine, fen)
+        except AdmissionRejected as e:
+            await send({"type": "error", "error": f"Server busy: {e}", "retryAfter": e.retry_after})
+            return
+        # A newer board makes the suggestion stale
+        if session.fen == fen:
+            await send(message)
+    
+    async def process():
+        nonlocal suggestion_task
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            data, latest[0] = latest[0], None
+            if data is None:
+                continue
+            # Frames over the client's rate, or that find the vision slots
+            # taken, are dropped; the stream goes on with the next one
+            if live_frame_rate.check(client):
+                session.dropped += 1
+                continue
+            try:
+                async with vision_admission.slot(BULK):
+                    image = await run_in_threadpool(_decode_frame, data, frame_format, width, height)
+                    if image is None:
+                        await send({"type": "error", "error": "Could not decode frame"})
+                        continue
+                    with quality_controller.track() as quality:
+                        messages = await run_in_threadpool(session.process, image, quality)
+            except AdmissionRejected:
+                session.dropped += 1
+                continue
+            except Exception as e:
+                logger.error(f"Error processing live frame: {str(e)}", exc_info=True)
+                await send({"type": "error", "error": str(e)})
+                continue
+            for message in messages:
+                await send(message)
+                if message["type"] == "fen":
+                    if suggestion_task is not None:
+                        suggestion_task.cancel()
+                    suggestion_task = asyncio.create_task(suggest(message["fen"]))
+    
+    processor = asyncio.create_task(process())
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout=SESSION_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.close(code=1001, reason="idle")
+                break
+            if message["type"] == "websocket.disconnect":
+                break
+            session.last_active = time.monotonic()
+            if message.get("bytes") is not None:
+                # Latest frame wins: an unprocessed older frame is dropped
+                if latest[0] is not None:
+                    session.dropped += 1
+                latest[0] = message["bytes"]
+                frame_ready.set()
+            elif message.get("text"):
+                try:
+                    command = json.loads(message["text"])
+                except ValueError:
+                    command = {}
+                if command.get("type") == "reset":
+                    session.reset()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        processor.cancel()
+        if suggestion_task is not None:
+            suggestion_task.cancel()
+        session.last_active = time.monotonic()
+
+# Raw-frame fast path for clients on this machine, see local_ipc.py
+local_server: Optional[LocalFrameServer] = None
+session_evictor: Optional[asyncio.Task] = None
+
+def detect_local_frame(image: np.ndarray, requested_quality: int = 0, model: Optional[str] = None) -> Dict:
+    if model and model not in model_registry:
+        return {"success": False, "error": f"Unknown model {model}"}
+    # The client may ask for less than the load allows, never for more
+    with quality_controller.track() as quality:
+        quality = min(max(quality, requested_quality), len(vision_model.levels) - 1)
+        result = vision_model.process_image(image, quality, model)
+    return dict(result, qualityLevel=vision_model.levels[quality].name)
+
+def live_local_frame(session: LiveSession, image: np.ndarray) -> Dict:
+    with quality_controller.track() as quality:
+        return {"messages": session.process(image, quality)}
+
+@app.on_event("startup")
+async def start_worker():
+    # Threads do not survive a fork, so every worker starts its own
+    if not INFERENCE_WORKERS:
+        model_registry.watch()
+    # /ready reports 503 until the warm-up is done; /health answers meanwhile
+    threading.Thread(target=warm_up, daemon=True).start()
+
+@app.on_event("startup")
+async def start_session_evictor():
+    global session_evictor
+    session_evictor = asyncio.create_task(_evict_idle_sessions_periodically())
+
+@app.on_event("startup")
+async def start_local_server():
+    global local_server
+    socket_path = os.getenv('CHESS_IPC_SOCKET')
+    if not socket_path:
+        return
+    try:
+        local_server = LocalFrameServer(
+            socket_path,
+            detect=detect_local_frame,
+            live=live_local_frame,
+            session_factory=lambda: LiveSession(vision_model)
+        ).start()
+        logger.info(f"Serving raw frames on {socket_path}")
+    except OSError as e:
+        # Another worker already serves the socket, or no Unix sockets here
+        logger.warning(f"Could not serve raw frames on {socket_path}: {e}")
+
+@app.on_event("shutdown")
+async def stop_local_server():
+    if local_server is not None:
+        local_server.close()
+    if session_evictor is not None:
+        session_evictor.cancel()
+    model_registry.stop()
+    if vision_model.inference is not None:
+        # Frees this worker's shared memory frame buffers
+        vision_model.inference.close()
+
+@app.get("/api/models")
+async def list_models():
+    """Models that can be selected with the ``model`` parameter"""
+    return {
+        "default": model_registry.default,
+        "models": {
+            name: {
+                "path": entry.path,
+                "available": model_registry.available(name),
+                "resident": name in model_registry.resident,
+                "version": version_label(model_registry.current_version(name))
+            }
+            for name, entry in sorted(model_registry.entries.items())
+        }
+    }
+
 @app.get("/api/engine-info")
 async def get_engine_info():
     """Get information about the chess engine and model"""
     return {
         "engineAvailable": chess_engine.engine_path is not None,
         "enginePath": chess_engine.engine_path,
-        "modelLoaded": vision_model.model is not None,
+        "engineName": "stockfish" if chess_engine.engine_path else "builtin",
+        "engineStats": chess_engine.stats(),
+        "resultCache": result_cache.stats(),
+        "liveSessions": len(live_sessions),
+        "quality": quality_controller.stats(),
+        "admission": {
+            "vision": vision_admission.stats(),
+            "engine": engine_admission.stats(),
+            "rateLimits": {
+                "vision": vision_rate.stats(),
+                "engine": engine_rate.stats(),
+                "liveFrames": live_frame_rate.stats()
+            }
+        },
+        "modelLoaded": vision_model.model_loaded,
+        "models": model_registry.stats(),
         "modelPath": model_path,
-        "classNames": vision_model.classNames
+        "classNames": vision_model.classNames,
+        "resources": {
+            "workers": governor.processes,
+            "visionThreads": governor.vision_threads,
+            "engineThreads": governor.engine_threads,
+            "engineHashMb": governor.engine_hash_mb,
+            "pinCores": governor.pin_cores
+        }
     }
 
 if __name__ == "__main__":
@@ -460,12 +1237,20 @@ if __name__ == "__main__":
     print("API documentation at: http://localhost:8000/docs")
     print(f"Model path: {vision_model.model_path}")
     
-    # Start the server with proper configuration
-    uvicorn.run(
-        "backend_server:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,  # Enable hot reloading
-        workers=4,    # Use multiple workers for better performance
-        log_level="info"
-    )
+    # One model copy per inference process instead of one per API worker
+    if INFERENCE_WORKERS:
+        inference_threads = max(1, len(governor.vision_cores) // INFERENCE_WORKERS)
+        start_servers(model_path, inference_paths, inference_threads, fast_model_path)
+        print(f"Inference: {INFERENCE_WORKERS} process(es) with {inference_threads} thread(s) each")
+    
+    if os.getenv('CHESS_RELOAD'):
+        # Development: restart on code changes, one worker
+        uvicorn.run("backend_server:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    else:
+        # Warm up once here, then fork the workers (sized together with the
+        # thread budgets) so they share the loaded model copy-on-write
+        warm_up_vision()
+        if vision_model.inference is not None:
+            # Connections and frame buffers must not be shared with the workers
+            vision_model.inference.close()
+        serve_prefork(app, host="0.0.0.0", port=8000, workers=governor.processes, log_level="info")
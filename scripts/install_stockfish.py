@@ -4,6 +4,12 @@ import subprocess
 import urllib.request
 import zipfile
 import tarfile
+import sys
+from pathlib import Path
+
+# Shared modules live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from engine_provisioning import build_engine, benchmark_engines
 
 def install_stockfish():
     """Install Stockfish chess engine"""
@@ -73,24 +79,15 @@ def install_stockfish_windows():
         print(f"Failed to download Stockfish: {e}")
 
 def install_stockfish_from_source():
-    """Install Stockfish from source (Linux fallback)"""
-    print("Installing Stockfish from source...")
+    """Build the bundled Stockfish sources for this CPU (Linux fallback)"""
+    print("Building Stockfish from the bundled sources...")
     
-    try:
-        # Clone repository
-        subprocess.run(["git", "clone", "https://github.com/official-stockfish/Stockfish.git"], check=True)
-        
-        # Build
-        os.chdir("Stockfish/src")
-        subprocess.run(["make", "build", "ARCH=x86-64"], check=True)
-        
-        # Copy to system path
-        subprocess.run(["sudo", "cp", "stockfish", "/usr/local/bin/"], check=True)
-        
-        print("Stockfish built and installed successfully")
-        
-    except Exception as e:
-        print(f"Failed to build Stockfish from source: {e}")
+    path = build_engine()
+    if path:
+        nps = benchmark_engines([path]).get(path)
+        print(f"Stockfish built at {path} ({nps or 'unknown'} nodes/second)")
+    else:
+        print("Failed to build Stockfish from source")
 
 if __name__ == "__main__":
     install_stockfish()
@@ -7,9 +7,14 @@ import torchvision.transforms as transforms
 from PIL import Image
 import numpy as np
 import cv2
-from typing import List, Dict, Tuple
+from typing import Tuple
 from ultralytics import YOLO
 import os
+import sys
+
+# Shared vision/chess modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from board_state import BoardState
 
 class ChessVisionModel:
     def __init__(self, model_path: str = "best.pt"):
@@ -29,8 +34,16 @@ class ChessVisionModel:
             'white_king', 'white_queen', 'white_rook', 'white_bishop', 'white_knight', 'white_pawn',
             'black_king', 'black_queen', 'black_rook', 'black_bishop', 'black_knight', 'black_pawn'
         ]
+        
+        # FEN symbol for each class name
+        self.class_symbols = {
+            'white_king': 'K', 'white_queen': 'Q', 'white_rook': 'R',
+            'white_bishop': 'B', 'white_knight': 'N', 'white_pawn': 'P',
+            'black_king': 'k', 'black_queen': 'q', 'black_rook': 'r',
+            'black_bishop': 'b', 'black_knight': 'n', 'black_pawn': 'p'
+        }
     
-    def detect_pieces(self, image: np.ndarray) -> List[Dict]:
+    def detect_pieces(self, image: np.ndarray) -> BoardState:
         """
         Detect chess pieces in the image using YOLO model
         
@@ -38,27 +51,20 @@ class ChessVisionModel:
             image: Input image as numpy array (BGR format)
             
         Returns:
-            List of detected pieces with format:
-            [
-                {
-                    'piece': 'white_king',
-                    'row': 7,
-                    'col': 4,
-                    'confidence': 0.95,
-                    'bbox': [x1, y1, x2, y2]
-                },
-                ...
-            ]
+            BoardState with the detected piece and its confidence per square.
+            Row 0 is the top of the image (rank 8), so (row, col) maps
+            directly to the square's FEN index. The most confident piece
+            wins a square; the others are kept as its candidates.
         """
+        board_state = BoardState()
         if self.model is None:
-            print("Model not loaded, returning empty list")
-            return []
+            print("Model not loaded, returning empty board")
+            return board_state
         
         try:
             # Run YOLO inference
             results = self.model(image)
             
-            detections = []
             for result in results:
                 boxes = result.boxes
                 if boxes is not None:
@@ -74,19 +80,17 @@ class ChessVisionModel:
                                 (x1 + x2) / 2, (y1 + y2) / 2, image.shape
                             )
                             
-                            detections.append({
-                                'piece': self.class_names[class_id],
-                                'row': row,
-                                'col': col,
-                                'confidence': float(confidence),
-                                'bbox': [float(x1), float(y1), float(x2), float(y2)]
-                            })
+                            board_state.set_piece(
+                                row * 8 + col,
+                                self.class_symbols[self.class_names[class_id]],
+                                float(confidence)
+                            )
             
-            return detections
+            return board_state
             
         except Exception as e:
             print(f"Error during inference: {e}")
-            return []
+            return BoardState()
     
     def _pixel_to_board_coords(self, x: float, y: float, image_shape: Tuple[int, int, int]) -> Tuple[int, int]:
         """Convert pixel coordinates to board square coordinates"""
@@ -0,0 +1,169 @@
+"""
+Speculative analysis of the likely next positions.
+
+While a player is thinking the live position is known, and the reply they
+play is usually one of the engine's top candidates. A short multipv search
+of the current position picks those candidates; each resulting position is
+then analysed in the background on spare cores and kept in a small cache,
+so a suggestion for the position the camera sees next is often ready
+before it is detected.
+"""
+
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import chess
+import chess.engine
+
+
+class SpeculativeAnalyzer:
+    """Analyses the top candidate replies of a position ahead of time"""
+
+    def __init__(self, engine_path, candidates=3, candidate_time=0.3, time_limit=1.0,
+                 workers=None, cache_size=512, hash_mb=64, governor=None):
+        self.engine_path = engine_path
+        self.candidates = candidates
+        self.candidate_time = candidate_time
+        self.time_limit = time_limit
+        if workers is None and governor is not None:
+            # The governor's engine threads less the half the main engine keeps
+            workers = governor.engine_threads - max(1, governor.engine_threads // 2)
+        # Without a governor, leave two cores to the main engine
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 2)
+        self.cache_size = cache_size
+        self.hash_mb = hash_mb
+        # Optional ResourceGovernor that pins the engines to its engine cores
+        self.governor = governor
+
+        self.cache = OrderedDict()
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._engines = queue.Queue()
+        self._engine_count = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    @staticmethod
+    def key(board):
+        # Placement, turn, castling and en passant; the move clocks do not matter
+        return board.epd()
+
+    def lookup(self, board):
+        """Return the cached analysis of a position, or None"""
+        with self._lock:
+            entry = self.cache.get(self.key(board))
+            if entry is None:
+                return None
+            self.cache.move_to_end(self.key(board))
+        return dict(entry, fen=board.fen())
+
+    def speculate(self, board):
+        """Start analysing the likely replies to ``board``, dropping older speculation"""
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+        if not board.is_game_over():
+            self._executor.submit(self._speculate, board.copy(stack=False), generation)
+
+    def _speculate(self, board, generation):
+        if generation != self.generation:
+            return
+        infos = self._analyse(board, chess.engine.Limit(time=self.candidate_time), self.candidates)
+        if infos:
+            self._store(board, infos[0])
+
+        for info in infos:
+            pv = info.get("pv")
+            if not pv:
+                continue
+            reply = board.copy(stack=False)
+            reply.push(pv[0])
+            if not reply.is_game_over() and self.lookup(reply) is None:
+                self._executor.submit(self._analyse_reply, reply, generation)
+
+    def _analyse_reply(self, board, generation):
+        # Replies queued for a position that has already been left are stale
+        if generation != self.generation:
+            return
+        infos = self._analyse(board, chess.engine.Limit(time=self.time_limit))
+        if infos:
+            self._store(board, infos[0])
+
+    def _store(self, board, info):
+        pv = info.get("pv")
+        if not pv:
+            return
+        key = self.key(board)
+        with self._lock:
+            previous = self.cache.get(key)
+            if previous is not None and previous["depth"] > info.get("depth", 0):
+                return
+            self.cache[key] = {
+                "move": pv[0],
+                "score": info.get("score"),
+                "depth": info.get("depth", 0),
+                "pv": pv
+            }
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def _acquire(self):
+        try:
+            return self._engines.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            start = self._engine_count < self.workers
+            if start:
+                self._engine_count += 1
+        if not start:
+            # Every task holds at most one engine, so one is returned soon
+            return self._engines.get()
+
+        try:
+            engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+            engine.configure({"Threads": 1, "Hash": self.hash_mb})
+            if self.governor is not None:
+                self.governor.pin_engine(engine)
+            return engine
+        except Exception:
+            with self._lock:
+                self._engine_count -= 1
+            raise
+
+    def _analyse(self, board, limit, multipv=1):
+        try:
+            engine = self._acquire()
+        except Exception as e:
+            print(f"Error starting speculative engine: {e}")
+            return []
+
+        try:
+            infos = engine.analyse(board, limit, multipv=multipv)
+        except Exception as e:
+            print(f"Error in speculative analysis: {e}")
+            try:
+                engine.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._engine_count -= 1
+            return []
+
+        self._engines.put(engine)
+        return infos
+
+    def close(self):
+        with self._lock:
+            self.generation += 1
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        while not self._engines.empty():
+            try:
+                self._engines.get_nowait().quit()
+            except Exception:
+                pass
+        self._engine_count = 0
@@ -0,0 +1,156 @@
+"""
+Static evaluation from python-chess bitboards.
+
+A handful of popcounts over piece masks gives material, mobility, pawn
+structure (doubled, isolated and passed pawns), king safety and the game
+phase in well under a millisecond, so an evaluation can be returned while
+the engine is still searching or when no engine is free at all.
+"""
+
+import chess
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500, chess.QUEEN: 900}
+
+# Phase weight of each piece; 24 with every minor and major piece on the board
+PHASE_WEIGHTS = {chess.KNIGHT: 1, chess.BISHOP: 1, chess.ROOK: 2, chess.QUEEN: 4}
+MAX_PHASE = 24
+
+# Centipawns per attacked square (mobility) and per pawn-structure feature
+MOBILITY_WEIGHTS = {chess.KNIGHT: 4, chess.BISHOP: 5, chess.ROOK: 2, chess.QUEEN: 1}
+DOUBLED_PAWN = -15
+ISOLATED_PAWN = -12
+# Passed pawn bonus by rank counted from the pawn's own side, middlegame and endgame
+PASSED_PAWN = [(0, 0), (5, 10), (10, 20), (15, 35), (25, 60), (40, 100), (60, 150), (0, 0)]
+SHIELD_PAWN = 12
+KING_ZONE_ATTACK = -8
+
+
+def _adjacent_files(file_index):
+    mask = 0
+    for index in (file_index - 1, file_index + 1):
+        if 0 <= index < 8:
+            mask |= chess.BB_FILES[index]
+    return mask
+
+
+_ADJACENT_FILES = [_adjacent_files(index) for index in range(8)]
+
+
+def _ranks_ahead(color, rank):
+    ranks = range(rank + 1, 8) if color else range(rank)
+    mask = 0
+    for index in ranks:
+        mask |= chess.BB_RANKS[index]
+    return mask
+
+
+# Squares in front of a pawn, on its own and the adjacent files, that no enemy pawn may hold
+_PASSED_MASKS = {
+    color: [(chess.BB_FILES[chess.square_file(square)] | _ADJACENT_FILES[chess.square_file(square)])
+            & _ranks_ahead(color, chess.square_rank(square))
+            for square in chess.SQUARES]
+    for color in chess.COLORS
+}
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+def game_phase(board):
+    """Remaining non-pawn material as a fraction: 1.0 in the opening, 0.0 in a pawn ending"""
+    phase = sum(weight * _popcount(board.pieces_mask(piece_type, chess.WHITE) | board.pieces_mask(piece_type, chess.BLACK))
+                for piece_type, weight in PHASE_WEIGHTS.items())
+    return min(phase, MAX_PHASE) / MAX_PHASE
+
+
+def material(board, color):
+    """Material of ``color`` in centipawns"""
+    return sum(value * _popcount(board.pieces_mask(piece_type, color)) for piece_type, value in PIECE_VALUES.items())
+
+
+def mobility(board, color):
+    """Weighted count of squares the pieces of ``color`` attack that are not their own"""
+    own = board.occupied_co[color]
+    return sum(weight * _popcount(board.attacks_mask(square) & ~own)
+               for piece_type, weight in MOBILITY_WEIGHTS.items()
+               for square in chess.scan_forward(board.pieces_mask(piece_type, color)))
+
+
+def pawn_structure(board, color):
+    """Doubled, isolated and passed pawn counts of ``color``"""
+    pawns = board.pieces_mask(chess.PAWN, color)
+    enemy_pawns = board.pieces_mask(chess.PAWN, not color)
+    doubled = isolated = 0
+    for file_index, file_mask in enumerate(chess.BB_FILES):
+        count = _popcount(pawns & file_mask)
+        if count:
+            doubled += count - 1
+            if not pawns & _ADJACENT_FILES[file_index]:
+                isolated += count
+
+    passed = [square for square in chess.scan_forward(pawns) if not enemy_pawns & _PASSED_MASKS[color][square]]
+    return {"doubled": doubled, "isolated": isolated, "passed": passed}
+
+
+def king_safety(board, color):
+    """Pawn shield in front of the king of ``color`` and enemy attacks on the squares around it"""
+    king = board.king(color)
+    if king is None:
+        return {"shield": 0, "attacks": 0}
+    zone = chess.BB_KING_ATTACKS[king] | chess.BB_SQUARES[king]
+    rank = chess.square_rank(king)
+    shield_ranks = _ranks_ahead(color, rank) & ~_ranks_ahead(color, rank + 2 if color else rank - 2)
+    shield_files = chess.BB_FILES[chess.square_file(king)] | _ADJACENT_FILES[chess.square_file(king)]
+    shield = _popcount(board.pieces_mask(chess.PAWN, color) & shield_ranks & shield_files)
+
+    enemy = not color
+    attacks = sum(_popcount(board.attacks_mask(square) & zone)
+                  for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)
+                  for square in chess.scan_forward(board.pieces_mask(piece_type, enemy)))
+    return {"shield": shield, "attacks": attacks}
+
+
+def evaluate(board):
+    """Static evaluation of ``board`` with its terms for both sides.
+
+    ``score`` is in centipawns from white's point of view; middlegame terms
+    (king safety) fade and passed pawns grow as the ``phase`` goes to 0.
+    """
+    phase = game_phase(board)
+    terms = {}
+    score = 0
+    for color in chess.COLORS:
+        side_material = material(board, color)
+        side_mobility = mobility(board, color)
+        pawns = pawn_structure(board, color)
+        king = king_safety(board, color)
+
+        passed_bonus = 0
+        for square in pawns["passed"]:
+            relative_rank = chess.square_rank(square) if color else 7 - chess.square_rank(square)
+            middlegame, endgame = PASSED_PAWN[relative_rank]
+            passed_bonus += round(phase * middlegame + (1 - phase) * endgame)
+        pawn_score = DOUBLED_PAWN * pawns["doubled"] + ISOLATED_PAWN * pawns["isolated"] + passed_bonus
+        king_score = round(phase * (SHIELD_PAWN * king["shield"] + KING_ZONE_ATTACK * king["attacks"]))
+
+        side_score = side_material + side_mobility + pawn_score + king_score
+        score += side_score if color else -side_score
+        terms[color] = {
+            "material": side_material,
+            "mobility": side_mobility,
+            "doubled_pawns": pawns["doubled"],
+            "isolated_pawns": pawns["isolated"],
+            "passed_pawns": [chess.square_name(square) for square in pawns["passed"]],
+            "pawn_structure": pawn_score,
+            "king_shield": king["shield"],
+            "king_zone_attacks": king["attacks"],
+            "king_safety": king_score,
+        }
+
+    return {
+        "score": score,
+        "phase": round(phase, 3),
+        "white": terms[chess.WHITE],
+        "black": terms[chess.BLACK],
+    }
@@ -0,0 +1,76 @@
+import pytest
+
+import adaptive_quality
+from adaptive_quality import DEFAULT_LEVELS, QualityController, quality_levels
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(adaptive_quality.time, "monotonic", clock)
+    return clock
+
+
+def detect(controller, clock, seconds):
+    with controller.track() as level:
+        clock.now += seconds
+    return level
+
+
+def test_slow_detections_step_down_and_fast_ones_recover(clock):
+    controller = QualityController(slo=1.0, min_samples=4, down_hold=1.0, up_hold=10.0)
+    for _ in range(4):
+        detect(controller, clock, 2.0)
+    assert controller.name == "reduced"
+    # Samples of the old level were forgotten, so it takes new slow ones
+    for _ in range(3):
+        detect(controller, clock, 2.0)
+    assert controller.level == 1
+    detect(controller, clock, 2.0)
+    assert controller.level == 2
+
+    # Fast answers only bring it back after the longer hold
+    for _ in range(4):
+        detect(controller, clock, 0.1)
+    assert controller.level == 2
+    clock.now += 10
+    detect(controller, clock, 0.1)
+    assert controller.level == 1 and controller.stats()["changes"] == 3
+
+
+def test_queue_depth_steps_down_before_any_answer(clock):
+    controller = QualityController(queue_high=3, down_hold=0.0)
+    tracks = [controller.track() for _ in range(3)]
+    levels = [track.__enter__() for track in tracks]
+    assert levels == [0, 0, 1]
+    for track in tracks:
+        track.__exit__(None, None, None)
+    assert controller.in_flight == 0
+
+
+def test_backlog_counts_as_in_flight(clock):
+    controller = QualityController(queue_high=4, backlog=lambda: 3)
+    assert detect(controller, clock, 0.1) == 1
+
+
+def test_lowest_level_is_kept(clock):
+    controller = QualityController(slo=0.5, min_samples=1, down_hold=0.0)
+    for _ in range(10):
+        detect(controller, clock, 1.0)
+    assert controller.level == len(DEFAULT_LEVELS) - 1
+
+
+def test_quality_levels_from_json():
+    levels = quality_levels('[{"name": "full"}, {"imgsz": 320, "fast_model": true}]')
+    assert [level.name for level in levels] == ["full", "level1"]
+    assert levels[1].imgsz == 320 and levels[1].fast_model and levels[1].redetect_board
+    assert quality_levels("not json") == DEFAULT_LEVELS
+    assert quality_levels("[]") == DEFAULT_LEVELS
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import admission_control
+from admission_control import BULK, INTERACTIVE, AdmissionRejected, PriorityLimiter, RateLimiter, TokenBucket, forwarded_client
+
+
+def test_token_bucket_refills_at_rate_up_to_burst():
+    bucket = TokenBucket(rate=2, burst=3)
+    now = bucket.updated
+    assert [bucket.take(now) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(now) == pytest.approx(0.5)
+    # Half a second buys one token back
+    assert bucket.take(now + 0.5) == 0
+    # A long pause refills to the burst, not beyond
+    later = now + 60
+    assert [bucket.take(later) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(later) > 0
+
+
+def test_rate_limiter_keeps_clients_apart(monkeypatch):
+    monkeypatch.setattr(admission_control.time, "monotonic", lambda: 100.0)
+    limiter = RateLimiter(rate=1, burst=2)
+    assert limiter.check("a") == 0 and limiter.check("a") == 0
+    assert limiter.check("a") == pytest.approx(1.0)
+    assert limiter.check("b") == 0
+    assert limiter.stats()["limited"] == 1 and limiter.stats()["clients"] == 2
+
+
+def test_rate_limiter_forgets_least_recent_clients():
+    limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+    limiter.check("a")
+    limiter.check("b")
+    limiter.check("a")
+    limiter.check("c")
+    assert list(limiter.buckets) == ["a", "c"]
+
+
+def test_zero_rate_disables_limit():
+    limiter = RateLimiter(rate=0, burst=1)
+    assert all(limiter.check("a") == 0 for _ in range(100))
+
+
+def test_priority_limiter_serves_interactive_first_and_rejects_full_queue():
+    async def run():
+        limiter = PriorityLimiter(limit=2, max_queue=1, queue_timeout=1.0, reserved=1)
+        order = []
+        release = asyncio.Event()
+
+        async def work(name, priority):
+            async with limiter.slot(priority):
+                order.append(name)
+                await release.wait()
+
+        # Bulk work may not take the reserved slot
+        first = asyncio.create_task(work("bulk1", BULK))
+        await asyncio.sleep(0)
+        bulk = asyncio.create_task(work("bulk2", BULK))
+        await asyncio.sleep(0)
+        assert order == ["bulk1"] and limiter.stats()["waiting"]["bulk"] == 1
+        interactive = asyncio.create_task(work("interactive", INTERACTIVE))
+        await asyncio.sleep(0)
+        assert order == ["bulk1", "interactive"]
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await work("bulk3", BULK)
+        assert rejected.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(first, bulk, interactive)
+        assert order == ["bulk1", "interactive", "bulk2"]
+        assert limiter.in_use == 0 and limiter.stats()["rejected"] == 1
+
+    asyncio.run(run())
+
+
+def test_priority_limiter_times_out_waiters():
+    async def run():
+        limiter = PriorityLimiter(limit=1, queue_timeout=0.05)
+        async with limiter.slot():
+            with pytest.raises(AdmissionRejected):
+                async with limiter.slot():
+                    pass
+        assert limiter.stats()["timedOut"] == 1 and limiter.queued() == 0
+        async with limiter.slot():
+            assert limiter.in_use == 1
+
+    asyncio.run(run())
+
+
+def test_forwarded_client_takes_rightmost_hop():
+    headers = {b"x-forwarded-for": b"6.6.6.6, 1.2.3.4, 127.0.0.1"}
+    assert forwarded_client("127.0.0.1", headers, trusted=True) == "1.2.3.4"
+    assert forwarded_client("5.5.5.5", headers, trusted=False) == "5.5.5.5"
+    assert forwarded_client("127.0.0.1", {}, trusted=True) == "127.0.0.1"
+
+
+def test_client_id_needs_proxy_secret():
+    headers = {b"x-forwarded-for": b"1.2.3.4", b"x-client-id": b"rotating"}
+    assert forwarded_client("127.0.0.1", headers, True) == "1.2.3.4"
+    assert forwarded_client("127.0.0.1", headers, True, "secret") == "1.2.3.4"
+    assert forwarded_client("127.0.0.1", {**headers, b"x-proxy-secret": b"wrong"}, True, "secret") == "1.2.3.4"
+    assert forwarded_client("127.0.0.1", {**headers, b"x-proxy-secret": b"secret"}, True, "secret") == "rotating"
@@ -0,0 +1,91 @@
+import chess
+import numpy as np
+import pytest
+
+from board_state import (BoardState, EMPTY, PIECE_LABELS, SQUARE_INDEX, board_labels,
+                         decode_placement, encode_placement, possible_turns)
+
+FENS = [
+    chess.STARTING_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    "8/8/8/4k3/8/8/8/4K3 b - - 12 60",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+]
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_fen_round_trip(fen):
+    assert BoardState.from_fen(fen).fen() == fen
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_labels_match_python_chess(fen):
+    board = chess.Board(fen)
+    state = BoardState.from_fen(fen)
+    assert np.array_equal(state.labels, board_labels(board))
+    assert BoardState.from_board(board).to_board().board_fen() == board.board_fen()
+
+
+def test_placement_codec_round_trip():
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        labels = rng.integers(0, 13, 64).astype(np.int8)
+        labels[rng.random(64) < 0.5] = EMPTY
+        assert np.array_equal(decode_placement(encode_placement(labels)), labels)
+
+
+def test_invalid_placement_is_rejected():
+    with pytest.raises(ValueError):
+        BoardState.from_fen("rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR")
+    with pytest.raises(ValueError):
+        BoardState.from_fen("")
+
+
+def test_diff_of_a_move_and_a_capture():
+    before = BoardState.from_fen("rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 2")
+    after = BoardState.from_fen("rnbqkbnr/ppp1pppp/8/8/4p3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 3")
+    diff = before.diff(after)
+    assert sorted(diff["changed"]) == ["d5", "e4"]
+    assert diff["removed"] == {"d5": "p", "e4": "P"}
+    assert diff["added"] == {"e4": "p"}
+    assert diff["moved"] == [("p", "d5", "e4")]
+    assert before.diff(before)["changed"] == []
+
+
+def test_set_piece_keeps_most_confident_and_candidates():
+    state = BoardState()
+    index = SQUARE_INDEX["e4"]
+    assert state.set_piece(index, "N", 0.6)
+    assert not state.set_piece(index, "B", 0.4)
+    assert state.set_piece(index, "P", 0.9)
+    assert state.piece_at("e4") == "P"
+    assert list(state.candidate_labels[index]) == [PIECE_LABELS[s] for s in "PNB"]
+    assert not state.set_piece(index, "x", 1.0)
+
+
+def test_equality_and_hash_use_placement_only():
+    a = BoardState.from_fen(chess.STARTING_FEN, confidence=0.5)
+    b = BoardState.from_fen(chess.STARTING_FEN.replace(" w ", " b "))
+    assert a == b and hash(a) == hash(b)
+    assert a != BoardState()
+
+
+def test_positions_round_trip():
+    state = BoardState.from_fen(FENS[1], confidence=0.75)
+    rebuilt = BoardState.from_positions(state.to_positions(with_confidence=True))
+    assert rebuilt == state
+    assert rebuilt.mean_confidence() == pytest.approx(0.75)
+
+
+def test_infer_fields_from_checks():
+    # Black is in check from the rook, so only black can be to move
+    state = BoardState.from_fen("4k3/8/8/8/8/8/8/R3R1K1")
+    assert possible_turns(state.labels) == ["b"]
+    assert state.infer_fields() == ["b"]
+    assert state.turn == "b" and state.castling == "-"
+    assert possible_turns(BoardState.from_fen(chess.STARTING_FEN).labels) == ["w", "b"]
+
+    # Rights only where king and rook are still on their home squares
+    state = BoardState.from_fen("r3k3/8/8/8/8/8/8/R3K2R")
+    state.infer_fields()
+    assert state.castling == "KQq"
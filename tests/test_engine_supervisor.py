@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+from engine_supervisor import EngineSupervisor, EngineTimeout, EngineUnavailable
+
+
+class FakeEngine:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    def ping(self):
+        if not self.healthy:
+            raise RuntimeError("no readyok")
+
+    def close(self):
+        self.closed = True
+
+    def quit(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.engines = []
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("binary missing")
+        self.engines.append(FakeEngine())
+        return self.engines[-1]
+
+
+@pytest.fixture
+def supervisor():
+    supervisors = []
+
+    def make(factory, **kwargs):
+        kwargs.setdefault("ping_interval", 60.0)
+        supervisors.append(EngineSupervisor(factory, **kwargs))
+        return supervisors[-1]
+
+    yield make
+    for supervisor in supervisors:
+        supervisor.close()
+
+
+def test_call_returns_result_and_records_latency(supervisor):
+    engines = Factory()
+    engine_supervisor = supervisor(engines)
+    assert engine_supervisor.call(lambda engine: engine is engines.engines[0], 1.0)
+    stats = engine_supervisor.stats()
+    assert stats["calls"] == 1 and stats["restarts"] == 0
+    assert stats["latency_p50_ms"] is not None
+
+
+def test_timeout_kills_and_restarts_engine(supervisor):
+    engines = Factory()
+    engine_supervisor = supervisor(engines, initial_backoff=0.05)
+    with pytest.raises(EngineTimeout):
+        engine_supervisor.call(lambda engine: time.sleep(0.5), 0.05)
+    assert engines.engines[0].closed
+    # Backing off right after the failure
+    assert engine_supervisor.engine is None
+    time.sleep(0.1)
+    assert engine_supervisor.call(lambda engine: "ok", 1.0) == "ok"
+    stats = engine_supervisor.stats()
+    assert stats["timeouts"] == 1 and stats["restarts"] == 1 and len(engines.engines) == 2
+
+
+def test_engine_error_restarts_engine(supervisor):
+    engines = Factory()
+    engine_supervisor = supervisor(engines, initial_backoff=0.0)
+
+    def crash(engine):
+        raise EOFError("engine process died")
+
+    with pytest.raises(EOFError):
+        engine_supervisor.call(crash, 1.0)
+    assert engine_supervisor.engine is engines.engines[1]
+
+
+def test_start_failures_back_off_exponentially(supervisor):
+    engines = Factory(failures=3)
+    engine_supervisor = supervisor(engines, initial_backoff=0.1)
+    with pytest.raises(EngineUnavailable):
+        engine_supervisor.call(lambda engine: None, 1.0)
+    # No retry within the first backoff
+    assert engine_supervisor.engine is None and engines.failures == 2
+    time.sleep(0.12)
+    assert engine_supervisor.engine is None and engines.failures == 1
+    # The second backoff is twice as long
+    time.sleep(0.12)
+    assert engine_supervisor.engine is None and engines.failures == 1
+    time.sleep(0.1)
+    assert engine_supervisor.engine is None and engines.failures == 0
+    time.sleep(0.42)
+    assert engine_supervisor.engine is engines.engines[0]
+    assert engine_supervisor.stats()["failures"] == 3
+
+
+def test_backoff_is_capped(supervisor):
+    engines = Factory(failures=10)
+    engine_supervisor = supervisor(engines, initial_backoff=0.01, max_backoff=0.02)
+    deadline = time.monotonic() + 2.0
+    while engine_supervisor.engine is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert engine_supervisor.engine is not None
+    # A successful call clears the failure streak
+    engine_supervisor.call(lambda engine: None, 1.0)
+    assert engine_supervisor.stats()["consecutive_failures"] == 0
+
+
+def test_failed_health_ping_restarts_idle_engine(supervisor):
+    engines = Factory()
+    engine_supervisor = supervisor(engines, ping_interval=0.02, initial_backoff=0.0)
+    first = engine_supervisor.engine
+    first.healthy = False
+    deadline = time.monotonic() + 2.0
+    while not first.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert first.closed
+    assert engine_supervisor.engine is not first
+
+
+def test_no_pings_during_a_session(supervisor):
+    engines = Factory()
+    engine_supervisor = supervisor(engines, ping_interval=0.02)
+    engine = engine_supervisor.engine
+    engine.healthy = False
+    engine_supervisor.begin_session()
+    time.sleep(0.1)
+    assert not engine.closed
+    engine_supervisor.end_session()
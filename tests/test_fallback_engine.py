@@ -0,0 +1,60 @@
+import threading
+import time
+
+import chess
+
+from fallback_engine import FallbackEngine
+
+
+def test_finds_mate_in_one():
+    # Back-rank mate: Re8#
+    board = chess.Board("6k1/5ppp/8/8/8/8/8/4R1K1 w - - 0 1")
+    result = FallbackEngine().search(board, time_limit=2.0)
+    assert result["move"] == chess.Move.from_uci("e1e8")
+    assert result["score"].white().is_mate() and result["score"].white().mate() == 1
+
+
+def test_finds_mate_in_one_for_black():
+    board = chess.Board("4r1k1/8/8/8/8/8/5PPP/6K1 b - - 0 1")
+    result = FallbackEngine().search(board, time_limit=2.0)
+    assert result["move"] == chess.Move.from_uci("e8e1")
+    assert result["score"].relative.mate() == 1
+
+
+def test_takes_a_hanging_queen():
+    board = chess.Board("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+    result = FallbackEngine().search(board, time_limit=1.0)
+    assert result["move"] == chess.Move.from_uci("d2d5")
+    assert result["score"].white().score() > 500
+
+
+def test_no_legal_move():
+    board = chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+    assert FallbackEngine().search(board)["move"] is None
+
+
+def test_respects_node_and_time_budget():
+    engine = FallbackEngine()
+    result = engine.search(chess.Board(), time_limit=10.0, max_nodes=3000)
+    assert result["move"] in chess.Board().legal_moves
+    # The budget is checked every 1024 nodes
+    assert result["nodes"] < 3000 + 1024
+
+    started = time.monotonic()
+    engine.search(chess.Board(), time_limit=0.2)
+    assert time.monotonic() - started < 1.0
+
+
+def test_stop_event_ends_search():
+    stop = threading.Event()
+    stop.set()
+    result = FallbackEngine().search(chess.Board(), time_limit=10.0, stop=stop)
+    assert result["move"] in chess.Board().legal_moves
+
+
+def test_principal_variation_is_legal():
+    board = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+    result = FallbackEngine().search(board, time_limit=0.5)
+    for move in result["pv"]:
+        assert move in board.legal_moves
+        board.push(move)
@@ -0,0 +1,61 @@
+from board_state import BoardState
+from fen_stabilizer import FenStabilizer
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR"
+# START with the d1 queen misread as a king
+FLICKER = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBKKBNR"
+
+
+def feed(stabilizer, fens, confidence=0.5):
+    # Pieces at the confidence of an empty square: every reading is one vote
+    emitted = []
+    for fen in fens:
+        state = stabilizer.update(BoardState.from_fen(fen, confidence))
+        if state is not None:
+            emitted.append(state.placement())
+    return emitted
+
+
+def test_emits_after_stable_frames():
+    stabilizer = FenStabilizer(stable_frames=3)
+    assert feed(stabilizer, [START, START]) == []
+    assert feed(stabilizer, [START]) == [START]
+
+
+def test_same_board_is_emitted_once():
+    stabilizer = FenStabilizer()
+    assert feed(stabilizer, [START] * 10) == [START]
+
+
+def test_single_flicker_is_voted_away():
+    stabilizer = FenStabilizer()
+    feed(stabilizer, [START] * 8)
+    assert feed(stabilizer, [FLICKER] + [START] * 4) == []
+    assert stabilizer.board_state().placement() == START
+
+
+def test_hysteresis_needs_a_clear_majority():
+    stabilizer = FenStabilizer(history=8, switch_share=0.6)
+    feed(stabilizer, [START] * 8)
+    # Half of the buffered readings show the move: not enough to switch
+    assert feed(stabilizer, [E4] * 4) == []
+    # 5 of 8 switch, and the board is emitted once stable for 3 readings
+    assert feed(stabilizer, [E4] * 2) == []
+    assert feed(stabilizer, [E4]) == [E4]
+
+
+def test_clear_history_keeps_reference_board():
+    stabilizer = FenStabilizer()
+    feed(stabilizer, [START] * 3)
+    stabilizer.clear_history()
+    assert feed(stabilizer, [START] * 3) == []
+    stabilizer.clear_history()
+    assert feed(stabilizer, [E4] * 3) == [E4]
+
+
+def test_reset_forgets_emitted_board():
+    stabilizer = FenStabilizer()
+    feed(stabilizer, [START] * 3)
+    stabilizer.reset()
+    assert feed(stabilizer, [START] * 3) == [START]
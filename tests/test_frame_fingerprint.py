@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+
+from frame_fingerprint import FingerprintCache, distance, fingerprint
+
+
+def board_image():
+    squares = np.indices((8, 8)).sum(axis=0) % 2
+    image = np.kron(squares * 120 + 60, np.ones((40, 40))).astype(np.uint8)
+    return np.dstack([image] * 3)
+
+
+def test_noise_and_exposure_keep_the_fingerprint():
+    image = board_image()
+    rng = np.random.default_rng(0)
+    noisy = np.clip(image.astype(np.int16) * 1.2 + 15 + rng.normal(0, 4, image.shape), 0, 255).astype(np.uint8)
+    assert distance(fingerprint(image), fingerprint(noisy)) <= 2
+
+
+def test_moved_piece_changes_the_fingerprint():
+    image = board_image()
+    moved = image.copy()
+    moved[45:75, 45:75] = 255
+    assert distance(fingerprint(image), fingerprint(moved)) > 2
+
+
+def test_cache_hits_near_duplicates_and_evicts_oldest():
+    cache = FingerprintCache(max_entries=2)
+    image = board_image()
+    key = cache.fingerprint(image)
+    assert cache.lookup(key) is None
+    cache.store(key, "start")
+    assert cache.lookup(cache.fingerprint(np.clip(image.astype(np.int16) + 3, 0, 255).astype(np.uint8))) == "start"
+
+    for offset in (85, 165):
+        moved = image.copy()
+        moved[offset:offset + 30, offset:offset + 30] = 255
+        cache.store(cache.fingerprint(moved), offset)
+    assert cache.lookup(key) is None
+    assert cache.hit_ratio == 1 / 3
+
+    cache.reset()
+    assert cache.entries == []
+
+
+def test_concurrent_lookups_are_counted():
+    cache = FingerprintCache()
+    key = cache.fingerprint(board_image())
+    cache.store(key, "start")
+
+    def look():
+        for _ in range(200):
+            assert cache.lookup(key) == "start"
+
+    threads = [threading.Thread(target=look) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.lookups == cache.hits == 800
+    assert len(cache.entries) == 1
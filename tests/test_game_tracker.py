@@ -0,0 +1,62 @@
+import chess
+import numpy as np
+
+from board_state import BoardState, PIECE_LABELS
+from game_tracker import GameTracker
+
+GAME = ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "b5a4", "g8f6"]
+
+
+def positions(moves):
+    board = chess.Board()
+    boards = [board.copy()]
+    for move in moves:
+        board.push_uci(move)
+        boards.append(board.copy())
+    return boards
+
+
+def noisy(board, rng, flips=2):
+    """Detections of ``board`` with a few squares misread at low confidence"""
+    state = BoardState.from_board(board, confidence=0.9)
+    for index in rng.choice(64, flips, replace=False):
+        state.labels[index] = PIECE_LABELS[rng.choice(list("PNBRQKpnbrqk"))]
+        state.confidences[index] = 0.3
+    return state
+
+
+def test_reconstructs_noisy_game():
+    rng = np.random.default_rng(7)
+    tracker = GameTracker()
+    for board in positions(GAME):
+        for _ in range(3):
+            tracker.update(noisy(board, rng))
+    assert tracker.uci_moves() == GAME
+    assert tracker.fen() == positions(GAME)[-1].fen()
+
+
+def test_missed_frame_recovers_both_moves():
+    boards = positions(GAME)
+    tracker = GameTracker()
+    # The position after 1...e5 is never seen
+    for board in boards[:2] + boards[3:]:
+        for _ in range(3):
+            tracker.update(BoardState.from_board(board, confidence=0.9))
+    assert tracker.uci_moves() == GAME
+
+
+def test_commits_moves_and_writes_pgn():
+    tracker = GameTracker()
+    committed = []
+    for board in positions(GAME[:4]):
+        for _ in range(3):
+            committed += tracker.update(BoardState.from_board(board, confidence=0.9))
+    assert [move.uci() for move in committed] == GAME[:len(committed)]
+    assert "1. e4 e5 2. Nf3 Nc6" in tracker.pgn()
+
+
+def test_side_to_move_of_mid_game_start():
+    board = positions(GAME)[4]
+    tracker = GameTracker(board=board)
+    tracker.update(BoardState.from_board(board, confidence=0.9))
+    assert tracker.side_to_move() == "w"
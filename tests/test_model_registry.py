@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from model_registry import ModelRegistry, discover_models
+
+
+class Loader:
+    """Stands in for YOLO: a model is the content of its weight file"""
+
+    def __init__(self):
+        self.loads = []
+
+    def __call__(self, path):
+        self.loads.append(path)
+        with open(path) as f:
+            return f.read()
+
+
+@pytest.fixture
+def weights(tmp_path):
+    paths = {}
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.pt"
+        path.write_text(f"{name}1")
+        paths[name] = str(path)
+    return paths
+
+
+def test_models_load_lazily_and_least_recent_is_evicted(weights):
+    loader = Loader()
+    registry = ModelRegistry(weights, default="a", max_models=2, loader=loader, warmup=False)
+    assert loader.loads == []
+    assert registry.get()[:2] == ("a", "a1")
+    registry.get("b")
+    registry.get("a")
+    assert len(loader.loads) == 2
+    registry.get("c")
+    assert registry.stats()["resident"] == ["a", "c"]
+    assert registry.stats()["evictions"] == 1
+    registry.get("b")
+    assert loader.loads.count(weights["b"]) == 2
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_reload_swaps_in_new_weights(weights):
+    registry = ModelRegistry(weights, default="a", loader=Loader(), warmup=False)
+    _, model, version = registry.get()
+    with open(weights["a"], "w") as f:
+        f.write("a2 retrained")
+    os.utime(weights["a"], ns=(version[0] + 10**9, version[0] + 10**9))
+    assert registry.current_version() != version
+    registry.reload("a")
+    _, reloaded, new_version = registry.get()
+    assert (model, reloaded) == ("a1", "a2 retrained")
+    assert new_version == registry.current_version()
+    assert registry.stats()["reloads"] == 1
+
+
+def test_failed_load_keeps_nothing(weights, tmp_path):
+    registry = ModelRegistry({"broken": str(tmp_path / "missing.pt")}, default="broken",
+                             loader=Loader(), warmup=False)
+    assert not registry.available()
+    with pytest.raises(OSError):
+        registry.get()
+    assert registry.stats()["failures"] == 1 and registry.stats()["resident"] == []
+
+
+def test_discover_models(tmp_path):
+    (tmp_path / "train" / "weights").mkdir(parents=True)
+    (tmp_path / "train" / "weights" / "best.pt").write_text("")
+    (tmp_path / "train2").mkdir()
+    assert discover_models(tmp_path) == {"train": str(tmp_path / "train" / "weights" / "best.pt")}
@@ -0,0 +1,70 @@
+import numpy as np
+
+from board_state import BoardState
+from fen_stabilizer import FenStabilizer
+from motion_gate import MotionGate
+
+BEFORE = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+AFTER = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR"
+# AFTER with the moved pawn misread as a bishop
+FLICKER = "rnbqkbnr/pppppppp/8/8/4B3/8/PPPP1PPP/RNBQKBNR"
+
+
+def scene(moved=False, hand=False):
+    image = np.full((64, 64), 100, np.uint8)
+    if moved:
+        image[24:32, 32:40] = 220
+    if hand:
+        image[:40, 8:48] = 30
+    return image
+
+
+def run(gate, stabilizer, image, readings, frames=20):
+    """Feed still frames of ``image`` the way process_frame does; returns the emitted FENs"""
+    emitted = []
+    readings = iter(readings)
+    for _ in range(frames):
+        if not gate.should_detect(image):
+            continue
+        if gate.burst_start:
+            stabilizer.clear_history()
+        reading = next(readings, None)
+        if reading is None:
+            continue
+        state = stabilizer.update(BoardState.from_fen(reading, confidence=0.9))
+        if stabilizer.settled:
+            gate.end_burst()
+        if state is not None:
+            emitted.append(state.placement())
+    return emitted
+
+
+def test_noisy_burst_still_emits_move():
+    stabilizer = FenStabilizer()
+    gate = MotionGate(confirm_frames=3 * stabilizer.stable_frames)
+    assert run(gate, stabilizer, scene(), [BEFORE] * 10) == [BEFORE]
+
+    # A hand moves a piece; the first readings of the settled board disagree
+    gate.should_detect(scene(hand=True))
+    emitted = run(gate, stabilizer, scene(moved=True), [FLICKER, AFTER, FLICKER] + [AFTER] * 10)
+    assert emitted == [AFTER]
+
+
+def test_burst_ends_once_readings_agree():
+    stabilizer = FenStabilizer()
+    gate = MotionGate(confirm_frames=3 * stabilizer.stable_frames)
+    run(gate, stabilizer, scene(), [BEFORE] * 10)
+    assert gate.detections == stabilizer.stable_frames
+
+
+def test_burst_is_capped():
+    gate = MotionGate(confirm_frames=4)
+    detections = sum(gate.should_detect(scene()) for _ in range(30))
+    assert detections == 4
+
+
+def test_hand_over_board_skips_detection():
+    gate = MotionGate()
+    for _ in range(5):
+        gate.should_detect(scene())
+    assert not any(gate.should_detect(scene(hand=True)) for _ in range(10))
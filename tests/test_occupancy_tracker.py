@@ -0,0 +1,68 @@
+import chess
+import cv2
+import numpy as np
+import pytest
+
+from board_state import BoardState
+
+# The tracker shares the detection pipeline, which imports ultralytics
+pytest.importorskip("ultralytics")
+from occupancy_tracker import FALLBACK, MOVE, STATIC, OccupancyTracker
+
+SIZE = 65
+
+
+def render(board):
+    """Warped-board image: plain squares, white and black pieces as discs"""
+    image = np.zeros((8 * SIZE, 8 * SIZE), np.uint8)
+    for row in range(8):
+        for column in range(8):
+            image[row * SIZE:(row + 1) * SIZE, column * SIZE:(column + 1) * SIZE] = (
+                170 if (row + column) % 2 == 0 else 110)
+            piece = board.piece_at(chess.square(column, 7 - row))
+            if piece is not None:
+                centre = (column * SIZE + SIZE // 2, row * SIZE + SIZE // 2)
+                cv2.circle(image, centre, SIZE // 3, 240 if piece.color else 20, -1)
+                cv2.circle(image, centre, SIZE // 6, 128, 2)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def synchronized(board):
+    tracker = OccupancyTracker(square_size=SIZE)
+    tracker.synchronize(render(board), 0, 0, BoardState.from_board(board))
+    return tracker
+
+
+def test_needs_a_detection_before_tracking():
+    tracker = OccupancyTracker(square_size=SIZE)
+    assert tracker.update(render(chess.Board()), 0, 0) == FALLBACK
+
+
+def test_static_board():
+    board = chess.Board()
+    tracker = synchronized(board)
+    assert tracker.update(render(board), 0, 0) == STATIC
+
+
+def test_follows_a_move_without_the_detector():
+    board = chess.Board()
+    tracker = synchronized(board)
+    board.push_uci("e2e4")
+    assert tracker.update(render(board), 0, 0) == MOVE
+    assert tracker.last_move == chess.Move.from_uci("e2e4")
+    assert tracker.fen().split()[0] == board.board_fen()
+
+
+def test_promotion_needs_the_detector():
+    # Every promotion piece leaves the same occupancy
+    board = chess.Board("8/4P3/8/8/8/8/k7/4K3 w - - 0 1")
+    tracker = synchronized(board)
+    board.push_uci("e7e8q")
+    assert tracker.update(render(board), 0, 0) == FALLBACK
+
+
+def test_occupancy_of_no_legal_move_falls_back():
+    board = chess.Board()
+    tracker = synchronized(board)
+    board.remove_piece_at(chess.D1)
+    assert tracker.update(render(board), 0, 0) == FALLBACK
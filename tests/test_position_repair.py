@@ -0,0 +1,67 @@
+import chess
+import pytest
+
+from board_state import BoardState, PIECE_LABELS, SQUARE_INDEX
+from position_repair import LIVE_MAX_NODES, find_violations, is_plausible, repair_position
+
+
+def detected(fen, candidates=(), confidence=0.9):
+    """A reading of ``fen`` with runner-up labels as (square, symbol, confidence)"""
+    state = BoardState.from_fen(fen, confidence)
+    for square, symbol, score in candidates:
+        state.add_candidate(SQUARE_INDEX[square], symbol, score)
+    return state
+
+
+def test_plausible_reading_is_unchanged():
+    state = detected(chess.STARTING_FEN)
+    repair = repair_position(state)
+    assert repair["changes"] == [] and repair["score"] == 1.0
+    assert repair["state"] == state
+
+
+def test_low_confidence_piece_is_kept():
+    state = detected(chess.STARTING_FEN)
+    state.confidences[SQUARE_INDEX["g1"]] = 0.3
+    repair = repair_position(state)
+    assert repair["state"].piece_at("g1") == "N"
+    assert repair["changes"] == []
+
+
+def test_mislabelled_king_takes_its_runner_up():
+    # The black king was read as a second white king
+    state = detected("rnbqKbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR", [("e8", "k", 0.45)])
+    assert "white has 2 kings" in [reason for reason, _ in find_violations(state.labels)]
+    repair = repair_position(state)
+    assert repair["state"].placement() == chess.STARTING_BOARD_FEN
+    assert repair["changes"] == [(SQUARE_INDEX["e8"], PIECE_LABELS["K"], PIECE_LABELS["k"])]
+    assert 0.0 < repair["score"] < 1.0
+
+
+def test_pawn_on_back_rank_is_repaired():
+    # The g1 knight was read as a pawn, with the knight as runner-up
+    state = detected("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBPR", [("g1", "N", 0.4)])
+    repair = repair_position(state)
+    assert repair["state"].piece_at("g1") == "N"
+    assert is_plausible(repair["state"].labels)
+    # The repaired square carries the runner-up's confidence
+    assert repair["state"].confidences[SQUARE_INDEX["g1"]] == pytest.approx(0.4)
+
+
+def test_missing_king_without_candidate_is_rejected():
+    state = detected("rnbq1bnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR")
+    assert repair_position(state) is None
+
+
+def test_reading_needing_many_changes_is_rejected():
+    # Three pawns on the back rank need three changes
+    state = detected("4k3/8/8/8/8/8/8/PPP1K3")
+    assert repair_position(state, max_changes=2) is None
+    repair = repair_position(state)
+    assert len(repair["changes"]) == 3
+    assert repair["state"].placement() == "4k3/8/8/8/8/8/8/4K3"
+
+
+def test_live_budget_gives_up():
+    state = detected("rnbqkbnr/pppppppp/1q6/4P3/2N5/b4P2/PPrPPPPP/RNQQKBNR")
+    assert repair_position(state, max_nodes=LIVE_MAX_NODES) is None
@@ -0,0 +1,53 @@
+from result_cache import ResultCache
+
+
+def test_key_depends_on_content_and_parameters():
+    assert ResultCache.key(b"image", "model", 640) == ResultCache.key(b"image", "model", 640)
+    assert ResultCache.key(b"image", "model", 640) != ResultCache.key(b"image", "model", 480)
+    assert ResultCache.key(b"image") != ResultCache.key(b"other")
+    # Parameters are separated, so they cannot run into each other
+    assert ResultCache.key(b"x", "ab", "c") != ResultCache.key(b"x", "a", "bc")
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"1111")
+    cache.put("b", b"2222")
+    assert cache.get("a") == b"1111"
+    # "b" is now the least recently used and makes room for "c"
+    cache.put("c", b"3333")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1111" and cache.get("c") == b"3333"
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_replacing_an_entry_keeps_size_right():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"1111")
+    cache.put("a", b"22")
+    assert cache.get("a") == b"22"
+    assert cache.stats()["bytes"] == 2
+
+
+def test_oversized_value_is_not_kept_in_memory():
+    cache = ResultCache(max_bytes=4)
+    cache.put("a", b"123456")
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 0, "disk_hits": 0, "misses": 1, "entries": 0, "bytes": 0}
+
+
+def test_disk_tier_outlives_memory_and_is_shared(tmp_path):
+    cache = ResultCache(max_bytes=4, directory=str(tmp_path))
+    cache.put("aa11", b"1111")
+    cache.put("bb22", b"2222")
+    # Evicted from memory, read back from disk and remembered again
+    assert cache.get("aa11") == b"1111"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("aa11") == b"1111"
+    assert cache.stats()["hits"] == 1
+
+    # Another worker's cache on the same directory
+    other = ResultCache(directory=str(tmp_path))
+    assert other.get("bb22") == b"2222"
+    assert other.get("cc33") is None
+    assert not list(tmp_path.glob("*/tmp*"))
@@ -0,0 +1,37 @@
+import chess
+
+from static_evaluation import evaluate, game_phase, material, pawn_structure
+
+
+def test_start_position_is_balanced():
+    result = evaluate(chess.Board())
+    assert result["score"] == 0
+    assert result["phase"] == 1.0
+    assert result["white"] == result["black"]
+
+
+def test_mirrored_position_negates_score():
+    board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+    assert evaluate(board.mirror())["score"] == -evaluate(board)["score"]
+
+
+def test_material_and_phase():
+    board = chess.Board("4k3/8/8/8/8/8/PPPP4/R3K3 w - - 0 1")
+    assert material(board, chess.WHITE) == 900
+    assert material(board, chess.BLACK) == 0
+    assert game_phase(board) == 2 / 24
+    assert game_phase(chess.Board("4k3/pp6/8/8/8/8/PP6/4K3 w - - 0 1")) == 0.0
+
+
+def test_pawn_structure():
+    # Doubled and isolated a-pawns, passed pawn on d5
+    board = chess.Board("4k3/7p/8/3P4/8/P7/P5P1/4K3 w - - 0 1")
+    white = pawn_structure(board, chess.WHITE)
+    assert white["doubled"] == 1
+    assert white["isolated"] == 4
+    assert chess.D5 in white["passed"] and chess.G2 not in white["passed"]
+
+
+def test_extra_queen_wins():
+    board = chess.Board("3qk3/8/8/8/8/8/8/3QK2Q w - - 0 1")
+    assert evaluate(board)["score"] > 800
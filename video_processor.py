@@ -0,0 +1,166 @@
+"""
+Segment-parallel FEN extraction for long videos.
+
+The video is split into time segments and every segment is handed to its own
+worker process, which owns a private model instance and a fixed thread budget.
+Each segment starts a little before its boundary so per-segment detection
+state can warm up; FENs from the warm-up window are discarded and the
+per-segment timelines are stitched back into one ordered timeline.
+"""
+
+import argparse
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from chessboard_processor import DEFAULT_MODEL_PATH, initialize_model, process_frame
+from game_tracker import GameTracker
+from motion_gate import MotionGate
+from resource_governor import ResourceGovernor, limit_vision_threads, usable_cores
+
+# Per-process model, created once by the pool initializer
+_model = None
+
+
+def _init_worker(model_path, threads_per_worker):
+    """Limit thread pools and load the model once per worker process"""
+    global _model
+    limit_vision_threads(threads_per_worker)
+    _model = initialize_model(model_path)
+
+
+def plan_segments(frame_count, fps, workers, overlap_seconds=5.0, min_segment_seconds=60.0):
+    """Split a video into (warmup_frame, start_frame, end_frame) segments"""
+    if frame_count <= 0:
+        return []
+
+    # A few segments per worker keeps the pool busy when segments finish unevenly
+    min_segment_frames = max(1, int(min_segment_seconds * fps))
+    segment_count = max(1, min(workers * 4, frame_count // min_segment_frames))
+    segment_frames = -(-frame_count // segment_count)
+    overlap_frames = int(overlap_seconds * fps)
+
+    segments = []
+    for start_frame in range(0, frame_count, segment_frames):
+        end_frame = min(start_frame + segment_frames, frame_count)
+        warmup_frame = max(0, start_frame - overlap_frames)
+        segments.append((warmup_frame, start_frame, end_frame))
+    return segments
+
+
+def process_segment(video_path, warmup_frame, start_frame, end_frame, sample_every,
+                    use_motion_gate=True):
+    """Run detection over one segment and return its (frame, fen) timeline"""
+    motion_gate = MotionGate() if use_motion_gate else None
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_frame)
+
+    timeline = []
+    frame_index = warmup_frame
+    while frame_index < end_frame:
+        # Sample on a global frame grid so neighbouring segments line up
+        if frame_index % sample_every:
+            if not cap.grab():
+                break
+            frame_index += 1
+            continue
+
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        _, fen = process_frame(frame, _model, motion_gate=motion_gate)
+        if fen and frame_index >= start_frame:
+            timeline.append((frame_index, fen))
+        frame_index += 1
+
+    cap.release()
+    return timeline
+
+
+def _process_segment_task(args):
+    return process_segment(*args)
+
+
+def stitch_timelines(segment_timelines, fps):
+    """Merge per-segment timelines into one ordered, deduplicated timeline"""
+    entries = sorted(entry for timeline in segment_timelines for entry in timeline)
+
+    stitched = []
+    for frame_index, fen in entries:
+        if stitched and stitched[-1]["fen"] == fen:
+            continue
+        stitched.append({
+            "frame": frame_index,
+            "time": round(frame_index / fps, 3),
+            "fen": fen
+        })
+    return stitched
+
+
+def process_video(video_path, workers=None, model_path=DEFAULT_MODEL_PATH,
+                  sample_interval=0.5, overlap_seconds=5.0, use_motion_gate=True):
+    """Extract the FEN timeline of a video using a pool of worker processes"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception(f"Could not open video {video_path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    governor = ResourceGovernor(processes=workers or len(usable_cores()), engine=False)
+    workers = governor.processes
+    threads_per_worker = governor.vision_threads
+    print(governor.report())
+    sample_every = max(1, int(round(sample_interval * fps)))
+
+    segments = plan_segments(frame_count, fps, workers, overlap_seconds)
+    tasks = [(video_path, warmup, start, end, sample_every, use_motion_gate)
+             for warmup, start, end in segments]
+
+    # Spawned workers inherit the environment, so OpenMP/BLAS pools start small
+    limit_vision_threads(threads_per_worker)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path, threads_per_worker)
+    ) as executor:
+        segment_timelines = list(executor.map(_process_segment_task, tasks))
+
+    return stitch_timelines(segment_timelines, fps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract a FEN timeline from a chess video")
+    parser.add_argument("video", help="Path to the input video")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path to the YOLO weights")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between sampled frames")
+    parser.add_argument("--overlap", type=float, default=5.0, help="Warm-up seconds before each segment")
+    parser.add_argument("--no-motion-gate", action="store_true", help="Run detection on every sampled frame")
+    parser.add_argument("--output", help="Write the timeline to this JSON file")
+    parser.add_argument("--pgn", help="Reconstruct the game and write it to this PGN file")
+    args = parser.parse_args()
+
+    timeline = process_video(args.video, args.workers, args.model, args.interval, args.overlap,
+                             use_motion_gate=not args.no_motion_gate)
+
+    if args.pgn:
+        tracker = GameTracker()
+        for entry in timeline:
+            tracker.update_fen(entry["fen"])
+        with open(args.pgn, "w") as f:
+            f.write(tracker.pgn() + "\n")
+        print(f"Wrote {len(tracker.moves())} moves to {args.pgn}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(timeline, f, indent=2)
+        print(f"Wrote {len(timeline)} positions to {args.output}")
+    else:
+        for entry in timeline:
+            print(f"{entry['time']:>10.2f}s  {entry['fen']}")